@@ -0,0 +1,83 @@
+"""Упаковка коротких строк в один запрос и разбор ответа по строкам."""
+
+from typing import Callable, List, Optional
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Добавляется к системному промпту запроса с пакетом строк
+BATCH_INSTRUCTIONS = (
+    "The user message is a JSON array of independent strings. Translate every "
+    "element separately and reply with a JSON array of the translations only: "
+    "same length, same order, no comments and no code fences."
+)
+
+
+def encode_batch(texts: List[str]) -> str:
+    """Формирует сообщение пользователя с пакетом строк."""
+    return json.dumps(texts, ensure_ascii=False, indent=0)
+
+
+def pack_batches(
+    texts: List[str],
+    max_tokens: int,
+    max_items: int,
+    estimate: Callable[[str], int],
+) -> List[List[int]]:
+    """
+    Делит строки на пакеты не больше max_tokens токенов и max_items строк.
+
+    Строка больше max_tokens уходит отдельным пакетом.
+
+    Returns:
+        List[List[int]]: Индексы строк каждого пакета в исходном порядке
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for index, text in enumerate(texts):
+        # Кавычки, экранирование и запятая между элементами
+        tokens = estimate(json.dumps(text, ensure_ascii=False)) + 1
+        if current and (
+            current_tokens + tokens > max_tokens or len(current) >= max_items
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def decode_batch(response: str, count: int) -> Optional[List[str]]:
+    """
+    Разбирает ответ модели на переводы строк пакета.
+
+    Допускаются обрамление ```json и объект с единственным массивом.
+
+    Returns:
+        Optional[List[str]]: Переводы по порядку или None, если ответ
+        не является массивом строк нужной длины
+    """
+    start, end = response.find("["), response.rfind("]")
+    if start == -1 or end < start:
+        return None
+    try:
+        data = json.loads(response[start : end + 1])
+    except json.JSONDecodeError as e:
+        logger.warning("Batch response is not valid JSON: %s", e)
+        return None
+    if (
+        not isinstance(data, list)
+        or len(data) != count
+        or not all(isinstance(item, str) for item in data)
+    ):
+        logger.warning(
+            "Batch response misaligned: expected %d strings, got %s",
+            count,
+            len(data) if isinstance(data, list) else type(data).__name__,
+        )
+        return None
+    return data
@@ -0,0 +1,82 @@
+"""Микробенчмарк: SSEDecoder против построчного разбора, который был в провайдерах."""
+
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from providers.sse_parser import SSEDecoder  # noqa: E402
+
+logger = logging.getLogger("bench")
+
+
+def make_stream(events: int) -> bytes:
+    """Формирует поток в формате OpenAI chat.completion.chunk."""
+    frames = []
+    for i in range(events):
+        chunk = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion.chunk",
+            "choices": [{"index": 0, "delta": {"content": f"слово{i} "}}],
+        }
+        frames.append(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n")
+    frames.append("data: [DONE]\n\n")
+    return "".join(frames).encode("utf-8")
+
+
+def legacy_loop(lines) -> int:
+    """Повторяет прежний цикл: decode + strip + json.loads + debug f-строки."""
+    total = 0
+    for line in lines:
+        if line:
+            line = line.decode("utf-8").strip()
+            logger.debug(f"\n=== Получена строка потока: {line}")
+            if line.startswith("data: "):
+                if line == "data: [DONE]":
+                    break
+                chunk = json.loads(line[6:])
+                logger.debug(f"=== Получен chunk: {chunk}")
+                delta = chunk["choices"][0]["delta"].get("content", "")
+                logger.debug(f"=== Delta получен: {delta}")
+                total += len(delta)
+    return total
+
+
+def decoder_loop(chunks) -> int:
+    """Новый путь: байтовый декодер + json.loads на событие."""
+    total = 0
+    decoder = SSEDecoder()
+    for piece in chunks:
+        for event in decoder.feed(piece):
+            if event.data == "[DONE]":
+                return total
+            chunk = json.loads(event.data)
+            total += len(chunk["choices"][0]["delta"].get("content", ""))
+    return total
+
+
+def bench(name, func, arg, repeat=5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - started)
+    print(f"{name:<10} {best * 1000:8.2f} ms")
+    return best
+
+
+if __name__ == "__main__":
+    events = 20_000
+    payload = make_stream(events)
+    # aiohttp отдает построчно; iter_any - кусками произвольной длины
+    lines = payload.splitlines(keepends=True)
+    chunks = [payload[i : i + 1024] for i in range(0, len(payload), 1024)]
+
+    assert legacy_loop(lines) == decoder_loop(chunks)
+    print(f"{events} событий, {len(payload) / 1024:.0f} KiB")
+    legacy = bench("legacy", legacy_loop, lines)
+    decoder = bench("decoder", decoder_loop, chunks)
+    print(f"ускорение: x{legacy / decoder:.2f}")
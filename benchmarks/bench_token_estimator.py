@@ -0,0 +1,60 @@
+"""Микробенчмарк: стоимость оценки токенов на мегабайт текста."""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from token_estimator import CALIBRATIONS, estimate_tokens  # noqa: E402
+
+SAMPLES = {
+    "latin": "The quick brown fox jumps over the lazy dog. ",
+    "cyrillic": "Съешь же ещё этих мягких французских булок, да выпей чаю. ",
+    "cjk": "敏捷的棕色狐狸跳过了懒狗。",
+    "mixed": "Кнопка «Save» сохраняет файл settings.json. 保存 ",
+}
+
+
+def make_text(sample: str, size: int) -> str:
+    """Повторяет образец до size байт UTF-8."""
+    repeat = size // len(sample.encode("utf-8")) + 1
+    return sample * repeat
+
+
+def per_char_estimate(text: str) -> int:
+    """Наивная оценка циклом по символам для сравнения."""
+    rates = CALIBRATIONS["default"]
+    tokens = 0.0
+    for char in text:
+        code = ord(char)
+        if code < 0x80:
+            tokens += rates.ascii
+        elif code < 0x800:
+            tokens += rates.cyrillic
+        else:
+            tokens += rates.cjk
+    return max(1, int(tokens))
+
+
+def bench(func, text: str, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+if __name__ == "__main__":
+    size = 1024 * 1024
+    print(f"{'текст':<10} {'токенов':>9} {'оценка':>14} {'по символам':>14}")
+    for name, sample in SAMPLES.items():
+        text = make_text(sample, size)
+        megabytes = len(text.encode("utf-8")) / size
+        fast = bench(estimate_tokens, text) / megabytes
+        naive = bench(per_char_estimate, text, repeat=2) / megabytes
+        print(
+            f"{name:<10} {estimate_tokens(text):>9} "
+            f"{fast * 1e6:>8.0f} мкс/МБ {naive * 1000:>8.1f} мс/МБ"
+        )
@@ -0,0 +1,65 @@
+"""Прогрев HTTP-соединений к эндпоинтам моделей."""
+
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+from settings_manager import SettingsManager
+from providers.base_provider import BaseProvider
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPrewarmer:
+    """Заранее открывает TLS-соединения к эндпоинтам текущей и недавних моделей."""
+
+    def __init__(self, settings_manager: SettingsManager):
+        self.settings_manager = settings_manager
+        self._running: Optional[asyncio.Task] = None
+
+    def get_targets(self, current_model: Optional[Dict[str, Any]]) -> List[str]:
+        """
+        Возвращает список эндпоинтов для прогрева без дубликатов по хосту.
+
+        Args:
+            current_model: Конфигурация текущей модели (может быть None)
+        """
+        settings = self.settings_manager.get_network_settings()
+        models = [current_model] if current_model else []
+        models += self.settings_manager.get_recent_models(
+            settings["prewarm_recent_models"]
+        )
+
+        pool = BaseProvider.connection_pool
+        targets = {}
+        for model in models:
+            endpoint = model.get("api_endpoint")
+            # У Google эндпоинт пустой - SDK управляет соединениями сам
+            if endpoint:
+                targets.setdefault(pool.host_key(endpoint), endpoint)
+        return list(targets.values())
+
+    async def prewarm(self, current_model: Optional[Dict[str, Any]]) -> int:
+        """
+        Прогревает соединения параллельно. Повторный вызов во время
+        уже идущего прогрева не запускает новые запросы.
+
+        Returns:
+            int: Количество успешно прогретых хостов
+        """
+        if self._running and not self._running.done():
+            return await asyncio.shield(self._running)
+
+        targets = self.get_targets(current_model)
+        if not targets:
+            return 0
+
+        async def run():
+            results = await asyncio.gather(
+                *(BaseProvider.connection_pool.prewarm(url) for url in targets)
+            )
+            warmed = sum(1 for ok in results if ok)
+            logger.debug("Прогрето соединений: %d из %d", warmed, len(targets))
+            return warmed
+
+        self._running = asyncio.ensure_future(run())
+        return await asyncio.shield(self._running)
@@ -5,7 +5,7 @@ import time
 import logging
 
 
-def register_global_hotkeys(window, hotkey):
+def register_global_hotkeys(window, hotkey, prewarm_on_hotkey=True):
     """Функция для регистрации глобальных горячих клавиш"""
     # print(f"Регистрируем хоткей: {hotkey}")
 
@@ -28,6 +28,10 @@ def register_global_hotkeys(window, hotkey):
         try:
             logging.debug("Функция on_hotkey_triggered вызвана")
 
+            # Прогреваем соединение к модели параллельно с копированием текста
+            if prewarm_on_hotkey:
+                window.prewarm_requested.emit()
+
             # Ждем отпускания всех клавиш пользователем
             logging.debug("Ожидание отпускания всех клавиш...")
             wait_for_keys_release()
@@ -0,0 +1,236 @@
+"""Персистентная статистика задержек и скорости моделей на SQLite."""
+
+from typing import Any, Dict, List, Optional, Tuple
+import csv
+import logging
+import math
+import sqlite3
+import time
+from providers.resilience import (
+    CircuitOpenError,
+    DeadlineExceededError,
+    error_status,
+)
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = (
+    "provider",
+    "model",
+    "created",
+    "ttft",
+    "total",
+    "input_tokens",
+    "output_tokens",
+    "tokens_per_sec",
+    "error",
+)
+
+
+def error_class(error: Optional[BaseException]) -> Optional[str]:
+    """Возвращает короткий класс ошибки для статистики: http_429, deadline_total и т.п."""
+    while error is not None:
+        if isinstance(error, DeadlineExceededError):
+            return f"deadline_{error.kind}"
+        if isinstance(error, CircuitOpenError):
+            return "circuit_open"
+        status = error_status(error)
+        if status is not None:
+            return f"http_{status}"
+        if error.__cause__ is None:
+            return type(error).__name__
+        error = error.__cause__
+    return None
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Перцентиль по методу ближайшего ранга; None для пустого списка."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class LatencyStats:
+    """
+    Временной ряд замеров запросов к моделям: время до первого токена,
+    полное время, размер входа, скорость вывода и класс ошибки.
+
+    Сводки (p50/p95, доля ошибок) считаются по последним window замерам
+    модели и кешируются в памяти до следующей записи по этой модели.
+    Замеры старше max_age_days удаляются.
+    """
+
+    def __init__(self, db_path: str, window: int = 200, max_age_days: int = 30):
+        self.db_path = db_path
+        self.window = window
+        self.max_age = max_age_days * 24 * 3600
+        self._summaries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS samples (
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                created REAL NOT NULL,
+                ttft REAL,
+                total REAL NOT NULL,
+                input_tokens INTEGER NOT NULL,
+                output_tokens INTEGER NOT NULL,
+                tokens_per_sec REAL,
+                error TEXT
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS samples_model "
+            "ON samples (provider, model, created)"
+        )
+        self._conn.execute(
+            "DELETE FROM samples WHERE created < ?", (time.time() - self.max_age,)
+        )
+        self._conn.commit()
+
+    def record(
+        self,
+        provider: str,
+        model: str,
+        total: float,
+        ttft: Optional[float] = None,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        error: Optional[str] = None,
+    ) -> None:
+        """
+        Сохраняет замер одного запроса к модели.
+
+        Args:
+            provider: Провайдер
+            model: Название модели у провайдера
+            total: Полное время запроса, секунды
+            ttft: Время до первого токена, секунды (None - токенов не было)
+            input_tokens: Размер входа в токенах
+            output_tokens: Число токенов ответа
+            error: Класс ошибки (см. error_class) или None при успехе
+        """
+        # Скорость вывода считается после первого токена, без ожидания ответа
+        generation = total - (ttft or 0.0)
+        tokens_per_sec = (
+            output_tokens / generation
+            if error is None and output_tokens and generation > 0
+            else None
+        )
+        try:
+            self._conn.execute(
+                "INSERT INTO samples VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    provider,
+                    model,
+                    time.time(),
+                    ttft,
+                    total,
+                    input_tokens,
+                    output_tokens,
+                    tokens_per_sec,
+                    error,
+                ),
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error("Ошибка записи статистики задержек: %s", e)
+        self._summaries.pop((provider, model), None)
+
+    def get_summary(self, provider: str, model: str) -> Dict[str, Any]:
+        """
+        Возвращает сводку по последним замерам модели.
+
+        Returns:
+            Dict: count, error_rate, ttft_p50, ttft_p95, total_p50, total_p95,
+            tokens_per_sec (медиана), last_sample (время последнего замера);
+            перцентили None, если замеров нет
+        """
+        key = (provider, model)
+        summary = self._summaries.get(key)
+        if summary is not None:
+            return summary
+        rows = self._conn.execute(
+            "SELECT ttft, total, tokens_per_sec, error, created FROM samples "
+            "WHERE provider = ? AND model = ? ORDER BY created DESC LIMIT ?",
+            (provider, model, self.window),
+        ).fetchall()
+        ok = [row for row in rows if row[3] is None]
+        ttfts = [row[0] for row in ok if row[0] is not None]
+        totals = [row[1] for row in ok]
+        speeds = [row[2] for row in ok if row[2] is not None]
+        summary = {
+            "count": len(rows),
+            "errors": len(rows) - len(ok),
+            "error_rate": (len(rows) - len(ok)) / len(rows) if rows else 0.0,
+            "ttft_p50": percentile(ttfts, 0.5),
+            "ttft_p95": percentile(ttfts, 0.95),
+            "total_p50": percentile(totals, 0.5),
+            "total_p95": percentile(totals, 0.95),
+            "tokens_per_sec": percentile(speeds, 0.5),
+            "last_sample": rows[0][4] if rows else None,
+        }
+        self._summaries[key] = summary
+        return summary
+
+    def export_csv(self, path: str) -> int:
+        """
+        Выгружает все замеры в CSV.
+
+        Returns:
+            int: Число выгруженных строк
+        """
+        rows = self._conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM samples ORDER BY created"
+        ).fetchall()
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            writer.writerows(rows)
+        return len(rows)
+
+    def close(self) -> None:
+        """Закрывает соединение с базой."""
+        try:
+            self._conn.close()
+        except sqlite3.Error:
+            pass
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """Короткая строка сводки для списков моделей: «1.2 / 3.4 с · 45 ток/с»."""
+    if not summary or summary["total_p50"] is None:
+        if summary and summary["count"]:
+            return f"ошибки: {summary['errors']} из {summary['count']}"
+        return ""
+    parts = [f"{summary['total_p50']:.1f} / {summary['total_p95']:.1f} с"]
+    if summary["tokens_per_sec"] is not None:
+        parts.append(f"{summary['tokens_per_sec']:.0f} ток/с")
+    if summary["errors"]:
+        parts.append(f"ошибок {summary['error_rate']:.0%}")
+    return " · ".join(parts)
+
+
+def format_summary_tooltip(summary: Dict[str, Any]) -> str:
+    """Подробная сводка для всплывающей подсказки."""
+    if not summary or not summary["count"]:
+        return "Нет замеров"
+
+    def pair(p50: Optional[float], p95: Optional[float]) -> str:
+        return f"{p50:.2f} / {p95:.2f} с" if p50 is not None else "—"
+
+    lines = [
+        f"Замеров: {summary['count']}",
+        f"Первый токен p50 / p95: {pair(summary['ttft_p50'], summary['ttft_p95'])}",
+        f"Ответ целиком p50 / p95: {pair(summary['total_p50'], summary['total_p95'])}",
+    ]
+    if summary["tokens_per_sec"] is not None:
+        lines.append(f"Скорость вывода: {summary['tokens_per_sec']:.0f} ток/с")
+    lines.append(f"Ошибки: {summary['errors']} ({summary['error_rate']:.0%})")
+    return "\n".join(lines)
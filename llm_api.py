@@ -1,15 +1,86 @@
 """Модуль для работы с API различных LLM моделей."""
 
-from typing import Dict, Any
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Set, Tuple
 from settings_manager import SettingsManager
 from providers.llm_provider_factory import LLMProviderFactory
+from providers.stream_events import (
+    DeltaEvent,
+    ErrorEvent,
+    FinishEvent,
+    ItemEvent,
+    RetryEvent,
+    UsageEvent,
+    provider_events,
+)
+from providers.rate_limiter import RateLimiter, get_rate_limiter
+from providers.resilience import DeadlineExceededError
+from providers.concurrency_limiter import (
+    AdaptiveConcurrencyLimiter,
+    get_concurrency_limiter,
+    is_overload,
+)
+from translation_cache import TranslationCache
+from latency_stats import LatencyStats, error_class
+from text_segmenter import chunk_text, join_segments, split_segments
+from batch_protocol import BATCH_INSTRUCTIONS, decode_batch, encode_batch, pack_batches
+from token_estimator import (
+    enter_budget_scope,
+    estimate_tokens,
+    exit_budget_scope,
+    is_truncated,
+    model_family,
+    predict_output_tokens,
+)
+from contextvars import ContextVar
+import asyncio
+import inspect
 import logging
 
+# Маркер завершения общего запроса в очереди подписчика
+_FLIGHT_DONE = object()
+
+# Сведения о переводе, выполняемом в текущей задаче. Задачи asyncio
+# получают копию контекста, поэтому параллельные переводы (в том числе
+# языки translate_many) не перезаписывают сведения друг друга, а куски
+# и дублирующие запросы одного перевода пишут в общий словарь.
+_last_dispatch: ContextVar[Optional[Dict[str, Any]]] = ContextVar(
+    "last_dispatch", default=None
+)
+
+
+class _Flight:
+    """Один upstream-запрос, на который подписаны одинаковые переводы."""
+
+    def __init__(self, streaming: bool = False):
+        # Запрос без потока отдает подписчикам только итоговый перевод
+        self.streaming = streaming
+        self.deltas: List[str] = []
+        self.listeners: List[asyncio.Queue] = []
+        self.task: Optional[asyncio.Task] = None
+
+    def publish(self, item) -> None:
+        for queue in self.listeners:
+            queue.put_nowait(item)
+
 
 class LLMApi:
     """Класс для работы с API различных LLM моделей."""
 
-    def __init__(self, model_info: Dict[str, Any], settings_manager: SettingsManager):
+    # Выполняющиеся запросы, общие для всех экземпляров:
+    # (текст, язык, промпт, модель) -> _Flight
+    _flights: Dict[Tuple[str, str, str, str], _Flight] = {}
+    # Сколько секунд запрос без подписчиков ждет нового, прежде чем отмениться
+    FLIGHT_LINGER = 1.0
+    # Статистика дублирования запросов по основной модели
+    _hedge_stats: Dict[str, Dict[str, int]] = {}
+
+    def __init__(
+        self,
+        model_info: Dict[str, Any],
+        settings_manager: SettingsManager,
+        cache: Optional[TranslationCache] = None,
+        stats: Optional[LatencyStats] = None,
+    ):
         """
         Инициализация клиента API.
 
@@ -20,6 +91,9 @@ class LLMApi:
                 - api_endpoint: URL эндпоинта API
                 - model_name: Название модели у провайдера
                 - access_token: Токен доступа к API
+            settings_manager: Менеджер настроек
+            cache: Память переводов (необязательно)
+            stats: Статистика задержек моделей (необязательно)
         """
         if not isinstance(model_info, dict):
             raise TypeError("model_info должен быть словарем")
@@ -30,9 +104,45 @@ class LLMApi:
         self.model_info = model_info
         self.settings_manager = settings_manager
         self.provider = LLMProviderFactory.get_provider(model_info)
+        # Провайдеры резервных моделей создаются при первом переходе на них
+        self._fallback_providers: Dict[Tuple, Any] = {}
+        # Клиенты моделей для коротких и длинных текстов (см. _select_tier)
+        self._tier_apis: Dict[Tuple, "LLMApi"] = {}
+        self.cache = cache
+        self.stats = stats
         self._system_prompt = None
         self.update_system_prompt()
 
+    @property
+    def last_dispatch(self) -> Dict[str, Any]:
+        """Сведения о последнем переводе текущей задачи для строки состояния."""
+        dispatch = _last_dispatch.get()
+        if dispatch is None:
+            dispatch = {}
+            _last_dispatch.set(dispatch)
+        return dispatch
+
+    @last_dispatch.setter
+    def last_dispatch(self, dispatch: Dict[str, Any]) -> None:
+        _last_dispatch.set(dispatch)
+
+    @staticmethod
+    def key_for(model_info: Dict[str, Any]) -> str:
+        """Идентификатор модели из ее конфигурации."""
+        return f"{model_info.get('provider')}/{model_info.get('model_name')}"
+
+    @property
+    def model_key(self) -> str:
+        """Идентификатор модели для кешей и статистики."""
+        return self.key_for(self.model_info)
+
+    @property
+    def token_family(self) -> str:
+        """Семейство токенизатора модели для оценки числа токенов."""
+        return model_family(
+            self.model_info.get("provider"), self.model_info.get("model_name")
+        )
+
     def update_system_prompt(self) -> None:
         """Кеширует актуальный системный промпт из настроек."""
         prompt_info = self.settings_manager.get_prompt_info()
@@ -44,25 +154,1274 @@ class LLMApi:
     async def translate(
         self, text: str, target_lang: str, streaming_callback=None
     ) -> str:
-        """Переводит текст на указанный язык."""
+        """Переводит текст на указанный язык, редкие языки - через посредника."""
+        pivot = self._pivot_for(target_lang)
+        if pivot:
+            return await self._translate_via_pivot(
+                text, pivot, target_lang, streaming_callback
+            )
+        return await self._translate_direct(text, target_lang, streaming_callback)
+
+    def _pivot_for(self, target_lang: str) -> Optional[str]:
+        """Возвращает язык-посредник для целевого языка или None."""
+        pivot = self.settings_manager.get_pivot_settings()
+        language = pivot["language"]
+        if language and target_lang != language and target_lang in pivot["targets"]:
+            return language
+        return None
+
+    async def _translate_via_pivot(
+        self, text: str, pivot: str, target_lang: str, streaming_callback=None
+    ) -> str:
+        """
+        Переводит текст на язык-посредник, а с него - на целевой язык.
+
+        Перевод на посредника кешируется и объединяется с одинаковыми
+        запросами, поэтому при переводе на несколько редких языков исходный
+        текст переводится один раз, а повторные переводы берут его из кеша.
+        """
+        pivot_text = await self._translate_direct(text, pivot)
+        # От перевода на посредника в сведениях остается только сводка;
+        # остальное описывает перевод на целевой язык
+        pivot_info = {
+            "language": pivot,
+            "cached": bool(self.last_dispatch.get("cached")),
+        }
+        self.last_dispatch = {}
+        try:
+            return await self._translate_direct(
+                pivot_text, target_lang, streaming_callback
+            )
+        finally:
+            self.last_dispatch = {**self.last_dispatch, "pivot": pivot_info}
+
+    async def _translate_direct(
+        self, text: str, target_lang: str, streaming_callback=None
+    ) -> str:
+        """Переводит текст на указанный язык без посредника."""
+        tier, tier_info = self._select_tier(text)
+        if tier_info is not None:
+            # Текст этого размера переводит модель своего уровня
+            api = self._get_tier_api(tier_info)
+            try:
+                return await api._translate_direct(
+                    text, target_lang, streaming_callback
+                )
+            finally:
+                self.last_dispatch = {**api.last_dispatch, "tier": tier}
+
         # Используем закешированный системный промпт
         system_prompt = self._system_prompt
+        self.last_dispatch = {"model": self.model_info.get("name"), "cached": False}
+        if tier:
+            self.last_dispatch["tier"] = tier
+
+        if self.cache is not None:
+            cached = self.cache.get(text, target_lang, system_prompt, self.model_key)
+            if cached is not None:
+                self.last_dispatch["cached"] = True
+                # Повторяем результат через streaming callback целиком
+                if streaming_callback:
+                    await streaming_callback(cached)
+                return cached
+
+        key = (text, target_lang, system_prompt, self.model_key)
+        return await self._join_flight(key, text, target_lang, streaming_callback)
+
+    async def translate_many(
+        self,
+        text: str,
+        target_langs: List[str],
+        on_delta: Optional[Callable[[str, str], Awaitable[None]]] = None,
+        on_done: Optional[Callable[[str, Any], None]] = None,
+        concurrency: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Переводит один текст сразу на несколько языков.
+
+        Языки переводятся параллельно, но одновременно выполняется не больше
+        concurrency переводов (по умолчанию fanout.concurrency из настроек).
+        Языки, перевод на которые есть в кеше, отдаются сразу, не занимая
+        место в очереди. Ошибка одного языка не прерывает остальные.
+
+        Args:
+            text: Исходный текст
+            target_langs: Целевые языки
+            on_delta: Корутина (язык, дельта) для потокового вывода
+            on_done: Вызывается с языком и переводом или исключением
+            concurrency: Предел одновременных переводов
+
+        Returns:
+            Dict[str, Any]: Перевод или исключение для каждого языка
+        """
+        if concurrency is None:
+            concurrency = self.settings_manager.get_fanout_settings()["concurrency"]
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        results: Dict[str, Any] = {}
+        summary = {"languages": len(target_langs), "cached": 0, "failed": 0}
+
+        async def run(target_lang: str) -> None:
+            callback = None
+            if on_delta:
+
+                async def callback(delta: str) -> None:
+                    await on_delta(target_lang, delta)
+
+            try:
+                if self._lookup_cache(text, target_lang) is not None:
+                    summary["cached"] += 1
+                    result = await self.translate(text, target_lang, callback)
+                else:
+                    async with semaphore:
+                        result = await self.translate(text, target_lang, callback)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error("Fan-out translation to %s failed: %s", target_lang, e)
+                summary["failed"] += 1
+                result = e
+            results[target_lang] = result
+            if on_done:
+                on_done(target_lang, result)
+
+        # Перевод на посредника запускается первым: редкие языки подписываются
+        # на его потоковый запрос, а вкладка посредника получает поток дельт
+        pivot = self.settings_manager.get_pivot_settings()["language"]
+        order = sorted(target_langs, key=lambda target_lang: target_lang != pivot)
+        await asyncio.gather(*(run(target_lang) for target_lang in order))
+        # Переводы шли параллельно, поэтому сводка общая на все языки
+        self.last_dispatch = {"model": self.model_info.get("name"), "fanout": summary}
+        return {target_lang: results[target_lang] for target_lang in target_langs}
+
+    def _lookup_cache(self, text: str, target_lang: str) -> Optional[str]:
+        """Возвращает перевод из кеша, в том числе через язык-посредник."""
+        pivot = self._pivot_for(target_lang)
+        if pivot:
+            pivot_text = self._lookup_direct(text, pivot)
+            if pivot_text is None:
+                return None
+            return self._lookup_direct(pivot_text, target_lang)
+        return self._lookup_direct(text, target_lang)
+
+    def _lookup_direct(self, text: str, target_lang: str) -> Optional[str]:
+        """Возвращает перевод из кеша той модели, которая переведет текст."""
+        tier, tier_info = self._select_tier(text)
+        if tier_info is not None:
+            return self._get_tier_api(tier_info)._lookup_direct(text, target_lang)
+        if self.cache is None:
+            return None
+        return self.cache.get(text, target_lang, self._system_prompt, self.model_key)
+
+    async def translate_batch(
+        self,
+        texts: List[str],
+        target_lang: str,
+        on_result: Optional[Callable[[int, str], None]] = None,
+    ) -> List[str]:
+        """
+        Переводит много коротких строк пакетами, по одному запросу на пакет.
+
+        Строки упаковываются в JSON-массив в пределах max_batch_tokens и
+        max_batch_items, поэтому системный промпт отправляется один раз на
+        пакет. Ответ разбирается по мере генерации, и on_result получает
+        перевод строки, как только закрылся ее элемент массива. Если ответ
+        не разбирается в массив той же длины, строки пакета переводятся по
+        одной, и on_result вызывается повторно с исправленным переводом.
+        Найденные в кеше строки и повторы не отправляются. Так же
+        переводятся сегменты, которых нет в посегментном кеше.
+
+        Args:
+            texts: Строки для перевода
+            target_lang: Целевой язык
+            on_result: Вызывается с индексом и переводом каждой готовой строки
+
+        Returns:
+            List[str]: Переводы в порядке исходных строк
+        """
+        self.last_dispatch = {
+            "model": self.model_info.get("name"),
+            "cached": False,
+            "batch_items": len(texts),
+        }
+        return await self._translate_batch(texts, target_lang, on_result)
+
+    async def _translate_batch(
+        self,
+        texts: List[str],
+        target_lang: str,
+        on_result: Optional[Callable[[int, str], None]] = None,
+        served_models: Optional[Set[str]] = None,
+    ) -> List[str]:
+        """
+        Переводит строки пакетами (см. translate_batch), дописывая сведения
+        в текущий last_dispatch.
+
+        В served_models добавляются идентификаторы моделей, выполнивших перевод.
+        """
+        system_prompt = self._system_prompt
+        results: List[Optional[str]] = [None] * len(texts)
+        # Одинаковые строки переводятся один раз
+        positions: Dict[str, List[int]] = {}
+        for index, text in enumerate(texts):
+            positions.setdefault(text, []).append(index)
+
+        def resolve(
+            text: str,
+            translated: str,
+            served: Optional[str] = None,
+            notify: bool = True,
+        ) -> None:
+            # Перевод кешируется под модель, которая его выполнила
+            if served and served_models is not None:
+                served_models.add(served)
+            if (
+                served
+                and self.cache is not None
+                and not self.last_dispatch.get("truncated")
+            ):
+                self.cache.put(text, target_lang, system_prompt, served, translated)
+            for index in positions[text]:
+                results[index] = translated
+                if notify and on_result:
+                    on_result(index, translated)
+
+        pending: List[str] = []
+        hits = 0
+        for text in positions:
+            cached = None
+            if not text.strip():
+                cached = text
+            elif self.cache is not None:
+                cached = self.cache.get(
+                    text, target_lang, system_prompt, self.model_key
+                )
+            if cached is None:
+                pending.append(text)
+            else:
+                hits += 1
+                resolve(text, cached)
+        self.last_dispatch["cache_hits"] = hits
+
+        settings = self.settings_manager.get_batching_settings()
+        family = self.token_family
+        batches = pack_batches(
+            pending,
+            settings["max_batch_tokens"],
+            settings["max_batch_items"],
+            lambda piece: estimate_tokens(piece, family),
+        )
+        self.last_dispatch["batches"] = len(batches)
+
+        async def run_single(text: str) -> None:
+            served: List[str] = []
+            translated = await self._translate_text(
+                text, target_lang, on_served=served.append
+            )
+            resolve(text, translated, served[0])
+
+        async def ignore_delta(delta: str) -> None:
+            pass
+
+        async def run_batch(batch: List[str]) -> None:
+            if len(batch) == 1:
+                await run_single(batch[0])
+                return
+            streamed: Dict[int, str] = {}
+
+            def on_item(key: Any, value: Any) -> None:
+                # В кеш строка попадает только после проверки всего ответа
+                if isinstance(key, int) and key < len(batch) and isinstance(value, str):
+                    streamed[key] = value
+                    resolve(batch[key], value)
+
+            # Поток нужен, чтобы элементы приходили до конца генерации
+            served: List[str] = []
+            response = await self._translate_text(
+                encode_batch(batch),
+                target_lang,
+                ignore_delta,
+                instructions=BATCH_INSTRUCTIONS,
+                on_item=on_item,
+                on_served=served.append,
+            )
+            translations = decode_batch(response or "", len(batch))
+            if translations is None:
+                logging.warning(
+                    "Batch of %d strings misaligned, translating one by one",
+                    len(batch),
+                )
+                self.last_dispatch["batch_fallbacks"] = (
+                    self.last_dispatch.get("batch_fallbacks", 0) + 1
+                )
+                await asyncio.gather(*(run_single(text) for text in batch))
+                return
+            for index, (text, translated) in enumerate(zip(batch, translations)):
+                resolve(
+                    text,
+                    translated,
+                    served[0],
+                    notify=streamed.get(index) != translated,
+                )
+
+        await asyncio.gather(
+            *(run_batch([pending[i] for i in batch]) for batch in batches)
+        )
+        return results
+
+    def _select_tier(self, text: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Определяет уровень текста по оценке числа токенов.
+
+        Returns:
+            Tuple: ("short"/"long" или None для среднего текста и выключенных
+            уровней; модель уровня или None, если это текущая модель)
+        """
+        tiering = self.settings_manager.get_tiering_settings()
+        if not tiering["enabled"]:
+            return None, None
+        tokens = estimate_tokens(text, self.token_family)
+        if tokens <= tiering["short_max_tokens"] and tiering["short_model"]:
+            tier, model_info = "short", tiering["short_model"]
+        elif tokens >= tiering["long_min_tokens"] and tiering["long_model"]:
+            tier, model_info = "long", tiering["long_model"]
+        else:
+            return None, None
+        if (model_info["provider"], model_info["model_name"]) == (
+            self.model_info.get("provider"),
+            self.model_info.get("model_name"),
+        ):
+            return tier, None
+        return tier, model_info
+
+    def _get_tier_api(self, model_info: Dict[str, Any]) -> "LLMApi":
+        """Возвращает клиент модели уровня с общими кешем и статистикой."""
+        key = (
+            (model_info.get("provider") or "").lower(),
+            model_info.get("model_name"),
+            model_info.get("api_endpoint"),
+            model_info.get("access_token"),
+            bool(model_info.get("streaming", False)),
+        )
+        api = self._tier_apis.get(key)
+        if api is None:
+            api = LLMApi(
+                dict(model_info), self.settings_manager, self.cache, self.stats
+            )
+            self._tier_apis[key] = api
+        else:
+            api.update_system_prompt()
+        return api
+
+    async def _join_flight(
+        self, key: Tuple, text: str, target_lang: str, streaming_callback=None
+    ) -> str:
+        """
+        Подписывается на выполняющийся одинаковый запрос или запускает новый.
+
+        Подписчик получает все уже пришедшие дельты, затем живой хвост
+        потока; результат и ошибка общие для всех подписчиков. Потоковый
+        и обычный запросы одного текста тоже объединяются: если общий запрос
+        идет без потока, потоковый подписчик получает перевод целиком.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight(streaming_callback is not None)
+            flight.task = asyncio.create_task(
+                self._run_flight(key, flight, text, target_lang)
+            )
+        else:
+            self.last_dispatch["coalesced"] = True
+            logging.info(
+                "Coalesced duplicate translation request for %s", self.model_key
+            )
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for delta in flight.deltas:
+            queue.put_nowait(delta)
+        if flight.task.done():
+            queue.put_nowait(_FLIGHT_DONE)
+        flight.listeners.append(queue)
+        try:
+            while True:
+                item = await queue.get()
+                if item is _FLIGHT_DONE:
+                    break
+                if streaming_callback:
+                    await streaming_callback(item)
+            result = flight.task.result()
+            # Как и при попадании в кеш, повторяем результат целиком
+            if streaming_callback and not flight.streaming and result:
+                await streaming_callback(result)
+            return result
+        finally:
+            flight.listeners.remove(queue)
+            if not flight.listeners and not flight.task.done():
+                asyncio.get_running_loop().call_later(
+                    self.FLIGHT_LINGER, self._abandon_flight, key, flight
+                )
+
+    async def _run_flight(
+        self, key: Tuple, flight: _Flight, text: str, target_lang: str
+    ) -> str:
+        """Выполняет общий запрос и рассылает его дельты подписчикам."""
+
+        async def on_delta(delta: str) -> None:
+            flight.deltas.append(delta)
+            flight.publish(delta)
 
+        try:
+            return await self._dispatch(
+                text, target_lang, on_delta if flight.streaming else None
+            )
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.publish(_FLIGHT_DONE)
+
+    def _abandon_flight(self, key: Tuple, flight: _Flight) -> None:
+        """Отменяет общий запрос, если за время ожидания никто не подписался."""
+        if flight.listeners or flight.task.done():
+            return
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        flight.task.cancel()
+
+    async def _dispatch(
+        self, text: str, target_lang: str, streaming_callback=None
+    ) -> str:
+        """
+        Выбирает способ перевода (сегменты, куски, целиком) и кеширует результат.
+
+        Результат кешируется под модель, которая его выполнила (резервную или
+        дублирующую, если ответила она). Текст, части которого перевели разные
+        модели, целиком не кешируется.
+        """
+        system_prompt = self._system_prompt
+        segments = self._split_for_segment_cache(text)
+        cached_bodies: List[Optional[str]] = []
+        if segments:
+            cached_bodies = [
+                self.cache.get(body, target_lang, system_prompt, self.model_key)
+                for body, _ in segments
+            ]
+            if all(body is None for body in cached_bodies):
+                # Ни одного сегмента нет в кеше: запрос на каждый сегмент
+                # только умножил бы накладные расходы
+                segments = None
+        chunks = None if segments else self._split_into_chunks(text)
+        # Идентификаторы моделей, выполнивших перевод
+        served: Set[str] = set()
+        if segments:
+            result = await self._translate_segments(
+                segments, cached_bodies, target_lang, streaming_callback, served
+            )
+        elif chunks:
+            self.last_dispatch["chunks"] = len(chunks)
+            bodies = await self._translate_pieces(
+                chunks,
+                target_lang,
+                streaming_callback,
+                on_translated=lambda index, body, key: served.add(key),
+            )
+            result = join_segments(bodies, chunks)
+        else:
+            result = await self._translate_text(
+                text, target_lang, streaming_callback, on_served=served.add
+            )
+
+        if (
+            self.cache is not None
+            and isinstance(result, str)
+            and len(served) <= 1
+            and not self.last_dispatch.get("truncated")
+        ):
+            model_key = next(iter(served), self.model_key)
+            self.cache.put(text, target_lang, system_prompt, model_key, result)
+        return result
+
+    async def _translate_text(
+        self,
+        text: str,
+        target_lang: str,
+        streaming_callback=None,
+        instructions: Optional[str] = None,
+        on_item: Optional[Callable[[Any, Any], None]] = None,
+        on_served: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """
+        Отправляет текст провайдеру одним запросом.
+
+        instructions дописываются в конец системного промпта (например,
+        протокол пакета строк). Если задан on_item, ответ разбирается как
+        JSON по мере поступления и on_item вызывается для каждого
+        закрывшегося элемента ответившей модели.
+
+        Если модель не прислала первый токен в срок или завершилась ошибкой
+        до него, запрос переходит к следующей резервной модели из настроек,
+        а запрос к отставшей модели отменяется. При включенном дублировании
+        основная модель соревнуется со второй моделью (см. _hedged_request).
+        on_served получает идентификатор модели, выполнившей перевод.
+        """
         # Формируем сообщения для модели
+        system = f"Target language: {target_lang}.\n\n{self._system_prompt}"
+        if instructions:
+            system = f"{system}\n\n{instructions}"
         messages = [
-            {
-                "role": "system",
-                "content": f"Target language: {target_lang}.\n\n{system_prompt}",
-            },
+            {"role": "system", "content": system},
             {"role": "user", "content": f"{text}"},
         ]
 
+        deadlines = self.settings_manager.get_deadlines(
+            self.model_info.get("provider"), self.model_info.get("model_name")
+        )
+        chain = [(self.model_info, deadlines)] + [
+            (
+                model_info,
+                self.settings_manager.get_deadlines(
+                    model_info["provider"], model_info["model_name"]
+                ),
+            )
+            for model_info in deadlines["fallback_models"]
+        ]
+        hedging = self.settings_manager.get_hedging_settings()
+        hedge_info = hedging["model"] if hedging["enabled"] else None
+        if hedge_info and (
+            hedge_info["provider"] == self.model_info.get("provider")
+            and hedge_info["model_name"] == self.model_info.get("model_name")
+        ):
+            hedge_info = None
+
+        for index, (model_info, model_deadlines) in enumerate(chain):
+            received = False
+
+            async def on_delta(delta: str) -> None:
+                nonlocal received
+                received = True
+                await streaming_callback(delta)
+
+            try:
+                if index == 0 and hedge_info:
+                    result, model_info = await self._hedged_request(
+                        (model_info, model_deadlines),
+                        (
+                            hedge_info,
+                            self.settings_manager.get_deadlines(
+                                hedge_info["provider"], hedge_info["model_name"]
+                            ),
+                        ),
+                        hedging["delay_seconds"],
+                        messages,
+                        text,
+                        target_lang,
+                        on_delta if streaming_callback else None,
+                        on_item,
+                    )
+                else:
+                    result = await self._request_model(
+                        model_info,
+                        model_deadlines,
+                        messages,
+                        text,
+                        target_lang,
+                        on_delta if streaming_callback else None,
+                        on_item,
+                    )
+            except Exception as e:
+                # После первой дельты переход на другую модель исказил бы вывод
+                if received or index == len(chain) - 1:
+                    raise
+                logging.warning(
+                    "Falling back from %s to %s: %s",
+                    model_info.get("name"),
+                    chain[index + 1][0].get("name"),
+                    e,
+                )
+                self.last_dispatch.setdefault("fallbacks", []).append(
+                    {"model": model_info.get("name"), "reason": str(e)}
+                )
+                continue
+            self.last_dispatch["served_by"] = model_info.get("name")
+            if on_served:
+                on_served(self.key_for(model_info))
+            return result
+
+    async def _hedged_request(
+        self,
+        primary: Tuple[Dict[str, Any], Dict[str, Any]],
+        hedge: Tuple[Dict[str, Any], Dict[str, Any]],
+        delay: float,
+        messages: List[Dict[str, str]],
+        text: str,
+        target_lang: str,
+        streaming_callback=None,
+        on_item: Optional[Callable[[Any, Any], None]] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Дублирует запрос на вторую модель, если основная долго молчит.
+
+        Если за delay секунд основная модель не прислала первую дельту
+        (без потока - весь ответ), тот же запрос отправляется второй модели.
+        Выигрывает модель, первой приславшая дельту; запрос проигравшей
+        отменяется. Ошибка одной из моделей до первой дельты не прерывает
+        ожидание другой.
+
+        Returns:
+            Tuple: (перевод, конфигурация модели, которая его выполнила)
+        """
+        stats = self._hedge_stats.setdefault(
+            self.model_key, {"requests": 0, "hedged": 0, "hedge_wins": 0}
+        )
+        stats["requests"] += 1
+        entries = [primary]
+        tasks: List[asyncio.Task] = []
+        winner: Optional[int] = None
+        first_delta = asyncio.Event()
+
+        def start(index: int) -> None:
+            async def on_delta(delta: str) -> None:
+                nonlocal winner
+                if winner is None:
+                    winner = index
+                    first_delta.set()
+                    for other, task in enumerate(tasks):
+                        if other != index:
+                            task.cancel()
+                if winner == index:
+                    await streaming_callback(delta)
+
+            def on_winner_item(key: Any, value: Any) -> None:
+                # Элементы отдает только модель, первой приславшая дельту
+                if winner in (None, index):
+                    on_item(key, value)
+
+            model_info, deadlines = entries[index]
+            tasks.append(
+                asyncio.create_task(
+                    self._request_model(
+                        model_info,
+                        deadlines,
+                        messages,
+                        text,
+                        target_lang,
+                        on_delta if streaming_callback else None,
+                        on_winner_item if on_item else None,
+                    )
+                )
+            )
+
+        start(0)
+        waiter = asyncio.create_task(first_delta.wait())
         try:
-            # Выполняем перевод
-            return await self.provider.translate(
-                messages, target_lang, streaming_callback
+            done, _ = await asyncio.wait(
+                {tasks[0], waiter}, timeout=delay, return_when=asyncio.FIRST_COMPLETED
             )
+            if not done:
+                logging.info(
+                    "Hedging %s with %s after %.2fs",
+                    self.model_key,
+                    hedge[0].get("name"),
+                    delay,
+                )
+                stats["hedged"] += 1
+                self.last_dispatch["hedged"] = True
+                entries.append(hedge)
+                start(1)
+
+            pending = set(tasks)
+            errors: List[Exception] = []
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    index = tasks.index(task)
+                    if task.cancelled():
+                        continue
+                    error = task.exception()
+                    if error is None and winner in (None, index):
+                        winner = index
+                        if index == 1:
+                            stats["hedge_wins"] += 1
+                        return task.result(), entries[index][0]
+                    if error is not None:
+                        if winner == index:
+                            raise error
+                        errors.append(error)
+            raise errors[0]
+        finally:
+            waiter.cancel()
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(waiter, *tasks, return_exceptions=True)
+
+    @classmethod
+    def get_hedge_stats(cls) -> Dict[str, Dict[str, Any]]:
+        """
+        Возвращает статистику дублирования запросов по основным моделям.
+
+        hedge_rate - доля запросов, продублированных на вторую модель,
+        win_rate - доля продублированных, в которых вторая модель победила.
+        """
+        return {
+            model: {
+                **stats,
+                "hedge_rate": stats["hedged"] / stats["requests"]
+                if stats["requests"]
+                else 0.0,
+                "win_rate": stats["hedge_wins"] / stats["hedged"]
+                if stats["hedged"]
+                else 0.0,
+            }
+            for model, stats in cls._hedge_stats.items()
+        }
+
+    async def _request_model(
+        self,
+        model_info: Dict[str, Any],
+        deadlines: Dict[str, Any],
+        messages: List[Dict[str, str]],
+        text: str,
+        target_lang: str,
+        streaming_callback=None,
+        on_item: Optional[Callable[[Any, Any], None]] = None,
+        full_budget: bool = False,
+    ) -> str:
+        """
+        Выполняет запрос к одной модели со сроками первого токена и ответа.
+
+        Срок первого токена действует только в потоковом режиме: без него
+        первая дельта приходит вместе со всем ответом.
+
+        Если ответ обрезан лимитом токенов, суженным по прогнозу длины
+        (full_budget=False), запрос один раз повторяется с полным лимитом
+        модели; в потоке повтор выводит только продолжение уже выведенного
+        текста. Обрезанный и после этого ответ помечается в last_dispatch
+        как truncated и не попадает в кеш.
+        """
+        model_key = self.key_for(model_info)
+        provider = self._get_provider(model_info)
+
+        # Оценка расхода: промпт и текст на входе плюс прогноз длины перевода
+        family = model_family(model_info.get("provider"), model_info.get("model_name"))
+        input_tokens = estimate_tokens(
+            messages[0]["content"], family
+        ) + estimate_tokens(text, family)
+        limiter = self._get_rate_limiter(model_info)
+        estimated = input_tokens + predict_output_tokens(text, target_lang, family)
+
+        async def acquire() -> None:
+            # Каждая попытка, в том числе повтор после 429, проходит ограничитель
+            waited = await limiter.acquire(estimated)
+            if waited > 0.001:
+                logging.info("Rate limit wait for %s: %.2fs", model_key, waited)
+                self.last_dispatch["rate_limit_wait"] = (
+                    self.last_dispatch.get("rate_limit_wait", 0.0) + waited
+                )
+
+        await acquire()
+
+        parts: List[str] = []
+        result: Optional[str] = None
+        first_token = deadlines["first_token_seconds"] if streaming_callback else 0
+        total = deadlines["total_seconds"]
+        output_tokens: Optional[int] = None
+        usage_reported = False
+        first_token_at: Optional[float] = None
+        finish_reason: Optional[str] = None
+        async with self._get_concurrency_limiter(model_info).slot(estimated) as slot:
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            received = False
+            # Провайдер узнает из области, сузил ли прогноз лимит ответа
+            budget, budget_token = enter_budget_scope(full_budget)
+            events = provider_events(
+                provider,
+                messages,
+                target_lang,
+                streaming_callback is not None,
+                structured=on_item is not None,
+                before_retry=acquire,
+            )
+
+            def next_deadline() -> Optional[Tuple[float, str, float]]:
+                """Ближайший из сроков: (момент, вид срока, длительность)."""
+                limits = []
+                if total > 0:
+                    limits.append((started + total, "total", total))
+                if first_token > 0 and not received:
+                    limits.append((started + first_token, "first_token", first_token))
+                return min(limits) if limits else None
+
+            task = asyncio.current_task()
+            timer: Optional[asyncio.TimerHandle] = None
+            expired = False
+
+            def expire() -> None:
+                nonlocal expired
+                expired = True
+                task.cancel()
+
+            def schedule(deadline: Optional[Tuple[float, str, float]]) -> None:
+                nonlocal timer
+                if timer is not None:
+                    timer.cancel()
+                timer = loop.call_at(deadline[0], expire) if deadline else None
+
+            deadline = next_deadline()
+            try:
+                # Один таймер на весь поток; после первого токена он
+                # переносится на срок полного ответа
+                schedule(deadline)
+                try:
+                    async for event in events:
+                        if isinstance(event, DeltaEvent):
+                            if not received:
+                                first_token_at = loop.time()
+                                received = True
+                                deadline = next_deadline()
+                                schedule(deadline)
+                            parts.append(event.text)
+                            if streaming_callback:
+                                await streaming_callback(event.text)
+                        elif isinstance(event, UsageEvent):
+                            self._add_usage(event)
+                            usage_reported = True
+                            input_tokens = event.input_tokens or input_tokens
+                            output_tokens = event.output_tokens or output_tokens
+                            actual = (event.input_tokens or 0) + (
+                                event.output_tokens or 0
+                            )
+                            if actual:
+                                limiter.adjust_tokens(actual - estimated)
+                                estimated = actual
+                        elif isinstance(event, ItemEvent):
+                            on_item(event.key, event.value)
+                        elif isinstance(event, RetryEvent):
+                            self.last_dispatch["retries"] = (
+                                self.last_dispatch.get("retries", 0) + 1
+                            )
+                            if is_overload(event.error):
+                                slot.mark_overloaded()
+                        elif isinstance(event, FinishEvent):
+                            finish_reason = event.reason
+                            self.last_dispatch["finish_reason"] = event.reason
+                            result = (
+                                event.text if event.text is not None else "".join(parts)
+                            )
+                        elif isinstance(event, ErrorEvent):
+                            logging.error("Translation error: %s", event.error)
+                            raise Exception(
+                                f"Ошибка перевода: {str(event.error)}"
+                            ) from event.error
+                except asyncio.CancelledError:
+                    # Отмена не по таймеру (или вместе с ним, uncancel в 3.11+)
+                    # принадлежит вызывающему коду
+                    if not expired or (hasattr(task, "uncancel") and task.uncancel()):
+                        raise
+                    logging.error(
+                        "Deadline exceeded for %s: %s %.1fs",
+                        model_key,
+                        deadline[1],
+                        deadline[2],
+                    )
+                    # Непрошедший в срок ответ - признак перегрузки провайдера
+                    slot.mark_overloaded()
+                    raise DeadlineExceededError(
+                        model_info.get("name") or model_key,
+                        deadline[1],
+                        deadline[2],
+                    ) from None
+                finally:
+                    if timer is not None:
+                        timer.cancel()
+            except Exception as e:
+                self._record_stats(
+                    model_info, started, first_token_at, input_tokens, 0, e
+                )
+                raise
+            finally:
+                # Останавливаем чтение ответа, если потребитель прервал перевод
+                await events.aclose()
+                exit_budget_scope(budget_token)
+            if not usage_reported:
+                # Поток не сообщил расход: учитываем оценку по тексту ответа
+                output_tokens = estimate_tokens(result or "", family)
+                self._add_usage(UsageEvent(input_tokens, output_tokens))
+                self.last_dispatch["usage_estimated"] = True
+                limiter.adjust_tokens(input_tokens + output_tokens - estimated)
+            self._record_stats(
+                model_info,
+                started,
+                first_token_at,
+                input_tokens,
+                output_tokens or estimate_tokens(result or "", family),
+            )
+
+        if is_truncated(finish_reason):
+            if budget.limited and not full_budget:
+                logging.warning(
+                    "Response of %s cut by max_tokens, retrying with full budget",
+                    model_key,
+                )
+                skip = len("".join(parts)) if streaming_callback else 0
+
+                async def resume(delta: str) -> None:
+                    # Уже выведенное начало ответа не повторяем
+                    nonlocal skip
+                    if skip >= len(delta):
+                        skip -= len(delta)
+                        return
+                    delta, skip = delta[skip:], 0
+                    await streaming_callback(delta)
 
-        except Exception as e:
-            logging.error("Translation error: %s", e)
-            raise Exception(f"Ошибка перевода: {str(e)}")
+                return await self._request_model(
+                    model_info,
+                    deadlines,
+                    messages,
+                    text,
+                    target_lang,
+                    resume if streaming_callback else None,
+                    on_item,
+                    full_budget=True,
+                )
+            logging.warning("Response of %s truncated by max_tokens", model_key)
+            self.last_dispatch["truncated"] = True
+        return result
+
+    def _record_stats(
+        self,
+        model_info: Dict[str, Any],
+        started: float,
+        first_token_at: Optional[float],
+        input_tokens: int,
+        output_tokens: int,
+        error: Optional[Exception] = None,
+    ) -> None:
+        """Сохраняет замер запроса к модели в статистику задержек."""
+        if self.stats is None:
+            return
+        now = asyncio.get_running_loop().time()
+        self.stats.record(
+            model_info.get("provider", ""),
+            model_info.get("model_name", ""),
+            now - started,
+            first_token_at - started if first_token_at is not None else None,
+            input_tokens,
+            output_tokens,
+            error_class(error),
+        )
+
+    def _get_provider(self, model_info: Dict[str, Any]):
+        """Возвращает провайдера основной или резервной модели."""
+        if model_info is self.model_info:
+            return self.provider
+        key = (
+            (model_info.get("provider") or "").lower(),
+            model_info.get("model_name"),
+            model_info.get("api_endpoint"),
+            model_info.get("access_token"),
+        )
+        provider = self._fallback_providers.get(key)
+        if provider is None:
+            # Копия: провайдеры могут менять model_info (например, CustomProvider)
+            provider = LLMProviderFactory.get_provider(dict(model_info))
+            self._fallback_providers[key] = provider
+        return provider
+
+    def _get_rate_limiter(
+        self, model_info: Optional[Dict[str, Any]] = None
+    ) -> RateLimiter:
+        """Возвращает ограничитель частоты для провайдера и ключа API модели."""
+        model_info = model_info or self.model_info
+        provider = model_info.get("provider", "")
+        limits = self.settings_manager.get_rate_limit(provider)
+        return get_rate_limiter(
+            provider,
+            model_info.get("access_token_env", ""),
+            limits["requests_per_minute"],
+            limits["tokens_per_minute"],
+        )
+
+    def _get_concurrency_limiter(
+        self, model_info: Optional[Dict[str, Any]] = None
+    ) -> AdaptiveConcurrencyLimiter:
+        """Возвращает адаптивный лимит параллельных запросов провайдера модели."""
+        model_info = model_info or self.model_info
+        settings = self.settings_manager.get_chunking_settings()
+        return get_concurrency_limiter(
+            model_info.get("provider", ""),
+            settings["concurrency"],
+            settings["max_concurrency"],
+        )
+
+    def _add_usage(self, event: UsageEvent) -> None:
+        """Суммирует расход токенов всех запросов текущего перевода."""
+        usage = self.last_dispatch.setdefault(
+            "usage", {"input_tokens": 0, "output_tokens": 0}
+        )
+        usage["input_tokens"] += event.input_tokens or 0
+        usage["output_tokens"] += event.output_tokens or 0
+
+    def _split_for_segment_cache(self, text: str) -> Optional[List[Tuple[str, str]]]:
+        """Возвращает сегменты текста, если включен посегментный кеш и их больше одного."""
+        if self.cache is None:
+            return None
+        mode = self.settings_manager.get_cache_settings().get("segment_mode", "off")
+        if mode not in ("sentence", "paragraph"):
+            return None
+        segments = split_segments(text, mode)
+        return segments if len(segments) > 1 else None
+
+    async def _translate_segments(
+        self,
+        segments: List[Tuple[str, str]],
+        bodies: List[Optional[str]],
+        target_lang: str,
+        streaming_callback=None,
+        served: Optional[Set[str]] = None,
+    ) -> str:
+        """
+        Переводит текст по сегментам: найденные в кеше сегменты выводятся сразу,
+        провайдеру отправляются только отсутствующие. Несколько отсутствующих
+        сегментов переводятся пакетами (см. _translate_segment_batch).
+
+        bodies - переводы сегментов из кеша (None для отсутствующих).
+        В served добавляются идентификаторы моделей, выполнивших перевод
+        (найденные в кеше сегменты относятся к основной модели).
+        """
+        system_prompt = self._system_prompt
+        missing = [index for index, body in enumerate(bodies) if body is None]
+        misses = len(missing)
+        self.last_dispatch["segments"] = {"total": len(segments), "missed": misses}
+        self.last_dispatch["cached"] = misses == 0
+        if served is not None and misses < len(segments):
+            served.add(self.model_key)
+        if misses > 1:
+            return await self._translate_segment_batch(
+                segments, bodies, missing, target_lang, streaming_callback, served
+            )
+
+        def remember(index: int, translated: str, model_key: str) -> None:
+            if self.last_dispatch.get("truncated"):
+                return
+            source = segments[index][0]
+            self.cache.put(source, target_lang, system_prompt, model_key, translated)
+            if served is not None:
+                served.add(model_key)
+
+        bodies = await self._translate_pieces(
+            segments, target_lang, streaming_callback, bodies, remember
+        )
+        return join_segments(bodies, segments)
+
+    async def _translate_segment_batch(
+        self,
+        segments: List[Tuple[str, str]],
+        bodies: List[Optional[str]],
+        missing: List[int],
+        target_lang: str,
+        streaming_callback=None,
+        served: Optional[Set[str]] = None,
+    ) -> str:
+        """
+        Переводит отсутствующие в кеше сегменты пакетом строк.
+
+        Сегменты выводятся в исходном порядке по мере того, как в ответе
+        закрываются их элементы. Если пакет пришлось перевести по одной
+        строке, уже выведенный сегмент не исправляется в потоке, но
+        возвращаемый текст содержит исправленный перевод.
+        """
+        bodies = list(bodies)
+        changed = asyncio.Event()
+
+        def on_result(position: int, translated: str) -> None:
+            bodies[missing[position]] = translated.strip()
+            changed.set()
+
+        task = asyncio.create_task(
+            self._translate_batch(
+                [segments[index][0] for index in missing],
+                target_lang,
+                on_result,
+                served,
+            )
+        )
+        head = 0
+
+        async def advance() -> None:
+            # Выводим подряд все готовые сегменты с начала очереди
+            nonlocal head
+            while head < len(segments) and bodies[head] is not None:
+                if streaming_callback:
+                    for delta in (bodies[head], segments[head][1]):
+                        if delta:
+                            await streaming_callback(delta)
+                head += 1
+
+        try:
+            while not task.done():
+                changed.clear()
+                await advance()
+                waiter = asyncio.create_task(changed.wait())
+                await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+            for position, translated in enumerate(task.result()):
+                bodies[missing[position]] = (translated or "").strip()
+            await advance()
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        return join_segments(bodies, segments)
+
+    def _split_into_chunks(self, text: str) -> Optional[List[Tuple[str, str]]]:
+        """Возвращает куски длинного текста, если он не помещается в один запрос."""
+        settings = self.settings_manager.get_chunking_settings()
+        if not settings["enabled"]:
+            return None
+        # Длинные тексты уровня long целиком уходят модели с большим контекстом
+        if self._select_tier(text)[0] == "long":
+            return None
+        max_tokens = settings["max_chunk_tokens"]
+        family = self.token_family
+        if estimate_tokens(text, family) <= max_tokens:
+            return None
+        chunks = chunk_text(
+            text, max_tokens, lambda piece: estimate_tokens(piece, family)
+        )
+        return chunks if len(chunks) > 1 else None
+
+    async def _translate_pieces(
+        self,
+        pieces: List[Tuple[str, str]],
+        target_lang: str,
+        streaming_callback=None,
+        known: Optional[List[Optional[str]]] = None,
+        on_translated: Optional[Callable[[int, str, str], None]] = None,
+    ) -> List[str]:
+        """
+        Переводит куски текста параллельно и выводит результат в исходном порядке.
+
+        Дельты первого незавершенного куска передаются в streaming_callback сразу,
+        дельты последующих буферизуются, пока все предыдущие куски не завершатся.
+
+        Args:
+            pieces: Пары (кусок, разделитель)
+            target_lang: Целевой язык
+            streaming_callback: Callback для потокового вывода
+            known: Уже известные переводы кусков (None - нужно перевести)
+            on_translated: Вызывается для каждого нового перевода куска
+                с идентификатором выполнившей его модели
+
+        Returns:
+            List[str]: Переводы кусков в исходном порядке
+        """
+        bodies = list(known) if known else [None] * len(pieces)
+        # События от воркеров: (индекс, дельта) или (индекс, None) по завершении
+        events: asyncio.Queue = asyncio.Queue()
+
+        async def worker(index: int) -> None:
+            received = False
+
+            async def on_delta(delta: str) -> None:
+                nonlocal received
+                if delta:
+                    received = True
+                    events.put_nowait((index, delta))
+
+            served: List[str] = []
+            try:
+                # Число одновременных запросов ограничивает адаптивный лимит провайдера
+                translated = await self._translate_text(
+                    pieces[index][0],
+                    target_lang,
+                    on_delta if streaming_callback else None,
+                    on_served=served.append,
+                )
+            except Exception as e:
+                events.put_nowait((index, e))
+                return
+            bodies[index] = (translated or "").strip()
+            if on_translated:
+                on_translated(index, bodies[index], served[0])
+            # Провайдер мог проигнорировать callback и вернуть текст целиком
+            if not received:
+                events.put_nowait((index, bodies[index]))
+            events.put_nowait((index, None))
+
+        # Куски, перевод которых известен заранее (например, из кеша)
+        ready = {index for index, body in enumerate(bodies) if body is not None}
+        tasks = [
+            asyncio.create_task(worker(index))
+            for index in range(len(pieces))
+            if index not in ready
+        ]
+        pending = len(tasks)
+        finished = set(ready)
+        buffers: Dict[int, List[str]] = {}
+        head = 0
+
+        async def emit(delta: str) -> None:
+            if streaming_callback and delta:
+                await streaming_callback(delta)
+
+        async def advance() -> None:
+            # Выводим подряд все завершенные куски с начала очереди
+            nonlocal head
+            while head < len(pieces):
+                if head in ready:
+                    await emit(bodies[head])
+                for delta in buffers.pop(head, []):
+                    await emit(delta)
+                if head not in finished:
+                    break
+                await emit(pieces[head][1])
+                head += 1
+
+        try:
+            await advance()
+            while pending:
+                index, delta = await events.get()
+                if isinstance(delta, Exception):
+                    raise delta
+                if delta is None:
+                    pending -= 1
+                    finished.add(index)
+                    if index == head:
+                        await advance()
+                elif index == head:
+                    await emit(delta)
+                else:
+                    buffers.setdefault(index, []).append(delta)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        return bodies
+
+    async def close(self) -> None:
+        """Освобождает ресурсы провайдеров (SDK-клиенты и т.п.)."""
+        providers = [self.provider, *self._fallback_providers.values()]
+        self._fallback_providers.clear()
+        tier_apis = list(self._tier_apis.values())
+        self._tier_apis.clear()
+        for api in tier_apis:
+            await api.close()
+        for provider in providers:
+            close = getattr(provider, "close", None)
+            if close is None:
+                continue
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+
+    def schedule_close(self) -> None:
+        """Планирует закрытие провайдера в текущем цикле событий, если он запущен."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        loop.create_task(self.close())
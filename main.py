@@ -8,6 +8,7 @@ from ui.main_window import MainWindow
 from ui.system_tray import SystemTrayHandler
 from hotkeys import register_global_hotkeys
 from settings_manager import SettingsManager
+from providers.base_provider import BaseProvider
 from qasync import QEventLoop
 import logging
 from PyQt5.QtNetwork import QLocalServer, QLocalSocket
@@ -125,13 +126,22 @@ if __name__ == "__main__":
             settings_manager = SettingsManager()
             modifiers, key = settings_manager.get_hotkey()
             hotkey = "+".join(modifiers) + "+" + key if modifiers else key
+            prewarm_on_hotkey = settings_manager.get_network_settings()[
+                "prewarm_on_hotkey"
+            ]
             hotkey_thread = threading.Thread(
-                target=register_global_hotkeys, args=(window, hotkey), daemon=True
+                target=register_global_hotkeys,
+                args=(window, hotkey, prewarm_on_hotkey),
+                daemon=True,
             )
             hotkey_thread.start()
 
             loop.run_forever()
 
+            # Закрываем клиенты и пуловые HTTP-сессии до остановки цикла событий
+            loop.run_until_complete(window.translation_session.close())
+            loop.run_until_complete(BaseProvider.connection_pool.close())
+
     except Exception as e:
         print(f"Critical error: {e}")
         traceback.print_exc()
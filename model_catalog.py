@@ -0,0 +1,236 @@
+"""Дисковый каталог моделей провайдеров с фоновым обновлением."""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from providers.llm_provider_factory import LLMProviderFactory
+
+logger = logging.getLogger(__name__)
+
+
+class ModelCatalog:
+    """
+    Кеш списков моделей провайдеров в JSON-файле.
+
+    Список отдается сразу из кеша; если он старше ttl, в фоне запрашивается
+    свежий (stale-while-revalidate) и подписчик получает его через on_update.
+    Одновременные обновления одного провайдера объединяются в один запрос.
+
+    Записи различаются провайдером, эндпоинтом и ключом: у своего сервера
+    или другого аккаунта того же провайдера может быть другой список моделей.
+    """
+
+    def __init__(self, path: str, ttl_hours: float = 24, timeout: float = 10.0):
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self.timeout = timeout
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def catalog_key(config: Dict[str, Any]) -> str:
+        """
+        Ключ записи каталога: провайдер, эндпоинт и хеш API-ключа.
+
+        Сам ключ в файл каталога не попадает.
+        """
+        token = config.get("access_token") or ""
+        digest = hashlib.sha256(token.encode("utf-8")).hexdigest()[:12]
+        return "|".join(
+            [config["provider"].lower(), config.get("api_endpoint") or "", digest]
+        )
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    return data
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке каталога моделей: {e}")
+        return {}
+
+    def _save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении каталога моделей: {e}")
+
+    def get_cached(
+        self, config: Dict[str, Any]
+    ) -> Tuple[Optional[List[Dict[str, Any]]], bool]:
+        """
+        Возвращает сохраненный список моделей провайдера.
+
+        Returns:
+            Tuple: (список моделей или None, если записи нет; список свежий)
+        """
+        entry = self._entries.get(self.catalog_key(config))
+        if entry is None:
+            return None, False
+        return entry["models"], time.time() - entry["fetched"] < self.ttl
+
+    def store(self, config: Dict[str, Any], models: List[Dict[str, Any]]) -> None:
+        """Сохраняет список моделей провайдера с текущим временем."""
+        for model in models:
+            model.setdefault("provider", config["provider"].lower())
+            # У совместимых с OpenAI провайдеров имя модели лежит в id
+            model.setdefault("model_name", model.get("id", ""))
+        self._entries[self.catalog_key(config)] = {
+            "fetched": time.time(),
+            "models": models,
+        }
+        self._save()
+
+    async def get_models(
+        self,
+        config: Dict[str, Any],
+        on_update: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        force: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Возвращает модели провайдера: из кеша сразу, иначе запросом.
+
+        Args:
+            config: Конфигурация провайдера (provider, api_endpoint, access_token)
+            on_update: Вызывается со свежим списком, если фоновое обновление
+                устаревшего кеша его изменило
+            force: Игнорировать кеш и запросить список у провайдера
+        """
+        models, fresh = self.get_cached(config)
+        if models is None or force:
+            return await self.refresh(config)
+        if not fresh:
+            self._revalidate(config, models, on_update)
+        return models
+
+    def _revalidate(
+        self,
+        config: Dict[str, Any],
+        cached: List[Dict[str, Any]],
+        on_update: Optional[Callable[[List[Dict[str, Any]]], None]],
+    ) -> None:
+        async def run():
+            models = await self.refresh(config)
+            if on_update and models and models != cached:
+                on_update(models)
+
+        asyncio.create_task(run())
+
+    async def refresh(
+        self, config: Dict[str, Any], timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Запрашивает список моделей у провайдера и сохраняет его.
+
+        При ошибке или пустом ответе возвращается прежний список из кеша.
+        """
+        key = self.catalog_key(config)
+        task = self._refreshing.get(key)
+        if task is None:
+            task = self._refreshing[key] = asyncio.create_task(
+                self._fetch(config, timeout or self.timeout)
+            )
+            task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(
+        self, config: Dict[str, Any], timeout: float
+    ) -> List[Dict[str, Any]]:
+        # Ошибки и таймаут фабрика записывает в лог и возвращает None
+        (models,) = await LLMProviderFactory.get_models_by_config([config], timeout)
+        if models:
+            self.store(config, models)
+            return models
+        cached, _ = self.get_cached(config)
+        return cached or []
+
+    async def refresh_all(
+        self, configs: List[Dict[str, Any]], timeout: Optional[float] = None
+    ) -> int:
+        """
+        Параллельно обновляет каталог всех переданных провайдеров.
+
+        Списки запрашиваются одним вызовом
+        LLMProviderFactory.get_models_by_config: медленные провайдеры
+        не задерживают остальных, у не ответивших остается прежний список.
+        Провайдеры, обновление которых уже идет, повторно не запрашиваются.
+
+        Returns:
+            int: Число обновленных записей каталога
+        """
+        pending: Dict[str, Dict[str, Any]] = {}
+        for config in configs:
+            key = self.catalog_key(config)
+            if key not in self._refreshing:
+                pending.setdefault(key, config)
+        results = await LLMProviderFactory.get_models_by_config(
+            list(pending.values()), timeout or self.timeout
+        )
+        updated = 0
+        for config, models in zip(pending.values(), results):
+            if models:
+                self.store(config, models)
+                updated += 1
+        return updated
+
+
+_catalog: Optional[ModelCatalog] = None
+
+
+def get_model_catalog(settings_manager) -> ModelCatalog:
+    """Возвращает общий для процесса каталог моделей."""
+    global _catalog
+    settings = settings_manager.get_catalog_settings()
+    if _catalog is None or _catalog.path != settings["path"]:
+        _catalog = ModelCatalog(
+            settings["path"], settings["ttl_hours"], settings["timeout"]
+        )
+    else:
+        _catalog.ttl = settings["ttl_hours"] * 3600
+        _catalog.timeout = settings["timeout"]
+    return _catalog
+
+
+def provider_configs(settings_manager) -> List[Dict[str, Any]]:
+    """
+    Возвращает конфигурации провайдеров из настроек, для которых задан ключ.
+
+    Берутся все провайдеры раздела providers, включая Cerebras, Nebius
+    и свои серверы; ключ читается из указанной переменной окружения.
+    """
+    configs = []
+    for provider, settings in settings_manager.get_providers().items():
+        access_token = os.getenv(settings.get("access_token_env") or "", "")
+        if not access_token:
+            continue
+        configs.append(
+            {
+                "provider": provider.lower(),
+                "api_endpoint": settings.get("api_endpoint") or "",
+                "model_name": "",
+                "access_token": access_token,
+            }
+        )
+    return configs
+
+
+async def refresh_stale(settings_manager) -> int:
+    """Обновляет устаревшие и отсутствующие в каталоге списки моделей."""
+    catalog = get_model_catalog(settings_manager)
+    configs = [
+        config
+        for config in provider_configs(settings_manager)
+        if not catalog.get_cached(config)[1]
+    ]
+    if not configs:
+        return 0
+    return await catalog.refresh_all(configs)
@@ -0,0 +1,130 @@
+"""Автоматический выбор модели по живой статистике задержек и ошибок."""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+import random
+import statistics
+import time
+from latency_stats import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+# Название пункта автоматического выбора в списке моделей
+AUTO_MODEL = "Авто"
+
+
+class ModelRouter:
+    """
+    Выбирает для перевода самую быструю здоровую модель из пула.
+
+    Ожидаемое время ответа модели - медиана времени до первого токена плюс
+    вывод перевода (примерно той же длины, что и вход) с медианной скоростью,
+    умноженное на штраф за долю ошибок. Поэтому короткие тексты уходят
+    моделям с быстрым первым токеном, длинные - моделям с высокой скоростью.
+
+    Доверие к замерам убывает с их возрастом (период полураспада
+    half_life_hours): оценка устаревшей модели стягивается к средней по пулу,
+    и она снова получает шанс. С вероятностью explore_rate выбирается
+    другая модель, в первую очередь с малым числом замеров.
+    """
+
+    # Сколько замеров нужно, чтобы полностью доверять статистике модели
+    MIN_SAMPLES = 3
+    # Во сколько раз доля ошибок 100% увеличивает ожидаемое время
+    ERROR_PENALTY = 4.0
+
+    def __init__(
+        self,
+        stats: LatencyStats,
+        explore_rate: float = 0.1,
+        half_life_hours: float = 24,
+        is_available: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        self.stats = stats
+        self.explore_rate = explore_rate
+        self.half_life = half_life_hours * 3600
+        self.is_available = is_available or (lambda model: True)
+        self.rng = rng or random.Random()
+
+    def estimate(
+        self, model: Dict[str, Any], input_tokens: int
+    ) -> Tuple[Optional[float], float]:
+        """
+        Оценивает время ответа модели на вход заданного размера.
+
+        Returns:
+            Tuple: (ожидаемое время в секундах или None без замеров,
+            доверие к оценке от 0 до 1)
+        """
+        summary = self.stats.get_summary(model["provider"], model["model_name"])
+        if not summary["count"]:
+            return None, 0.0
+        if summary["ttft_p50"] is not None and summary["tokens_per_sec"]:
+            expected = (
+                summary["ttft_p50"] + max(input_tokens, 1) / summary["tokens_per_sec"]
+            )
+        elif summary["total_p50"] is not None:
+            expected = summary["total_p50"]
+        else:
+            # Одни ошибки: заведомо хуже любой отвечающей модели
+            expected = float("inf")
+        expected *= 1 + self.ERROR_PENALTY * summary["error_rate"]
+
+        age = max(0.0, time.time() - summary["last_sample"])
+        confidence = min(1.0, summary["count"] / self.MIN_SAMPLES)
+        if self.half_life > 0:
+            confidence *= 0.5 ** (age / self.half_life)
+        return expected, confidence
+
+    def choose(
+        self,
+        models: List[Dict[str, Any]],
+        input_tokens: int,
+        explore: bool = True,
+    ) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Выбирает модель для перевода.
+
+        Args:
+            models: Пул моделей
+            input_tokens: Оценка размера входа в токенах
+            explore: Разрешить случайный выбор для сбора статистики
+
+        Returns:
+            Tuple: (модель или None для пустого пула, причина выбора)
+        """
+        if not models:
+            return None, "нет моделей"
+        available = [model for model in models if self.is_available(model)]
+        if not available:
+            # Все выключатели разомкнуты - берем первую, запрос объяснит ошибку
+            return models[0], "все модели недоступны"
+        if len(available) == 1:
+            return available[0], "единственная доступная"
+
+        estimates = [self.estimate(model, input_tokens) for model in available]
+        measured = [
+            value
+            for value, _ in estimates
+            if value is not None and value != float("inf")
+        ]
+        prior = statistics.median(measured) if measured else 0.0
+        scores = []
+        for value, confidence in estimates:
+            if value is None:
+                # Модель без замеров считаем средней по пулу
+                scores.append(prior)
+            else:
+                scores.append(confidence * value + (1 - confidence) * prior)
+
+        best = min(range(len(available)), key=lambda i: scores[i])
+        if explore and self.rng.random() < self.explore_rate:
+            others = [i for i in range(len(available)) if i != best]
+            # Сначала модели, о которых известно меньше всего
+            least_known = min(estimates[i][1] for i in others)
+            candidates = [i for i in others if estimates[i][1] == least_known]
+            index = self.rng.choice(candidates)
+            logger.info("Router explores %s", available[index].get("name"))
+            return available[index], "разведка"
+        return available[best], f"ожидание {scores[best]:.1f} с"
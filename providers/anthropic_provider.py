@@ -2,7 +2,9 @@
 
 from typing import Optional, Callable, Coroutine, List, Dict, Any
 from providers.base_provider import BaseProvider
-import aiohttp
+from providers.sse_parser import iter_sse_events
+from providers.stream_events import FinishEvent, UsageEvent, report_event
+from token_estimator import DEFAULT_MAX_OUTPUT, output_budget
 import json
 import logging
 
@@ -36,9 +38,18 @@ class AnthropicProvider(BaseProvider):
         # Определяем режим streaming
         use_streaming = streaming_callback is not None
 
+        # Лимит ответа по прогнозу длины перевода; потолок можно задать в модели
+        source = "".join(msg["content"] for msg in formatted_messages)
+        max_tokens = output_budget(
+            source,
+            target_lang,
+            "anthropic",
+            self.model_info.get("max_tokens") or DEFAULT_MAX_OUTPUT,
+        )
+
         data = {
             "model": self.model_name,
-            "max_tokens": 4000,
+            "max_tokens": max_tokens,
             "messages": formatted_messages,
             "stream": use_streaming,
         }
@@ -49,19 +60,19 @@ class AnthropicProvider(BaseProvider):
         url = "https://api.anthropic.com/v1/messages"
         await self._log_http_request("POST", url, headers, data)
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, json=data) as response:
-                if response.status != 200:
-                    response_text = await response.text()
-                    await self._log_http_response(response, response_text)
-                    await self._handle_http_error(response, "перевода")
+        session = self._get_session(url)
+        async with session.post(url, headers=headers, json=data) as response:
+            if response.status != 200:
+                response_text = await response.text()
+                await self._log_http_response(response, response_text)
+                await self._handle_http_error(response, "перевода")
 
-                if use_streaming:
-                    return await self._handle_streaming_response(
-                        response, streaming_callback
-                    )
-                else:
-                    return await self._handle_regular_response(response)
+            if use_streaming:
+                return await self._handle_streaming_response(
+                    response, streaming_callback
+                )
+            else:
+                return await self._handle_regular_response(response)
 
     async def _handle_regular_response(self, response) -> str:
         """Обрабатывает обычный (не streaming) ответ от Anthropic."""
@@ -69,6 +80,11 @@ class AnthropicProvider(BaseProvider):
         await self._log_http_response(response, response_text)
 
         result = await response.json()
+        usage = result.get("usage") or {}
+        await report_event(
+            UsageEvent(usage.get("input_tokens"), usage.get("output_tokens"))
+        )
+        await report_event(FinishEvent(result.get("stop_reason")))
         if result.get("content") and len(result["content"]) > 0:
             return result["content"][0]["text"]
         return ""
@@ -76,101 +92,89 @@ class AnthropicProvider(BaseProvider):
     async def _handle_streaming_response(self, response, streaming_callback) -> str:
         """Обрабатывает streaming ответ от Anthropic."""
         full_response = ""
-
-        async for line in response.content:
-            line = line.decode("utf-8").strip()
-            if not line:
+        input_tokens = None
+
+        async for event in iter_sse_events(response):
+            if event.data == "[DONE]":
+                break
+            # Нас интересуют текстовые дельты, расход токенов и причина остановки
+            if event.event not in (
+                "content_block_delta",
+                "message",
+                "message_start",
+                "message_delta",
+            ):
+                continue
+            try:
+                data = json.loads(event.data)
+            except json.JSONDecodeError:
+                # Игнорируем некорректные JSON строки
                 continue
 
-            # Anthropic использует формат Server-Sent Events
-            if line.startswith("data: "):
-                data_str = line[6:]  # Убираем "data: "
-
-                if data_str == "[DONE]":
-                    break
-
-                try:
-                    data = json.loads(data_str)
-
-                    # Обрабатываем различные типы событий
-                    if data.get("type") == "content_block_delta":
-                        delta = data.get("delta", {})
-                        if delta.get("type") == "text_delta":
-                            text_chunk = delta.get("text", "")
-                            if text_chunk:
-                                full_response += text_chunk
-                                if streaming_callback:
-                                    await streaming_callback(text_chunk)
-
-                except json.JSONDecodeError:
-                    # Игнорируем некорректные JSON строки
-                    continue
+            if data.get("type") == "content_block_delta":
+                delta = data.get("delta", {})
+                if delta.get("type") == "text_delta":
+                    text_chunk = delta.get("text", "")
+                    if text_chunk:
+                        full_response += text_chunk
+                        if streaming_callback:
+                            await streaming_callback(text_chunk)
+            elif data.get("type") == "message_start":
+                usage = data.get("message", {}).get("usage") or {}
+                input_tokens = usage.get("input_tokens")
+            elif data.get("type") == "message_delta":
+                usage = data.get("usage") or {}
+                await report_event(UsageEvent(input_tokens, usage.get("output_tokens")))
+                stop_reason = data.get("delta", {}).get("stop_reason")
+                if stop_reason:
+                    await report_event(FinishEvent(stop_reason))
 
         return full_response
 
     async def get_available_models(self) -> List[Dict[str, Any]]:
-        """Получает список доступных моделей от Anthropic."""
-        # Сначала проверяем валидность API ключа
+        """
+        Получает список доступных моделей от Anthropic.
+
+        Использует бесплатный эндпоинт GET /v1/models, который заодно
+        проверяет ключ, вместо тарифицируемого тестового запроса к /v1/messages.
+        """
         headers = {
             "x-api-key": self.access_token,
             "anthropic-version": "2023-06-01",
-            "Content-Type": "application/json",
         }
+        url = "https://api.anthropic.com/v1/models"
 
+        models = []
+        params = {"limit": 1000}
         try:
-            async with aiohttp.ClientSession() as session:
-                # Делаем минимальный тестовый запрос для проверки ключа
-                test_data = {
-                    "model": "claude-3-haiku-20240307",
-                    "messages": [{"role": "user", "content": "test"}],
-                    "max_tokens": 1,
-                }
-
-                async with session.post(
-                    "https://api.anthropic.com/v1/messages",
-                    headers=headers,
-                    json=test_data,
-                ) as response:
+            session = self._get_session(url)
+            while True:
+                async with session.get(url, headers=headers, params=params) as response:
                     if response.status == 401:
                         logging.error("Anthropic API key is invalid")
                         return []
-                    # Остальные ошибки игнорируем - главное что ключ валидный
+                    if response.status != 200:
+                        await self._handle_http_error(
+                            response, "получения списка моделей"
+                        )
+                    data = await response.json()
+
+                for model in data.get("data", []):
+                    display_name = model.get("display_name") or model["id"]
+                    models.append(
+                        {
+                            "name": f"Anthropic - {display_name}",
+                            "model_name": model["id"],
+                            "description": display_name,
+                        }
+                    )
+
+                if not data.get("has_more"):
+                    break
+                params = {"limit": 1000, "after_id": data.get("last_id")}
 
         except Exception as e:
-            logging.error(f"Error validating Anthropic API key: {e}")
+            logging.error(f"Error getting Anthropic models: {e}")
             return []
 
-        # Возвращаем список моделей только если ключ валидный
-        models = [
-            {
-                "name": "Anthropic - Claude 3 Opus",
-                "model_name": "claude-3-opus-20240229",
-                "description": "Most capable model for highly complex tasks",
-            },
-            {
-                "name": "Anthropic - Claude 3 Sonnet",
-                "model_name": "claude-3-sonnet-20240229",
-                "description": "Ideal balance of intelligence and speed",
-            },
-            {
-                "name": "Anthropic - Claude 3 Haiku",
-                "model_name": "claude-3-haiku-20240307",
-                "description": "Fastest and most compact model for simpler tasks",
-            },
-            {
-                "name": "Anthropic - Claude 2.1",
-                "model_name": "claude-2.1",
-                "description": "Previous generation model with strong capabilities",
-            },
-            {
-                "name": "Anthropic - Claude 2.0",
-                "model_name": "claude-2.0",
-                "description": "Previous generation model",
-            },
-            {
-                "name": "Anthropic - Claude Instant",
-                "model_name": "claude-instant-1.2",
-                "description": "Fast and cost-effective model",
-            },
-        ]
         return models
@@ -6,6 +6,8 @@ import os
 import logging
 import aiohttp
 import json
+from .connection_pool import ConnectionPool
+from .resilience import ProviderHTTPError, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +15,9 @@ logger = logging.getLogger(__name__)
 class BaseProvider(ABC):
     """Абстрактный базовый класс для всех провайдеров LLM."""
 
+    # Общий для процесса пул keep-alive соединений
+    connection_pool = ConnectionPool()
+
     def __init__(self, model_info: Dict[str, Any]):
         if not isinstance(model_info, dict):
             raise TypeError("model_info должен быть словарем")
@@ -22,6 +27,10 @@ class BaseProvider(ABC):
         self.api_endpoint = model_info.get("api_endpoint")
         self.model_info = model_info
 
+    def _get_session(self, url: Optional[str] = None) -> aiohttp.ClientSession:
+        """Возвращает пуловую HTTP-сессию для хоста запроса."""
+        return self.connection_pool.get_session(url or self.api_endpoint)
+
     def _is_debug_mode(self) -> bool:
         """Проверяет включен ли debug режим."""
         import main
@@ -101,27 +110,37 @@ class BaseProvider(ABC):
             pass
 
         provider_name = self.__class__.__name__.replace("Provider", "")
+        status = response.status
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
 
         if response.status == 401:
-            raise Exception(
+            raise ProviderHTTPError(
                 f"API ключ {provider_name} недействителен. "
                 f"Проверьте ключ в настройках и перезапустите приложение. "
-                f"(HTTP {response.status})"
+                f"(HTTP {response.status})",
+                status,
+                retry_after,
             )
         elif response.status == 403:
-            raise Exception(
+            raise ProviderHTTPError(
                 f"Доступ запрещен для {provider_name}. "
-                f"Проверьте права API ключа. (HTTP {response.status})"
+                f"Проверьте права API ключа. (HTTP {response.status})",
+                status,
+                retry_after,
             )
         elif response.status == 429:
-            raise Exception(
+            raise ProviderHTTPError(
                 f"Превышена квота запросов для {provider_name}. "
-                f"Попробуйте позже. (HTTP {response.status})"
+                f"Попробуйте позже. (HTTP {response.status})",
+                status,
+                retry_after,
             )
         elif response.status == 500:
-            raise Exception(
+            raise ProviderHTTPError(
                 f"Внутренняя ошибка сервера {provider_name}. "
-                f"Попробуйте позже. (HTTP {response.status})"
+                f"Попробуйте позже. (HTTP {response.status})",
+                status,
+                retry_after,
             )
         else:
             # Показываем детали ошибки в debug режиме
@@ -130,11 +149,17 @@ class BaseProvider(ABC):
                 if error_text and self._is_debug_mode()
                 else ""
             )
-            raise Exception(
+            raise ProviderHTTPError(
                 f"Ошибка {operation} в {provider_name}: "
-                f"HTTP {response.status}{error_details}"
+                f"HTTP {response.status}{error_details}",
+                status,
+                retry_after,
             )
 
+    async def close(self) -> None:
+        """Освобождает ресурсы провайдера. Пуловые HTTP-сессии не закрываются."""
+        pass
+
     @abstractmethod
     async def translate(
         self,
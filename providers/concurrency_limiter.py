@@ -0,0 +1,212 @@
+"""Адаптивное ограничение числа параллельных запросов к провайдеру (AIMD)."""
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+from .resilience import error_status
+
+logger = logging.getLogger(__name__)
+
+# Статусы перегрузки, при которых лимит снижается
+OVERLOAD_STATUSES = frozenset({429, 503, 529})
+
+
+def is_overload(error: Optional[BaseException]) -> bool:
+    """Проверяет, что ошибка (или ее причина) сообщает о перегрузке провайдера."""
+    while error is not None:
+        if error_status(error) in OVERLOAD_STATUSES:
+            return True
+        error = error.__cause__
+    return False
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Лимит параллельных запросов с аддитивным ростом и мультипликативным
+    снижением (AIMD).
+
+    Пока запросы проходят без ошибок и задержка не растет, лимит
+    увеличивается примерно на единицу за каждый «круг» из limit запросов.
+    При 429/503 или всплеске задержки лимит умножается на decrease_factor,
+    но не чаще одного раза за cooldown секунд.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        decrease_factor: float = 0.5,
+        latency_factor: float = 2.0,
+        cooldown: float = 1.0,
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max(min_limit, max_limit)
+        self.limit = float(min(self.max_limit, max(min_limit, initial)))
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        # Сглаженная задержка на единицу стоимости запроса
+        self.baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._history: Deque[Tuple[float, int, int, str]] = deque(maxlen=100)
+
+    async def acquire(self) -> None:
+        """Ждет свободного места в пределах текущего лимита."""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif not waiter.cancelled():
+                # Место уже выдано - возвращаем его
+                self.in_flight -= 1
+                self._wake()
+            raise
+
+    def release(
+        self,
+        latency: float,
+        cost: float = 1.0,
+        error: Optional[BaseException] = None,
+        overloaded: bool = False,
+    ) -> None:
+        """
+        Освобождает место и корректирует лимит по результату запроса.
+
+        Args:
+            latency: Длительность запроса, секунды
+            cost: Относительная стоимость запроса (например, число токенов)
+            error: Ошибка запроса, если он завершился неудачно
+            overloaded: Провайдер сообщал о перегрузке, даже если повтор удался
+        """
+        saturated = self.in_flight >= int(self.limit)
+        self.in_flight -= 1
+        if overloaded or is_overload(error):
+            self._decrease("overload")
+        elif error is None:
+            normalized = latency / max(cost, 1.0)
+            if (
+                self.baseline is not None
+                and normalized > self.baseline * self.latency_factor
+            ):
+                self._decrease(
+                    f"latency {normalized * 1000:.1f}ms/unit "
+                    f"> {self.latency_factor} x {self.baseline * 1000:.1f}ms/unit"
+                )
+            elif saturated:
+                self._set_limit(self.limit + 1.0 / self.limit, "healthy")
+            self.baseline = (
+                normalized
+                if self.baseline is None
+                else 0.8 * self.baseline + 0.2 * normalized
+            )
+        self._wake()
+
+    def slot(self, cost: float = 1.0) -> "_Slot":
+        """Контекстный менеджер: занимает место и освобождает его с замером задержки."""
+        return _Slot(self, cost)
+
+    def _decrease(self, reason: str) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self._set_limit(self.limit * self.decrease_factor, reason)
+
+    def _set_limit(self, value: float, reason: str) -> None:
+        old = int(self.limit)
+        self.limit = min(float(self.max_limit), max(float(self.min_limit), value))
+        new = int(self.limit)
+        if new != old:
+            self._history.append((time.time(), old, new, reason))
+            logger.info(
+                "Concurrency limit for %s: %d -> %d (%s)", self.name, old, new, reason
+            )
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def get_history(self) -> List[Tuple[float, int, int, str]]:
+        """Возвращает историю изменений лимита: (время, было, стало, причина)."""
+        return list(self._history)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Возвращает текущий лимит, загрузку и число ожидающих."""
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "baseline": self.baseline,
+            "adjustments": len(self._history),
+        }
+
+
+class _Slot:
+    """Место в адаптивном лимите на время одного запроса."""
+
+    def __init__(self, limiter: AdaptiveConcurrencyLimiter, cost: float):
+        self.limiter = limiter
+        self.cost = cost
+        self.overloaded = False
+        self._started = 0.0
+
+    def mark_overloaded(self) -> None:
+        """Отмечает, что провайдер сообщил о перегрузке во время запроса."""
+        self.overloaded = True
+
+    async def __aenter__(self) -> "_Slot":
+        await self.limiter.acquire()
+        self._started = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if isinstance(exc, asyncio.CancelledError):
+            # Отмена ничего не говорит о здоровье провайдера
+            self.limiter.in_flight -= 1
+            self.limiter._wake()
+            return
+        self.limiter.release(
+            time.monotonic() - self._started, self.cost, exc, self.overloaded
+        )
+
+
+_limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+
+
+def get_concurrency_limiter(
+    provider: str, initial: int = 4, max_limit: int = 16
+) -> AdaptiveConcurrencyLimiter:
+    """Возвращает общий для процесса адаптивный лимит провайдера."""
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        limiter = _limiters[provider] = AdaptiveConcurrencyLimiter(
+            provider, initial=initial, max_limit=max_limit
+        )
+    elif limiter.max_limit != max_limit:
+        limiter.max_limit = max(limiter.min_limit, max_limit)
+        limiter.limit = min(limiter.limit, float(limiter.max_limit))
+    return limiter
+
+
+def get_all_stats() -> Dict[str, Dict[str, Any]]:
+    """Возвращает текущие лимиты и историю изменений всех провайдеров."""
+    return {
+        name: {**limiter.get_stats(), "history": limiter.get_history()}
+        for name, limiter in _limiters.items()
+    }
@@ -0,0 +1,177 @@
+"""Общий пул HTTP-сессий для всех провайдеров."""
+
+from typing import Dict, Any, Optional, Set, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import logging
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """
+    Процессный менеджер keep-alive сессий aiohttp.
+
+    Держит по одной сессии на хост, кеширует DNS, ограничивает число
+    соединений к хосту и собирает статистику переиспользования соединений.
+    """
+
+    def __init__(
+        self,
+        limit_per_host: int = 8,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 75.0,
+    ):
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        # ключ хоста -> (event loop, сессия)
+        self._sessions: Dict[
+            str, Tuple[asyncio.AbstractEventLoop, aiohttp.ClientSession]
+        ] = {}
+        # Задачи закрытия сессий, вытесненных из пула
+        self._closing: Set[asyncio.Task] = set()
+        self._stats = {
+            "new_connections": 0,
+            "reused_connections": 0,
+            "handshake_time_total": 0.0,
+            "handshake_time_max": 0.0,
+        }
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        """Возвращает ключ хоста вида scheme://host:port."""
+        parts = urlsplit(url or "")
+        scheme = parts.scheme or "https"
+        port = parts.port or (443 if scheme == "https" else 80)
+        return f"{scheme}://{parts.hostname or ''}:{port}"
+
+    def _create_trace_config(self) -> aiohttp.TraceConfig:
+        """Создает трассировку для подсчета новых и переиспользованных соединений."""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_create_start(session, ctx, params):
+            ctx.connect_started = asyncio.get_running_loop().time()
+
+        async def on_create_end(session, ctx, params):
+            elapsed = asyncio.get_running_loop().time() - getattr(
+                ctx, "connect_started", asyncio.get_running_loop().time()
+            )
+            self._stats["new_connections"] += 1
+            self._stats["handshake_time_total"] += elapsed
+            self._stats["handshake_time_max"] = max(
+                self._stats["handshake_time_max"], elapsed
+            )
+
+        async def on_reuse(session, ctx, params):
+            self._stats["reused_connections"] += 1
+
+        trace_config.on_connection_create_start.append(on_create_start)
+        trace_config.on_connection_create_end.append(on_create_end)
+        trace_config.on_connection_reuseconn.append(on_reuse)
+        return trace_config
+
+    def get_session(self, url: str) -> aiohttp.ClientSession:
+        """
+        Возвращает keep-alive сессию для хоста из URL.
+
+        Сессия создается лениво и привязывается к текущему event loop,
+        поэтому метод нужно вызывать из корутины.
+        """
+        key = self.host_key(url)
+        loop = asyncio.get_running_loop()
+        entry = self._sessions.get(key)
+        if entry:
+            session_loop, session = entry
+            if session_loop is loop and not session.closed:
+                return session
+            # Сессия от другого цикла событий здесь не пригодна
+            self._sessions.pop(key, None)
+            self._discard(session_loop, session)
+
+        connector = aiohttp.TCPConnector(
+            limit_per_host=self.limit_per_host,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector, trace_configs=[self._create_trace_config()]
+        )
+        self._sessions[key] = (loop, session)
+        logger.debug("Создана пуловая сессия для %s", key)
+        return session
+
+    def _discard(
+        self, session_loop: asyncio.AbstractEventLoop, session: aiohttp.ClientSession
+    ) -> None:
+        """
+        Закрывает вытесненную сессию, не дожидаясь завершения.
+
+        Закрытие планируется в цикле событий, которому принадлежит сессия;
+        если тот уже закрыт, сессия закрывается из текущего цикла.
+        """
+        if session.closed:
+            return
+        if not session_loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self._close_session(session), session_loop)
+            return
+        task = asyncio.get_running_loop().create_task(self._close_session(session))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close_session(session: aiohttp.ClientSession) -> None:
+        try:
+            await session.close()
+        except Exception as e:
+            logger.debug("Не удалось закрыть вытесненную сессию: %s", e)
+
+    async def prewarm(self, url: str, timeout: float = 5.0) -> bool:
+        """
+        Заранее открывает TCP/TLS соединение к хосту из URL.
+
+        Отправляет легкий HEAD-запрос к корню хоста, после чего соединение
+        остается в пуле и переиспользуется первым настоящим запросом.
+        """
+        if not url:
+            return False
+        parts = urlsplit(url)
+        if not parts.hostname:
+            return False
+        root_url = f"{parts.scheme or 'https'}://{parts.netloc}/"
+        session = self.get_session(url)
+        try:
+            async with session.head(
+                root_url,
+                allow_redirects=False,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ):
+                pass
+            return True
+        except Exception as e:
+            logger.debug("Не удалось прогреть соединение к %s: %s", root_url, e)
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Возвращает статистику пула соединений."""
+        stats = dict(self._stats)
+        new = stats["new_connections"]
+        stats["avg_handshake_time"] = (
+            stats["handshake_time_total"] / new if new else 0.0
+        )
+        stats["hosts"] = sorted(self._sessions)
+        return stats
+
+    async def close(self, url: Optional[str] = None) -> None:
+        """Закрывает сессию хоста из URL или все сессии пула."""
+        if not url:
+            logger.info("Закрытие пула соединений, статистика: %s", self.get_stats())
+        keys = [self.host_key(url)] if url else list(self._sessions)
+        for key in keys:
+            entry = self._sessions.pop(key, None)
+            if entry and not entry[1].closed:
+                await entry[1].close()
+        if not url and self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
@@ -2,7 +2,13 @@
 
 from typing import Dict, Any, List, AsyncGenerator
 from .base_provider import BaseProvider
-import aiohttp
+from .sse_parser import iter_sse_events
+from .stream_events import (
+    FinishEvent,
+    parse_openai_usage,
+    report_event,
+    report_structured,
+)
 import json
 import logging
 import os
@@ -66,33 +72,33 @@ class CustomProvider(BaseProvider):
         Args:
             headers: Заголовки для запроса
         """
-        async with aiohttp.ClientSession() as session:
-            # Пробуем базовый формат
-            data = {
-                "model": self.model_info["model_name"],
-                "messages": [self._format_message("user", "test")],
-                "temperature": 0.3,
-                "stream": False,
-            }
-
-            async with session.post(
-                self.model_info["api_endpoint"], headers=headers, json=data
-            ) as response:
-                if response.status == 200:
-                    self.api_version = "base"
-                    return
-
-            # Если базовый формат не работает, пробуем формат GPT-4 Vision
-            data["messages"][0]["content"] = [{"type": "text", "text": "test"}]
-            async with session.post(
-                self.model_info["api_endpoint"], headers=headers, json=data
-            ) as response:
-                if response.status == 200:
-                    self.api_version = "vision"
-                    return
-
-            # Если ни один формат не работает, используем базовый
-            self.api_version = "base"
+        session = self._get_session(self.model_info["api_endpoint"])
+        # Пробуем базовый формат
+        data = {
+            "model": self.model_info["model_name"],
+            "messages": [self._format_message("user", "test")],
+            "temperature": 0.3,
+            "stream": False,
+        }
+
+        async with session.post(
+            self.model_info["api_endpoint"], headers=headers, json=data
+        ) as response:
+            if response.status == 200:
+                self.api_version = "base"
+                return
+
+        # Если базовый формат не работает, пробуем формат GPT-4 Vision
+        data["messages"][0]["content"] = [{"type": "text", "text": "test"}]
+        async with session.post(
+            self.model_info["api_endpoint"], headers=headers, json=data
+        ) as response:
+            if response.status == 200:
+                self.api_version = "vision"
+                return
+
+        # Если ни один формат не работает, используем базовый
+        self.api_version = "base"
 
     async def _get_headers(self) -> Dict[str, str]:
         """
@@ -156,54 +162,52 @@ class CustomProvider(BaseProvider):
         models_url = f"{base_url}/models"
 
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = await self._get_headers()
-                async with session.get(models_url, headers=headers) as response:
-                    if response.status != 200:
-                        await self._handle_http_error(
-                            response, "получения списка моделей"
-                        )
-
-                    data = await response.json()
-
-                    # Пробуем разные форматы ответа
-                    if isinstance(data, dict):
-                        # Формат OpenAI
-                        if "data" in data:
-                            return [
-                                {
-                                    "id": model["id"],
-                                    "name": model.get("name", model["id"]),
-                                }
-                                for model in data["data"]
-                            ]
-                        # Другие возможные форматы
-                        models = data.get("models", [])
-                        if models:
-                            return [
-                                {
-                                    "id": model.get("id", model.get("model_id", "")),
-                                    "name": model.get(
-                                        "name",
-                                        model.get("model_name", model.get("id", "")),
-                                    ),
-                                }
-                                for model in models
-                            ]
-                    elif isinstance(data, list):
-                        # Список моделей напрямую
+            session = self._get_session(models_url)
+            headers = await self._get_headers()
+            async with session.get(models_url, headers=headers) as response:
+                if response.status != 200:
+                    await self._handle_http_error(response, "получения списка моделей")
+
+                data = await response.json()
+
+                # Пробуем разные форматы ответа
+                if isinstance(data, dict):
+                    # Формат OpenAI
+                    if "data" in data:
+                        return [
+                            {
+                                "id": model["id"],
+                                "name": model.get("name", model["id"]),
+                            }
+                            for model in data["data"]
+                        ]
+                    # Другие возможные форматы
+                    models = data.get("models", [])
+                    if models:
                         return [
                             {
                                 "id": model.get("id", model.get("model_id", "")),
                                 "name": model.get(
-                                    "name", model.get("model_name", model.get("id", ""))
+                                    "name",
+                                    model.get("model_name", model.get("id", "")),
                                 ),
                             }
-                            for model in data
+                            for model in models
                         ]
-
-                    logger.error(f"Неизвестный формат ответа API: {data}")
-                    return []
+                elif isinstance(data, list):
+                    # Список моделей напрямую
+                    return [
+                        {
+                            "id": model.get("id", model.get("model_id", "")),
+                            "name": model.get(
+                                "name", model.get("model_name", model.get("id", ""))
+                            ),
+                        }
+                        for model in data
+                    ]
+
+                logger.error(f"Неизвестный формат ответа API: {data}")
+                return []
 
         except Exception as e:
             logger.error(f"Ошибка при получении списка моделей: {str(e)}")
@@ -250,36 +254,47 @@ class CustomProvider(BaseProvider):
                     await streaming_callback(
                         delta
                     )  # Отправляем только новую часть текста
+                await report_structured(delta)
 
             return accumulated_text
 
-        async with aiohttp.ClientSession() as session:
-            data = {
-                "model": self.model_info["model_name"],
-                "messages": prepared_msgs,
-                "temperature": 0.3,
-                "stream": False,
-            }
-            headers = await self._get_headers()
-
-            await self._log_http_request(
-                "POST", self.model_info["api_endpoint"], headers, data
-            )
-
-            async with session.post(
-                self.model_info["api_endpoint"], headers=headers, json=data
-            ) as response:
-                response_text = await response.text()
-                await self._log_http_response(response, response_text)
-
-                if response.status != 200:
-                    await self._handle_http_error(response, "перевода")
+        session = self._get_session(self.model_info["api_endpoint"])
+        data = {
+            "model": self.model_info["model_name"],
+            "messages": prepared_msgs,
+            "temperature": 0.3,
+            "stream": False,
+        }
+        headers = await self._get_headers()
+
+        await self._log_http_request(
+            "POST", self.model_info["api_endpoint"], headers, data
+        )
 
-                result = await response.json()
-                content = result["choices"][0]["message"]["content"]
-                if isinstance(content, list):
-                    return content[0].get("text", "")
-                return content
+        async with session.post(
+            self.model_info["api_endpoint"], headers=headers, json=data
+        ) as response:
+            response_text = await response.text()
+            await self._log_http_response(response, response_text)
+
+            if response.status != 200:
+                await self._handle_http_error(response, "перевода")
+
+            result = await response.json()
+            await self._report_completion(result)
+            content = result["choices"][0]["message"]["content"]
+            if isinstance(content, list):
+                return content[0].get("text", "")
+            return content
+
+    async def _report_completion(self, chunk: Dict[str, Any]) -> None:
+        """Сообщает расход токенов и причину завершения из ответа API."""
+        usage = parse_openai_usage(chunk.get("usage"))
+        if usage:
+            await report_event(usage)
+        choices = chunk.get("choices") or [{}]
+        if choices[0].get("finish_reason"):
+            await report_event(FinishEvent(choices[0]["finish_reason"]))
 
     async def generate_text(self, prompt: str, system_prompt: str = "") -> str:
         """
@@ -297,33 +312,33 @@ class CustomProvider(BaseProvider):
             messages.append(self._format_message("system", system_prompt))
         messages.append(self._format_message("user", prompt))
 
-        async with aiohttp.ClientSession() as session:
-            data = {
-                "model": self.model_info["model_name"],
-                "messages": await self._prepare_messages(messages),
-                "temperature": 0.3,
-                "stream": False,
-            }
+        session = self._get_session(self.model_info["api_endpoint"])
+        data = {
+            "model": self.model_info["model_name"],
+            "messages": await self._prepare_messages(messages),
+            "temperature": 0.3,
+            "stream": False,
+        }
+
+        headers = await self._get_headers()
+        logger.debug(f"Request data: {data}")
+        logger.debug(f"Request headers: {headers}")
+        async with session.post(
+            self.model_info["api_endpoint"], headers=headers, json=data
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                logger.error(
+                    f"Ошибка перевода. Статус {response.status}. Текст ошибки: {error_text}"
+                )
+                raise Exception(f"API error: {error_text}")
 
-            headers = await self._get_headers()
-            logger.debug(f"Request data: {data}")
-            logger.debug(f"Request headers: {headers}")
-            async with session.post(
-                self.model_info["api_endpoint"], headers=headers, json=data
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(
-                        f"Ошибка перевода. Статус {response.status}. Текст ошибки: {error_text}"
-                    )
-                    raise Exception(f"API error: {error_text}")
-
-                result = await response.json()
-                logger.debug(f"API response: {result}")
-                content = result["choices"][0]["message"]["content"]
-                if isinstance(content, list):
-                    return content[0].get("text", "")
-                return content
+            result = await response.json()
+            logger.debug(f"API response: {result}")
+            content = result["choices"][0]["message"]["content"]
+            if isinstance(content, list):
+                return content[0].get("text", "")
+            return content
 
     async def generate_stream(
         self, prompt: str, system_prompt: str = ""
@@ -346,91 +361,50 @@ class CustomProvider(BaseProvider):
         prepared_messages = await self._prepare_messages(messages)
         logger.debug(f"\n=== Подготовленные сообщения для stream: {prepared_messages}")
 
-        async with aiohttp.ClientSession() as session:
-            data = {
-                "model": self.model_info["model_name"],
-                "messages": prepared_messages,
-                "temperature": 0.3,
-                "stream": True,
-            }
+        session = self._get_session(self.model_info["api_endpoint"])
+        data = {
+            "model": self.model_info["model_name"],
+            "messages": prepared_messages,
+            "temperature": 0.3,
+            "stream": True,
+        }
 
-            headers = await self._get_headers()
+        headers = await self._get_headers()
 
-            await self._log_http_request(
-                "POST", self.model_info["api_endpoint"], headers, data
-            )
+        await self._log_http_request(
+            "POST", self.model_info["api_endpoint"], headers, data
+        )
 
-            async with session.post(
-                self.model_info["api_endpoint"], headers=headers, json=data
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    await self._log_http_response(response, error_text)
-                    await self._handle_http_error(response, "потокового перевода")
-
-                logger.debug(f"=== Stream response status: {response.status}")
-                first_chunk = True
-                async for line in response.content:
-                    if line:
-                        line = line.decode("utf-8").strip()
-                        logger.debug(f"\n=== Получена строка потока: {line}")
-                        if line.startswith("data: "):
-                            if line == "data: [DONE]":
-                                logger.debug("=== Получен маркер завершения потока")
-                                break
-                            try:
-                                chunk = json.loads(line[6:])
-                                logger.debug(f"=== Получен chunk: {chunk}")
-
-                                # Проверяем наличие delta в chunk
-                                if "choices" not in chunk or not chunk["choices"]:
-                                    logger.debug("=== Chunk не содержит choices")
-                                    continue
-
-                                choice = chunk["choices"][0]
-                                if "delta" not in choice:
-                                    logger.debug("=== Choice не содержит delta")
-                                    continue
-
-                                # Пропускаем только первый чанк, где роль assistant
-                                if (
-                                    first_chunk
-                                    and choice["delta"].get("role") == "assistant"
-                                ):
-                                    logger.debug(
-                                        "=== Пропускаем первый чанк с ролью assistant"
-                                    )
-                                    first_chunk = False
-                                    continue
-
-                                first_chunk = False
-
-                                # Проверяем finish_reason только если он не пустой
-                                if choice.get("finish_reason"):
-                                    logger.debug(
-                                        f"=== Finish reason: {choice['finish_reason']}, завершаю поток"
-                                    )
-                                    break
-
-                                delta = choice["delta"].get("content", "")
-                                if delta:
-                                    if isinstance(delta, list):
-                                        delta = delta[0].get("text", "")
-                                        logger.debug(
-                                            f"=== Преобразован delta из списка: {delta}"
-                                        )
-                                    logger.debug(f"=== Delta получен: {delta}")
-                                    yield delta
-                                else:
-                                    logger.debug("=== Получен пустой delta")
-
-                            except json.JSONDecodeError as e:
-                                logger.debug(
-                                    f"=== Ошибка парсинга JSON: {str(e)}, строка: {line}"
-                                )
-                                continue
-                            except Exception as e:
-                                logger.debug(
-                                    f"=== Неожиданная ошибка при обработке chunk: {str(e)}"
-                                )
-                                continue
+        async with session.post(
+            self.model_info["api_endpoint"], headers=headers, json=data
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                await self._log_http_response(response, error_text)
+                await self._handle_http_error(response, "потокового перевода")
+
+            async for event in iter_sse_events(response):
+                if event.data == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(event.data)
+                except json.JSONDecodeError:
+                    logger.debug("=== Ошибка парсинга JSON: %s", event.data)
+                    continue
+
+                await self._report_completion(chunk)
+                choices = chunk.get("choices")
+                if not choices:
+                    continue
+                choice = choices[0]
+
+                delta = (choice.get("delta") or {}).get("content")
+                if delta:
+                    if isinstance(delta, list):
+                        delta = delta[0].get("text", "")
+                    yield delta
+
+                # Проверяем finish_reason только если он не пустой
+                if choice.get("finish_reason"):
+                    logger.debug("=== Finish reason: %s", choice["finish_reason"])
+                    break
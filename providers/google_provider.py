@@ -1,11 +1,17 @@
 """Провайдер для работы с Google AI API."""
 
 import google.generativeai as genai
+from google.ai import generativelanguage as glm
 import asyncio
+import threading
 from typing import List, Dict, Any, Optional, Callable
 from .base_provider import BaseProvider
+from .stream_events import FinishEvent, UsageEvent, report_event
 import logging
 
+# Маркер завершения потока в очереди чанков
+_STREAM_DONE = object()
+
 
 class GoogleProvider(BaseProvider):
     """Класс для работы с Google AI API."""
@@ -18,8 +24,22 @@ class GoogleProvider(BaseProvider):
             model_info: Словарь с информацией о модели
         """
         super().__init__(model_info)
-        genai.configure(api_key=model_info["access_token"])
+        self._client_options = {"api_key": model_info["access_token"]}
         self.model = genai.GenerativeModel(model_info["model_name"])
+        # Клиент на экземпляр вместо глобального genai.configure: модели
+        # с разными ключами могут работать одновременно. Публичного способа
+        # передать клиент модели нет, поэтому используется приватный атрибут
+        # _client (google-generativeai 0.8.x, где он создается лениво из None)
+        if hasattr(self.model, "_client"):
+            self.model._client = glm.GenerativeServiceClient(
+                client_options=self._client_options
+            )
+        else:
+            logging.warning(
+                "google-generativeai без GenerativeModel._client: "
+                "ключ задается глобально через genai.configure"
+            )
+            genai.configure(api_key=model_info["access_token"])
 
     async def translate(
         self,
@@ -43,33 +63,91 @@ class GoogleProvider(BaseProvider):
         try:
             if not streaming_callback:
                 # Неасинхронный режим
-                response = await asyncio.get_event_loop().run_in_executor(
+                response = await asyncio.get_running_loop().run_in_executor(
                     None, lambda: self.model.generate_content(prompt)
                 )
+                await self._report_completion(response)
                 return response.text
 
-            # Потоковый режим
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.model.generate_content(prompt, stream=True)
-            )
-
-            full_response = ""
-
-            async def process_chunks():
-                nonlocal full_response
-                for chunk in response:
-                    if chunk.text:
-                        await streaming_callback(chunk.text)
-                        full_response += chunk.text
-                        await asyncio.sleep(0)  # Даем шанс другим корутинам
-
-            await process_chunks()
-            return full_response
+            return await self._streaming_translate(prompt, streaming_callback)
 
         except Exception as e:
             logging.error("Ошибка Google AI API: %s", e)
             raise
 
+    async def _streaming_translate(self, prompt: str, streaming_callback) -> str:
+        """
+        Потоковый перевод без блокировки цикла событий.
+
+        Синхронный итератор SDK читается в рабочем потоке, чанки передаются
+        в цикл событий через asyncio.Queue.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def put(item) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                # Цикл событий уже закрыт
+                stop.set()
+
+        def produce() -> None:
+            try:
+                for chunk in self.model.generate_content(prompt, stream=True):
+                    if stop.is_set():
+                        break
+                    put(chunk)
+            except Exception as e:
+                put(e)
+            finally:
+                put(_STREAM_DONE)
+
+        loop.run_in_executor(None, produce)
+
+        full_response = []
+        last_chunk = None
+        try:
+            while True:
+                item = await queue.get()
+                if item is _STREAM_DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                last_chunk = item
+                text = self._chunk_text(item)
+                if text:
+                    full_response.append(text)
+                    await streaming_callback(text)
+        finally:
+            # Останавливаем чтение, если перевод прерван
+            stop.set()
+
+        if last_chunk is not None:
+            await self._report_completion(last_chunk)
+        return "".join(full_response)
+
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        """Возвращает текст чанка; чанк без текстовых частей дает пустую строку."""
+        try:
+            return chunk.text
+        except ValueError:
+            return ""
+
+    async def _report_completion(self, response) -> None:
+        """Сообщает расход токенов и причину завершения из ответа SDK."""
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            await report_event(
+                UsageEvent(usage.prompt_token_count, usage.candidates_token_count)
+            )
+        candidates = getattr(response, "candidates", None)
+        if candidates and candidates[0].finish_reason:
+            reason = candidates[0].finish_reason
+            await report_event(FinishEvent(getattr(reason, "name", str(reason))))
+
     def _convert_messages_to_prompt(self, messages: List[Dict[str, str]]) -> str:
         """Конвертирует список сообщений в текстовый промпт."""
         prompt = ""
@@ -86,8 +164,9 @@ class GoogleProvider(BaseProvider):
         """Получает список доступных моделей от Google."""
         try:
             # Получаем список моделей через синхронный API в отдельном потоке
-            models = await asyncio.get_event_loop().run_in_executor(
-                None, genai.list_models
+            client = glm.ModelServiceClient(client_options=self._client_options)
+            models = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: list(client.list_models())
             )
 
             # Фильтруем только модели для чата и генерации текста
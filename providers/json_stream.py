@@ -0,0 +1,110 @@
+"""Инкрементальный разбор JSON-массива или объекта из потока дельт."""
+
+from typing import Any, List, Optional, Tuple, Union
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Символы, меняющие состояние разбора; остальные пропускаются без цикла Python
+_SPECIAL_RE = re.compile(r'[\[\]{},"\\]')
+_OPENERS = "[{"
+_CLOSERS = "]}"
+
+
+class JSONStreamParser:
+    """
+    Разбирает JSON верхнего уровня по мере поступления текста.
+
+    Каждый элемент массива (или поле объекта) отдается, как только
+    закрывается: перевод первой строки пакета доступен, пока модель еще
+    генерирует пятидесятую. Текст до первой скобки (например, ```json)
+    и после закрывающей скобки игнорируется.
+
+    feed возвращает пары (индекс элемента или ключ поля, значение).
+    Элемент, который не разбирается как JSON, пропускается, но занимает
+    свой индекс, чтобы не сдвигать последующие.
+    """
+
+    def __init__(self):
+        self.container: Optional[str] = None
+        self.done = False
+        self.fed = 0
+        self.errors = 0
+        self._index = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._pending: List[str] = []
+
+    def feed(self, text: str) -> List[Tuple[Union[int, str], Any]]:
+        """Подает очередную дельту и возвращает закрывшиеся элементы."""
+        items: List[Tuple[Union[int, str], Any]] = []
+        if self.done or not text:
+            return items
+        self.fed += len(text)
+        position = 0
+        if self.container is None:
+            starts = [i for i in (text.find("["), text.find("{")) if i != -1]
+            if not starts:
+                return items
+            position = min(starts)
+            self.container = text[position]
+            self._depth = 1
+            position += 1
+
+        start = position
+        skip_until = position
+        if self._escape:
+            # Экранированный символ пришел в начале новой дельты
+            skip_until = position + 1
+            self._escape = False
+
+        for match in _SPECIAL_RE.finditer(text, position):
+            index = match.start()
+            if index < skip_until:
+                continue
+            char = match.group()
+            if self._in_string:
+                if char == "\\":
+                    skip_until = index + 2
+                    if skip_until > len(text):
+                        self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in _OPENERS:
+                self._depth += 1
+            elif char in _CLOSERS or char == ",":
+                if char != ",":
+                    self._depth -= 1
+                if self._depth == 0 or (char == "," and self._depth == 1):
+                    self._pending.append(text[start:index])
+                    self._emit(items)
+                    start = index + 1
+                if self._depth == 0:
+                    self.done = True
+                    return items
+        self._pending.append(text[start:])
+        return items
+
+    def _emit(self, items: List[Tuple[Union[int, str], Any]]) -> None:
+        """Разбирает накопленный элемент верхнего уровня."""
+        element = "".join(self._pending).strip()
+        self._pending = []
+        if not element:
+            return
+        try:
+            if self.container == "{":
+                key, value = next(iter(json.loads("{" + element + "}").items()))
+                items.append((key, value))
+            else:
+                items.append((self._index, json.loads(element)))
+        except (json.JSONDecodeError, StopIteration) as e:
+            logger.warning("Skipping malformed streamed JSON element: %s", e)
+            self.errors += 1
+        if self.container == "[":
+            self._index += 1
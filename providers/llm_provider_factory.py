@@ -6,7 +6,8 @@ from .anthropic_provider import AnthropicProvider
 from .openrouter_provider import OpenRouterProvider
 from .google_provider import GoogleProvider
 from .custom_provider import CustomProvider
-from typing import Dict, Any, List
+from .resilience import provider_breaker_name
+from typing import Dict, Any, List, Optional, Type
 import asyncio
 import logging
 
@@ -54,37 +55,98 @@ class LLMProviderFactory:
         Returns:
             BaseProvider: Экземпляр провайдера
         """
-        provider_name = model_info.get("provider", "").lower()
-
-        if provider_name == "openai":
-            return OpenAIProvider(model_info)
-        elif provider_name == "anthropic":
-            return AnthropicProvider(model_info)
-        elif provider_name == "openrouter":
-            return OpenRouterProvider(model_info)
-        elif provider_name == "google":
-            return GoogleProvider(model_info)
-        elif provider_name in ["custom", "cerebras", "nebius"]:
-            return CustomProvider(model_info)
-        else:
+        return LLMProviderFactory.get_provider_class(model_info)(model_info)
+
+    @staticmethod
+    def get_provider_class(model_info: Dict[str, Any]) -> Type[BaseProvider]:
+        """Возвращает класс провайдера модели, не создавая клиента."""
+        provider_name = (model_info.get("provider") or "").lower()
+        provider_class = {
+            "openai": OpenAIProvider,
+            "anthropic": AnthropicProvider,
+            "openrouter": OpenRouterProvider,
+            "google": GoogleProvider,
+            "custom": CustomProvider,
+            "cerebras": CustomProvider,
+            "nebius": CustomProvider,
+        }.get(provider_name)
+        if provider_class is None:
             raise ValueError(f"Неизвестный провайдер: {provider_name}")
+        return provider_class
+
+    @staticmethod
+    def get_breaker_name(model_info: Dict[str, Any]) -> str:
+        """Возвращает имя выключателя, через который пойдут запросы модели."""
+        return provider_breaker_name(
+            LLMProviderFactory.get_provider_class(model_info),
+            model_info.get("api_endpoint"),
+        )
+
+    @staticmethod
+    async def get_models_by_config(
+        configs: List[Dict[str, Any]],
+        timeout: float = 10.0,
+    ) -> List[Optional[List[Dict[str, Any]]]]:
+        """
+        Получает списки моделей по конфигурациям провайдеров.
+
+        Провайдеры опрашиваются параллельно, каждый со своим таймаутом:
+        медленный или недоступный провайдер не задерживает остальных.
+
+        Args:
+            configs: Конфигурации (provider, api_endpoint, access_token)
+            timeout: Таймаут запроса к одному провайдеру, секунды
+
+        Returns:
+            List: Модели каждой конфигурации в том же порядке (у каждой
+            указан провайдер в поле "provider") или None при ошибке
+        """
+
+        async def fetch(config: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+            provider_name = config["provider"].lower()
+            try:
+                provider = LLMProviderFactory.get_provider(
+                    {"model_name": "", **config, "provider": provider_name}
+                )
+                models = await asyncio.wait_for(
+                    provider.get_available_models(), timeout
+                )
+            except asyncio.TimeoutError:
+                logger.error(
+                    f"Таймаут получения списка моделей {provider_name} ({timeout} с)"
+                )
+                return None
+            except Exception as e:
+                logger.error(
+                    f"Ошибка при получении списка моделей {provider_name}: {str(e)}"
+                )
+                return None
+            for model in models:
+                model.setdefault("provider", provider_name)
+            return models
+
+        return list(await asyncio.gather(*(fetch(config) for config in configs)))
 
     @staticmethod
     async def get_all_available_models(
         api_keys: Dict[str, str],
+        timeout: float = 10.0,
     ) -> List[Dict[str, Any]]:
         """
         Получает список всех доступных моделей от всех провайдеров.
 
+        Возвращаются модели тех провайдеров, которые успели ответить
+        (см. get_models_by_config).
+
         Args:
             api_keys: Словарь с API ключами для каждого провайдера
                      Пример: {"openai": "sk-...", "anthropic": "sk-...", ...}
+            timeout: Таймаут запроса к одному провайдеру, секунды
 
         Returns:
-            List[Dict[str, Any]]: Список всех доступных моделей
+            List[Dict[str, Any]]: Список всех доступных моделей; у каждой
+            указан ключ провайдера в поле "provider"
         """
-        all_models = []
-
         # Создаем базовую конфигурацию для каждого провайдера
         providers_config = {
             "openai": {
@@ -113,29 +175,11 @@ class LLMProviderFactory:
             },
         }
 
-        # Создаем задачи для асинхронного получения моделей
-        tasks = []
-        for provider_name, config in providers_config.items():
-            if config["access_token"]:  # Получаем модели только если есть API ключ
-                provider = LLMProviderFactory.get_provider(config)
-                tasks.append(provider.get_available_models())
-
-        # Запускаем все задачи параллельно
-        if tasks:
-            try:
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                # Обрабатываем результаты
-                for result in results:
-                    if isinstance(result, list):  # Успешный результат
-                        all_models.extend(result)
-                    else:  # Исключение
-                        logger.error(
-                            f"Ошибка при получении списка моделей: {str(result)}"
-                        )
-
-            except Exception as e:
-                logger.error(f"Ошибка при получении списка моделей: {str(e)}")
-                return []
-
+        # Получаем модели только если есть API ключ
+        configs = [
+            config for config in providers_config.values() if config["access_token"]
+        ]
+        all_models = []
+        for models in await LLMProviderFactory.get_models_by_config(configs, timeout):
+            all_models.extend(models or [])
         return sorted(all_models, key=lambda x: x["name"])
@@ -2,7 +2,12 @@
 
 from typing import Any, Dict, Optional, Callable, Coroutine, List
 from providers.base_provider import BaseProvider
-import aiohttp
+from providers.stream_events import (
+    FinishEvent,
+    UsageEvent,
+    parse_openai_usage,
+    report_event,
+)
 from openai import AsyncOpenAI
 import logging
 
@@ -10,6 +15,22 @@ import logging
 class OpenAIProvider(BaseProvider):
     """Провайдер для работы с OpenAI API."""
 
+    def __init__(self, model_info: Dict[str, Any]):
+        super().__init__(model_info)
+        self._client: Optional[AsyncOpenAI] = None
+
+    def _get_client(self) -> AsyncOpenAI:
+        """Возвращает SDK-клиент, создавая его один раз на экземпляр провайдера."""
+        if self._client is None:
+            self._client = AsyncOpenAI(api_key=self.access_token)
+        return self._client
+
+    async def close(self) -> None:
+        """Закрывает SDK-клиент."""
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.close()
+
     async def translate(
         self,
         messages: list,
@@ -21,18 +42,29 @@ class OpenAIProvider(BaseProvider):
         return await self._regular_translate(messages)
 
     async def _streaming_translate(self, messages, callback):
-        client = None
         try:
-            client = AsyncOpenAI(api_key=self.access_token)
+            client = self._get_client()
             full_translation = []
 
             response = await client.chat.completions.create(
-                model=self.model_name, messages=messages, stream=True
+                model=self.model_name,
+                messages=messages,
+                stream=True,
+                stream_options={"include_usage": True},
             )
 
             async for chunk in response:
+                # Расход токенов приходит последним чанком без choices
+                if getattr(chunk, "usage", None):
+                    await report_event(
+                        UsageEvent(
+                            chunk.usage.prompt_tokens, chunk.usage.completion_tokens
+                        )
+                    )
                 if not chunk.choices:
                     continue
+                if chunk.choices[0].finish_reason:
+                    await report_event(FinishEvent(chunk.choices[0].finish_reason))
                 delta = chunk.choices[0].delta.content
                 if delta:
                     full_translation.append(delta)
@@ -45,12 +77,9 @@ class OpenAIProvider(BaseProvider):
             return "".join(full_translation) or ""
 
         except Exception as e:
+            # Пробрасываем ошибку, чтобы текст ошибки не попал в память переводов
             logging.error("Streaming error: %s", e)
-            return "Ошибка перевода"
-
-        finally:
-            if client:
-                await client.close()
+            raise
 
     async def _regular_translate(self, messages: list) -> str:
         headers = {
@@ -63,22 +92,27 @@ class OpenAIProvider(BaseProvider):
         url = f"{self.api_endpoint}/chat/completions"
         await self._log_http_request("POST", url, headers, data)
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, json=data) as response:
-                response_text = await response.text()
-                await self._log_http_response(response, response_text)
+        session = self._get_session(url)
+        async with session.post(url, headers=headers, json=data) as response:
+            response_text = await response.text()
+            await self._log_http_response(response, response_text)
 
-                if response.status != 200:
-                    await self._handle_http_error(response, "перевода")
+            if response.status != 200:
+                await self._handle_http_error(response, "перевода")
 
-                result = await response.json()
-                return result["choices"][0]["message"]["content"].strip()
+            result = await response.json()
+            usage = parse_openai_usage(result.get("usage"))
+            if usage:
+                await report_event(usage)
+            finish_reason = result["choices"][0].get("finish_reason")
+            if finish_reason:
+                await report_event(FinishEvent(finish_reason))
+            return result["choices"][0]["message"]["content"].strip()
 
     async def get_available_models(self) -> List[Dict[str, Any]]:
         """Получает список доступных моделей от OpenAI."""
-        client = None
         try:
-            client = AsyncOpenAI(api_key=self.access_token)
+            client = self._get_client()
             models = await client.models.list()
 
             # Фильтруем только модели для чата и GPT
@@ -111,7 +145,3 @@ class OpenAIProvider(BaseProvider):
         except Exception as e:
             logging.error("Error getting OpenAI models: %s", e)
             return []
-
-        finally:
-            if client:
-                await client.close()
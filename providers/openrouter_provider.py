@@ -2,7 +2,13 @@
 
 from typing import Optional, Callable, Coroutine, List, Dict, Any
 from providers.base_provider import BaseProvider
-import aiohttp
+from providers.sse_parser import iter_sse_events
+from providers.stream_events import (
+    FinishEvent,
+    parse_openai_usage,
+    report_event,
+    report_structured,
+)
 import json
 import logging
 
@@ -38,18 +44,28 @@ class OpenRouterProvider(BaseProvider):
 
         await self._log_http_request("POST", self.api_endpoint, headers, data)
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                self.api_endpoint, headers=headers, json=data
-            ) as response:
-                response_text = await response.text()
-                await self._log_http_response(response, response_text)
-
-                if response.status != 200:
-                    await self._handle_http_error(response, "перевода")
-
-                result = await response.json()
-                return result["choices"][0]["message"]["content"].strip()
+        session = self._get_session(self.api_endpoint)
+        async with session.post(
+            self.api_endpoint, headers=headers, json=data
+        ) as response:
+            response_text = await response.text()
+            await self._log_http_response(response, response_text)
+
+            if response.status != 200:
+                await self._handle_http_error(response, "перевода")
+
+            result = await response.json()
+            await self._report_completion(result)
+            return result["choices"][0]["message"]["content"].strip()
+
+    async def _report_completion(self, chunk: Dict[str, Any]) -> None:
+        """Сообщает расход токенов и причину завершения из ответа API."""
+        usage = parse_openai_usage(chunk.get("usage"))
+        if usage:
+            await report_event(usage)
+        choices = chunk.get("choices") or [{}]
+        if choices[0].get("finish_reason"):
+            await report_event(FinishEvent(choices[0]["finish_reason"]))
 
     async def _streaming_translate(self, messages, callback):
         headers = {
@@ -65,30 +81,31 @@ class OpenRouterProvider(BaseProvider):
 
         await self._log_http_request("POST", self.api_endpoint, headers, data)
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                self.api_endpoint, headers=headers, json=data
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    await self._log_http_response(response, error_text)
-                    await self._handle_http_error(response, "потокового перевода")
-
-                async for line in response.content:
-                    if line:
-                        line = line.decode("utf-8").strip()
-                        if line.startswith("data: ") and line != "data: [DONE]":
-                            try:
-                                chunk_data = json.loads(line[6:])
-                                if "choices" in chunk_data and chunk_data["choices"]:
-                                    delta = chunk_data["choices"][0].get("delta", {})
-                                    content = delta.get("content", "")
-                                    if content:
-                                        full_response.append(content)
-                                        if callback:
-                                            await callback(content)
-                            except json.JSONDecodeError:
-                                continue
+        session = self._get_session(self.api_endpoint)
+        async with session.post(
+            self.api_endpoint, headers=headers, json=data
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                await self._log_http_response(response, error_text)
+                await self._handle_http_error(response, "потокового перевода")
+
+            async for event in iter_sse_events(response):
+                if event.data == "[DONE]":
+                    break
+                try:
+                    chunk_data = json.loads(event.data)
+                except json.JSONDecodeError:
+                    continue
+                await self._report_completion(chunk_data)
+                choices = chunk_data.get("choices")
+                if choices:
+                    content = (choices[0].get("delta") or {}).get("content")
+                    if content:
+                        full_response.append(content)
+                        if callback:
+                            await callback(content)
+                        await report_structured(content)
 
         return "".join(full_response) or ""
 
@@ -101,30 +118,28 @@ class OpenRouterProvider(BaseProvider):
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    "https://openrouter.ai/api/v1/models", headers=headers
-                ) as response:
-                    if response.status != 200:
-                        await self._handle_http_error(
-                            response, "получения списка моделей"
-                        )
-
-                    data = await response.json()
-                    models = []
-
-                    for model in data.get("data", []):
-                        models.append(
-                            {
-                                "name": f"OpenRouter - {model['name']}",
-                                "model_name": model["id"],
-                                "description": model.get(
-                                    "description", f"OpenRouter {model['name']} model"
-                                ),
-                            }
-                        )
-
-                    return sorted(models, key=lambda x: x["model_name"])
+            session = self._get_session("https://openrouter.ai/api/v1/models")
+            async with session.get(
+                "https://openrouter.ai/api/v1/models", headers=headers
+            ) as response:
+                if response.status != 200:
+                    await self._handle_http_error(response, "получения списка моделей")
+
+                data = await response.json()
+                models = []
+
+                for model in data.get("data", []):
+                    models.append(
+                        {
+                            "name": f"OpenRouter - {model['name']}",
+                            "model_name": model["id"],
+                            "description": model.get(
+                                "description", f"OpenRouter {model['name']} model"
+                            ),
+                        }
+                    )
+
+                return sorted(models, key=lambda x: x["model_name"])
 
         except Exception as e:
             logging.error(f"Error getting OpenRouter models: {e}")
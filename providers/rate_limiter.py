@@ -0,0 +1,143 @@
+"""Клиентский ограничитель частоты запросов к провайдерам (token bucket)."""
+
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _Bucket:
+    """Ведро токенов, пополняемое равномерно до емкости за минуту."""
+
+    __slots__ = ("capacity", "rate", "level", "updated")
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Через сколько секунд в ведре наберется amount токенов."""
+        deficit = amount - self.level
+        return deficit / self.rate if deficit > 0 else 0.0
+
+
+class RateLimiter:
+    """
+    Ограничитель запросов в минуту (RPM) и токенов в минуту (TPM).
+
+    Запросы ждут в порядке очереди, пока в обоих ведрах не наберется
+    бюджет, вместо того чтобы уйти к провайдеру и получить 429.
+    Лимит 0 означает отсутствие ограничения.
+    """
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self._requests: Optional[_Bucket] = None
+        self._tokens: Optional[_Bucket] = None
+        self.configure(requests_per_minute, tokens_per_minute)
+        self._lock = asyncio.Lock()
+        self._stats = {"requests": 0, "waited": 0, "wait_total": 0.0, "wait_max": 0.0}
+
+    def configure(self, requests_per_minute: int, tokens_per_minute: int) -> None:
+        """Меняет лимиты; при неизменных лимитах накопленный бюджет сохраняется."""
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        if requests_per_minute <= 0:
+            self._requests = None
+        elif self._requests is None or self._requests.capacity != requests_per_minute:
+            self._requests = _Bucket(requests_per_minute)
+        if tokens_per_minute <= 0:
+            self._tokens = None
+        elif self._tokens is None or self._tokens.capacity != tokens_per_minute:
+            self._tokens = _Bucket(tokens_per_minute)
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """
+        Ждет бюджет на один запрос с оценкой tokens токенов.
+
+        Returns:
+            float: Время ожидания в очереди, секунды
+        """
+        started = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                delay = 0.0
+                if self._requests is not None:
+                    self._requests.refill(now)
+                    delay = self._requests.wait_time(1)
+                if self._tokens is not None:
+                    self._tokens.refill(now)
+                    # Запрос больше минутного лимита ждет полного ведра
+                    amount = min(tokens, self._tokens.capacity)
+                    delay = max(delay, self._tokens.wait_time(amount))
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+
+            if self._requests is not None:
+                self._requests.level -= 1
+            if self._tokens is not None:
+                self._tokens.level -= tokens
+
+        waited = time.monotonic() - started
+        self._stats["requests"] += 1
+        if waited > 0.001:
+            self._stats["waited"] += 1
+            self._stats["wait_total"] += waited
+            self._stats["wait_max"] = max(self._stats["wait_max"], waited)
+        return waited
+
+    def adjust_tokens(self, delta: int) -> None:
+        """Корректирует списанный бюджет токенов по фактическому расходу."""
+        if self._tokens is not None and delta:
+            self._tokens.level = min(self._tokens.capacity, self._tokens.level - delta)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Возвращает число запросов и время ожидания в очереди."""
+        stats = dict(self._stats)
+        stats["avg_wait"] = (
+            stats["wait_total"] / stats["waited"] if stats["waited"] else 0.0
+        )
+        return stats
+
+
+_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+
+
+def get_rate_limiter(
+    provider: str,
+    access_token_env: str,
+    requests_per_minute: int,
+    tokens_per_minute: int,
+) -> RateLimiter:
+    """
+    Возвращает общий для процесса ограничитель провайдера и ключа API.
+
+    Модели одного провайдера с одним ключом делят общий бюджет.
+    """
+    key = (provider, access_token_env or "")
+    limiter = _limiters.get(key)
+    if limiter is None:
+        limiter = _limiters[key] = RateLimiter(requests_per_minute, tokens_per_minute)
+    elif (limiter.requests_per_minute, limiter.tokens_per_minute) != (
+        requests_per_minute,
+        tokens_per_minute,
+    ):
+        limiter.configure(requests_per_minute, tokens_per_minute)
+    return limiter
+
+
+def get_all_stats() -> Dict[str, Dict[str, Any]]:
+    """Возвращает метрики ожидания всех ограничителей."""
+    return {
+        f"{provider}/{env}" if env else provider: limiter.get_stats()
+        for (provider, env), limiter in _limiters.items()
+    }
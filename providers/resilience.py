@@ -0,0 +1,299 @@
+"""Повторы запросов с backoff и автоматический выключатель для провайдеров."""
+
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+import random
+import time
+import aiohttp
+from .connection_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Статусы, при которых запрос имеет смысл повторить
+TRANSIENT_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class ProviderHTTPError(Exception):
+    """Ошибка HTTP от провайдера со статусом и подсказкой Retry-After."""
+
+    def __init__(self, message: str, status: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """Запрос отклонен без обращения к провайдеру: выключатель разомкнут."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(
+            f"Провайдер {name} временно недоступен после серии ошибок. "
+            f"Повторная попытка через {max(1, round(retry_in))} с."
+        )
+        self.name = name
+        self.retry_in = retry_in
+
+
+class DeadlineExceededError(Exception):
+    """Модель не уложилась в срок: не прислала первый токен или весь ответ."""
+
+    def __init__(self, model: str, kind: str, seconds: float):
+        what = "первого токена" if kind == "first_token" else "ответа"
+        super().__init__(f"Истекло время ожидания {what} от {model} ({seconds:g} с)")
+        self.model = model
+        self.kind = kind
+        self.seconds = seconds
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Разбирает заголовок Retry-After: число секунд или HTTP-дата."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def error_status(error: Exception) -> Optional[int]:
+    """Возвращает HTTP-статус ошибки провайдера или SDK, если он известен."""
+    for attr in ("status", "status_code", "code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def error_retry_after(error: Exception) -> Optional[float]:
+    """Возвращает задержку из Retry-After, если ошибка ее содержит."""
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is not None:
+        return retry_after
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        return parse_retry_after(headers.get("retry-after"))
+    return None
+
+
+def is_transient(error: Exception) -> bool:
+    """Проверяет, что ошибка временная: перегрузка, сбой сервера или сети."""
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+        return True
+    return error_status(error) in TRANSIENT_STATUSES
+
+
+class RetryPolicy:
+    """Экспоненциальный backoff с полным джиттером и учетом Retry-After."""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        max_retry_after: float = 30.0,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Возвращает паузу перед попыткой attempt (нумерация с 1)."""
+        if retry_after is not None:
+            return retry_after
+        cap = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, cap)
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель провайдера.
+
+    После failure_threshold временных ошибок подряд размыкается и сразу
+    отклоняет запросы; через reset_timeout пропускает один пробный запрос
+    и по его результату замыкается или размыкается снова. Пока пробный
+    запрос выполняется, остальные запросы отклоняются.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+    def retry_in(self) -> float:
+        """Сколько секунд осталось до пробного запроса."""
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """
+        Пропускает запрос или выбрасывает CircuitOpenError.
+
+        Returns:
+            bool: True, если запрос пропущен как пробный
+        """
+        if self.state == self.CLOSED:
+            return False
+        if self.state == self.OPEN:
+            if self.retry_in() > 0:
+                raise CircuitOpenError(self.name, self.retry_in())
+            self._set_state(self.HALF_OPEN)
+        if self.probing:
+            raise CircuitOpenError(self.name, 0.0)
+        self.probing = True
+        return True
+
+    def release_probe(self) -> None:
+        """Снимает пробный запрос, завершившийся без вердикта (отмена и т.п.)."""
+        self.probing = False
+
+    def record_success(self) -> None:
+        """Отмечает успешный запрос и замыкает выключатель."""
+        self.failures = 0
+        self.probing = False
+        if self.state != self.CLOSED:
+            self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        """Отмечает временную ошибку; при превышении порога размыкает выключатель."""
+        self.failures += 1
+        self.probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    def _set_state(self, state: str) -> None:
+        if state == self.state:
+            return
+        logger.warning("Circuit breaker %s: %s -> %s", self.name, self.state, state)
+        self.state = state
+        for listener in list(_state_listeners):
+            try:
+                listener(self)
+            except Exception as e:
+                logger.error("Circuit breaker listener error: %s", e)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_state_listeners: List[Callable[[CircuitBreaker], Any]] = []
+
+
+def breaker_name(provider) -> str:
+    """Имя выключателя: провайдер и, если есть, хост его эндпоинта."""
+    return provider_breaker_name(
+        type(provider), getattr(provider, "api_endpoint", None)
+    )
+
+
+def provider_breaker_name(provider_class: type, endpoint: Optional[str]) -> str:
+    """Имя выключателя по классу провайдера и эндпоинту, без создания клиента."""
+    name = provider_class.__name__.replace("Provider", "")
+    if isinstance(endpoint, str) and endpoint:
+        return f"{name} ({ConnectionPool.host_key(endpoint)})"
+    return name
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Возвращает общий для процесса выключатель с указанным именем."""
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name)
+    return _breakers[name]
+
+
+def get_breakers() -> List[CircuitBreaker]:
+    """Возвращает все созданные выключатели."""
+    return list(_breakers.values())
+
+
+def add_state_listener(listener: Callable[[CircuitBreaker], Any]) -> None:
+    """Подписывает обработчик на смену состояния любого выключателя."""
+    _state_listeners.append(listener)
+
+
+def remove_state_listener(listener: Callable[[CircuitBreaker], Any]) -> None:
+    """Отписывает обработчик смены состояния."""
+    if listener in _state_listeners:
+        _state_listeners.remove(listener)
+
+
+async def call_with_retry(
+    call: Callable[[], Awaitable[Any]],
+    breaker: Optional[CircuitBreaker] = None,
+    policy: Optional[RetryPolicy] = None,
+    can_retry: Callable[[], bool] = lambda: True,
+    on_retry: Optional[Callable[[Exception, float], Awaitable[None]]] = None,
+) -> Any:
+    """
+    Выполняет запрос с повторами временных ошибок.
+
+    Args:
+        call: Фабрика корутины запроса, вызывается заново на каждую попытку
+        breaker: Выключатель провайдера
+        policy: Политика повторов
+        can_retry: Возвращает False, если повтор уже невозможен
+            (например, часть потокового ответа передана потребителю)
+        on_retry: Вызывается перед каждой повторной попыткой с ошибкой и паузой
+
+    Returns:
+        Any: Результат успешной попытки
+    """
+    policy = policy or RetryPolicy()
+    attempt = 0
+    while True:
+        attempt += 1
+        probe = breaker.allow() if breaker is not None else False
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            if probe:
+                breaker.release_probe()
+            raise
+        except Exception as e:
+            if not is_transient(e):
+                # Постоянная ошибка не говорит о доступности эндпоинта
+                if probe:
+                    breaker.release_probe()
+                raise
+            if breaker is not None:
+                breaker.record_failure()
+            retry_after = error_retry_after(e)
+            if (
+                attempt >= policy.max_attempts
+                or not can_retry()
+                or (breaker is not None and breaker.state == CircuitBreaker.OPEN)
+                or (retry_after or 0) > policy.max_retry_after
+            ):
+                raise
+            delay = policy.delay(attempt, retry_after)
+            logger.warning(
+                "Transient error (attempt %d/%d), retry in %.2fs: %s",
+                attempt,
+                policy.max_attempts,
+                delay,
+                e,
+            )
+            if on_retry is not None:
+                await on_retry(e, delay)
+            await asyncio.sleep(delay)
+            continue
+        if breaker is not None:
+            breaker.record_success()
+        return result
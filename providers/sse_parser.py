@@ -0,0 +1,127 @@
+"""Инкрементальный разбор потока Server-Sent Events."""
+
+import re
+from typing import AsyncIterator, List, Optional
+import aiohttp
+
+# Конец строки в SSE: "\r\n", "\n" или одиночный "\r"
+_EOL_RE = re.compile(rb"[\r\n]")
+
+
+class SSEEvent:
+    """Событие SSE: тип, данные и идентификатор."""
+
+    __slots__ = ("event", "data", "id")
+
+    def __init__(self, event: str, data: str, id: Optional[str] = None):
+        self.event = event
+        self.data = data
+        self.id = id
+
+    def __repr__(self) -> str:
+        return f"SSEEvent(event={self.event!r}, data={self.data!r})"
+
+
+class SSEDecoder:
+    """
+    Байтовый инкрементальный декодер SSE.
+
+    Принимает произвольные куски байтов (фреймы могут разрываться в любом
+    месте, в том числе внутри UTF-8 символа), поддерживает многострочные
+    поля data:, поле event:, комментарии и все три варианта конца строки.
+    Каждый кусок просматривается один раз: поиск продолжается с места,
+    где остановился на предыдущем куске.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._scanned = 0
+        self._skip_lf = False
+        self._data: List[bytes] = []
+        self._event: Optional[bytes] = None
+        self._id: Optional[bytes] = None
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        """Добавляет кусок байтов и возвращает завершенные события."""
+        if self._skip_lf and chunk:
+            # "\r" пришел последним байтом прошлого куска, "\n" — его пара
+            self._skip_lf = False
+            if chunk[:1] == b"\n":
+                chunk = chunk[1:]
+        buffer = self._buffer
+        buffer += chunk
+        events: List[SSEEvent] = []
+        start = 0
+        search = _EOL_RE.search
+        match = search(buffer, self._scanned)
+        while match is not None:
+            end = match.start()
+            line = bytes(buffer[start:end])
+            start = end + 1
+            if buffer[end] == 0x0D:
+                if start == len(buffer):
+                    self._skip_lf = True
+                elif buffer[start] == 0x0A:
+                    start += 1
+            if line:
+                self._process_line(line)
+            else:
+                event = self._dispatch()
+                if event is not None:
+                    events.append(event)
+            match = search(buffer, start)
+        del buffer[:start]
+        self._scanned = len(buffer)
+        return events
+
+    def flush(self) -> List[SSEEvent]:
+        """Завершает разбор в конце потока и возвращает оставшееся событие."""
+        if self._buffer:
+            self._process_line(bytes(self._buffer))
+            self._buffer.clear()
+        self._scanned = 0
+        self._skip_lf = False
+        event = self._dispatch()
+        return [event] if event is not None else []
+
+    def _process_line(self, line: bytes) -> None:
+        if line[:1] == b":":
+            return  # комментарий / keep-alive
+        field, _, value = line.partition(b":")
+        if value[:1] == b" ":
+            value = value[1:]
+        if field == b"data":
+            self._data.append(value)
+        elif field == b"event":
+            self._event = value
+        elif field == b"id":
+            self._id = value
+
+    def _dispatch(self) -> Optional[SSEEvent]:
+        if not self._data:
+            self._event = None
+            return None
+        data = self._data[0] if len(self._data) == 1 else b"\n".join(self._data)
+        event = SSEEvent(
+            self._event.decode("utf-8") if self._event else "message",
+            data.decode("utf-8"),
+            self._id.decode("utf-8") if self._id else None,
+        )
+        self._data = []
+        self._event = None
+        return event
+
+
+async def iter_sse_events(response: aiohttp.ClientResponse) -> AsyncIterator[SSEEvent]:
+    """
+    Итерирует события SSE из HTTP-ответа.
+
+    Читает тело кусками (iter_any), поэтому не зависит от лимита длины
+    строки буфера aiohttp.
+    """
+    decoder = SSEDecoder()
+    async for chunk in response.content.iter_any():
+        for event in decoder.feed(chunk):
+            yield event
+    for event in decoder.flush():
+        yield event
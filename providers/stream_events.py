@@ -0,0 +1,214 @@
+"""Типизированные события потокового ответа провайдера."""
+
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+import asyncio
+from .json_stream import JSONStreamParser
+from .resilience import breaker_name, call_with_retry, get_breaker
+
+
+class StreamEvent:
+    """Базовый класс события потока."""
+
+    __slots__ = ()
+
+
+class DeltaEvent(StreamEvent):
+    """Очередная часть сгенерированного текста."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class UsageEvent(StreamEvent):
+    """Расход токенов, если провайдер его сообщает."""
+
+    __slots__ = ("input_tokens", "output_tokens")
+
+    def __init__(
+        self, input_tokens: Optional[int] = None, output_tokens: Optional[int] = None
+    ):
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+
+class ItemEvent(StreamEvent):
+    """Закрывшийся элемент структурированного (JSON) ответа."""
+
+    __slots__ = ("key", "value")
+
+    def __init__(self, key: Any, value: Any):
+        self.key = key
+        self.value = value
+
+
+class FinishEvent(StreamEvent):
+    """Завершение генерации: причина и полный текст ответа."""
+
+    __slots__ = ("reason", "text")
+
+    def __init__(self, reason: Optional[str] = None, text: Optional[str] = None):
+        self.reason = reason
+        self.text = text
+
+
+class RetryEvent(StreamEvent):
+    """Временная ошибка провайдера, после которой запрос будет повторен."""
+
+    __slots__ = ("error", "delay")
+
+    def __init__(self, error: Exception, delay: float):
+        self.error = error
+        self.delay = delay
+
+
+class ErrorEvent(StreamEvent):
+    """Ошибка во время генерации."""
+
+    __slots__ = ("error",)
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+# Приемник событий текущего потока; устанавливается в задаче-производителе
+_event_sink: ContextVar[Optional[Callable[[StreamEvent], Awaitable[None]]]] = (
+    ContextVar("stream_event_sink", default=None)
+)
+# Разборщик JSON-ответа текущего потока, если потребитель ждет элементы
+_item_parser: ContextVar[Optional[JSONStreamParser]] = ContextVar(
+    "stream_item_parser", default=None
+)
+
+
+async def report_event(event: StreamEvent) -> None:
+    """
+    Сообщает событие (расход токенов, причину завершения) потребителю
+    текущего потока. Вне provider_events ничего не делает.
+    """
+    sink = _event_sink.get()
+    if sink is not None:
+        await sink(event)
+
+
+async def report_structured(text: str) -> None:
+    """
+    Подает дельту разборщику структурированного ответа текущего потока и
+    сообщает закрывшиеся элементы как ItemEvent. Провайдеры вызывают ее
+    в цикле чтения потока; вне structured-потока ничего не делает.
+    """
+    parser = _item_parser.get()
+    if parser is None:
+        return
+    for key, value in parser.feed(text):
+        await report_event(ItemEvent(key, value))
+
+
+def parse_openai_usage(usage: Optional[Dict[str, Any]]) -> Optional[UsageEvent]:
+    """Преобразует поле usage OpenAI-совместимого ответа в событие."""
+    if not usage:
+        return None
+    return UsageEvent(usage.get("prompt_tokens"), usage.get("completion_tokens"))
+
+
+async def provider_events(
+    provider,
+    messages: list,
+    target_lang: str,
+    stream: bool = True,
+    max_buffer: int = 64,
+    structured: bool = False,
+    before_retry: Optional[Callable[[], Awaitable[None]]] = None,
+) -> AsyncIterator[StreamEvent]:
+    """
+    Запускает перевод у провайдера и отдает поток типизированных событий.
+
+    Чтение ответа провайдера идет в отдельной задаче, которая складывает
+    события в ограниченную очередь: медленный потребитель не блокирует
+    цикл чтения, пока в очереди есть место, а при ее заполнении
+    производитель ждет (backpressure).
+
+    Временные ошибки (429, 5xx, сбои сети) повторяются с backoff, пока
+    потребителю не передана ни одна дельта; выключатель провайдера
+    отклоняет запросы, пока эндпоинт недоступен.
+
+    Args:
+        provider: Провайдер с методом translate
+        messages: Сообщения для модели
+        target_lang: Целевой язык
+        stream: Запрашивать потоковый ответ
+        max_buffer: Максимальное число событий в очереди
+        structured: Ответ - JSON-массив или объект; его элементы отдаются
+            как ItemEvent по мере закрытия. Провайдеры, которые не подают
+            дельты в report_structured, дают элементы по завершении ответа
+        before_retry: Ожидается перед каждой повторной попыткой (например,
+            получение токена у ограничителя частоты после 429)
+
+    Yields:
+        StreamEvent: DeltaEvent, UsageEvent, RetryEvent, ItemEvent, затем
+        FinishEvent или ErrorEvent
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_buffer)
+    state = {"received": False, "reason": None}
+
+    async def on_delta(text: str) -> None:
+        if text:
+            state["received"] = True
+            await queue.put(DeltaEvent(text))
+
+    async def sink(event: StreamEvent) -> None:
+        if isinstance(event, FinishEvent):
+            state["reason"] = event.reason
+        else:
+            await queue.put(event)
+
+    async def on_retry(error: Exception, delay: float) -> None:
+        await queue.put(RetryEvent(error, delay))
+
+    attempts = 0
+
+    async def attempt():
+        nonlocal attempts
+        attempts += 1
+        if attempts > 1 and before_retry is not None:
+            await before_retry()
+        return await provider.translate(
+            messages, target_lang, on_delta if stream else None
+        )
+
+    async def produce() -> None:
+        _event_sink.set(sink)
+        parser = JSONStreamParser() if structured else None
+        _item_parser.set(parser)
+        try:
+            result = await call_with_retry(
+                attempt,
+                breaker=get_breaker(breaker_name(provider)),
+                can_retry=lambda: not state["received"],
+                on_retry=on_retry,
+            )
+            text = result if isinstance(result, str) else None
+            # Провайдер без потоковой отдачи возвращает текст целиком
+            if text and not state["received"]:
+                await queue.put(DeltaEvent(text))
+            if parser is not None and not parser.fed and text:
+                await report_structured(text)
+            await queue.put(FinishEvent(state["reason"] or "stop", text))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(ErrorEvent(e))
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            event = await queue.get()
+            yield event
+            if isinstance(event, (FinishEvent, ErrorEvent)):
+                break
+    finally:
+        if not producer.done():
+            producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
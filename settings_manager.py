@@ -34,30 +34,39 @@ class SettingsManager:
                 "OpenAI": {
                     "access_token_env": "OPENAI_API_KEY",
                     "api_endpoint": "https://api.openai.com/v1/chat/completions",
+                    "rate_limit": {"requests_per_minute": 0, "tokens_per_minute": 0},
                 },
                 "Anthropic": {
                     "access_token_env": "ANTHROPIC_API_KEY",
                     "api_endpoint": "https://api.anthropic.com/v1/messages",
+                    "rate_limit": {"requests_per_minute": 0, "tokens_per_minute": 0},
+                },
+                "Google": {
+                    "access_token_env": "GOOGLE_API_KEY",
+                    "api_endpoint": "",
+                    "rate_limit": {"requests_per_minute": 0, "tokens_per_minute": 0},
                 },
-                "Google": {"access_token_env": "GOOGLE_API_KEY", "api_endpoint": ""},
                 "OpenRouter": {
                     "access_token_env": "OPENROUTER_API_KEY",
                     "api_endpoint": "https://openrouter.ai/api/v1/chat/completions",
+                    "rate_limit": {"requests_per_minute": 0, "tokens_per_minute": 0},
                 },
                 "Cerebras": {
                     "access_token_env": "CEREBRAS_API_KEY",
                     "api_endpoint": "https://api.cerebras.ai/v1",
+                    "rate_limit": {"requests_per_minute": 0, "tokens_per_minute": 0},
                 },
                 "Nebius": {
                     "access_token_env": "NEBIUS_API_KEY",
                     "api_endpoint": "https://api.studio.nebius.ai/v1/",
+                    "rate_limit": {"requests_per_minute": 0, "tokens_per_minute": 0},
                 },
             },
             "languages": {
                 "available": ["Русский", "English", "Deutsch", "Français", "Español"],
                 "current": "English",
             },
-            "models": {"available": [], "current": None},
+            "models": {"available": [], "current": None, "recent": []},
             "prompts": {
                 "available": [
                     {
@@ -79,6 +88,68 @@ class SettingsManager:
             "behavior": {"start_minimized": False, "minimize_to_tray_on_close": True},
             "theme": {"mode": "system"},
             "font": {"family": "Arial", "size": 12},
+            "network": {
+                "prewarm_on_start": True,
+                "prewarm_on_hotkey": True,
+                "prewarm_recent_models": 0,
+                "keepalive_refresh_interval": 60,
+            },
+            "cache": {
+                "enabled": True,
+                "max_entries": 5000,
+                "max_age_days": 30,
+                "segment_mode": "off",
+            },
+            "chunking": {
+                "enabled": True,
+                "max_chunk_tokens": 1500,
+                "concurrency": 4,
+                "max_concurrency": 16,
+            },
+            "batching": {
+                "max_batch_tokens": 2000,
+                "max_batch_items": 50,
+            },
+            "fanout": {
+                "enabled": False,
+                "concurrency": 4,
+            },
+            "pivot": {
+                "language": None,
+                "targets": [],
+            },
+            "catalog": {
+                "ttl_hours": 24,
+                "timeout": 10,
+            },
+            "deadlines": {
+                "first_token_seconds": 30,
+                "total_seconds": 300,
+                "fallback_models": [],
+            },
+            "hedging": {
+                "enabled": False,
+                "delay_seconds": 1.0,
+                "model": None,
+            },
+            "stats": {
+                "enabled": True,
+                "window": 200,
+                "max_age_days": 30,
+            },
+            "routing": {
+                "enabled": False,
+                "pool": [],
+                "explore_rate": 0.1,
+                "half_life_hours": 24,
+            },
+            "tiering": {
+                "enabled": False,
+                "short_max_tokens": 30,
+                "short_model": None,
+                "long_min_tokens": 8000,
+                "long_model": None,
+            },
         }
 
         try:
@@ -286,8 +357,41 @@ class SettingsManager:
                     "provider": provider,
                     "model_name": model_name,
                 }
+                self._touch_recent_model(provider, model_name)
                 self.save_settings()
 
+    def _touch_recent_model(self, provider, model_name, limit=10):
+        """Перемещает модель в начало списка недавно использованных."""
+        recent = [
+            m
+            for m in self.settings["models"].get("recent", [])
+            if not (m["provider"] == provider and m["model_name"] == model_name)
+        ]
+        recent.insert(0, {"provider": provider, "model_name": model_name})
+        self.settings["models"]["recent"] = recent[:limit]
+
+    def get_recent_models(self, count):
+        """Возвращает до count недавно использованных моделей, начиная с последней."""
+        if count <= 0:
+            return []
+        models, _ = self.get_models()
+        recent = []
+        for conf in self.settings.get("models", {}).get("recent", []):
+            model = next(
+                (
+                    m
+                    for m in models
+                    if m["provider"] == conf["provider"]
+                    and m["model_name"] == conf["model_name"]
+                ),
+                None,
+            )
+            if model:
+                recent.append(model)
+            if len(recent) >= count:
+                break
+        return recent
+
     def set_model_access_token(self, model_name, access_token):
         """Устанавливает токен доступа для указанной модели."""
         if "models" in self.settings:
@@ -340,6 +444,10 @@ class SettingsManager:
         self.settings["theme"] = {"mode": mode}
         self.save_settings()
 
+    def get_providers(self):
+        """Возвращает настройки всех провайдеров по именам."""
+        return dict(self.settings.get("providers", {}))
+
     def get_provider_settings(self, provider_name):
         """Возвращает настройки для конкретного провайдера."""
         return self.settings.get("providers", {}).get(provider_name, {})
@@ -444,6 +552,278 @@ class SettingsManager:
 
         self.save_settings()
 
+    def get_network_settings(self):
+        """Возвращает настройки сетевого слоя (прогрев соединений)."""
+        network = self.settings.get("network", {})
+        return {
+            "prewarm_on_start": network.get("prewarm_on_start", True),
+            "prewarm_on_hotkey": network.get("prewarm_on_hotkey", True),
+            "prewarm_recent_models": int(network.get("prewarm_recent_models", 0)),
+            "keepalive_refresh_interval": int(
+                network.get("keepalive_refresh_interval", 60)
+            ),
+        }
+
+    def get_cache_settings(self):
+        """Возвращает настройки памяти переводов."""
+        cache = self.settings.get("cache", {})
+        return {
+            "enabled": cache.get("enabled", True),
+            "max_entries": int(cache.get("max_entries", 5000)),
+            "max_age_days": int(cache.get("max_age_days", 30)),
+            "segment_mode": cache.get("segment_mode", "off"),
+            "path": os.path.join(
+                os.path.dirname(self.settings_file), "translation_cache.db"
+            ),
+        }
+
+    def get_stats_settings(self):
+        """Возвращает настройки статистики задержек моделей."""
+        stats = self.settings.get("stats", {})
+        return {
+            "enabled": stats.get("enabled", True),
+            "window": int(stats.get("window", 200)),
+            "max_age_days": int(stats.get("max_age_days", 30)),
+            "path": os.path.join(
+                os.path.dirname(self.settings_file), "latency_stats.db"
+            ),
+        }
+
+    def get_routing_settings(self):
+        """
+        Возвращает настройки автоматического выбора модели.
+
+        pool - конфигурации моделей пула; пустой пул в настройках означает
+        все доступные модели.
+        """
+        routing = self.settings.get("routing", {})
+        models, _ = self.get_models()
+        pool_conf = routing.get("pool") or []
+        if pool_conf:
+            wanted = {(m["provider"], m["model_name"]) for m in pool_conf}
+            models = [m for m in models if (m["provider"], m["model_name"]) in wanted]
+        return {
+            "enabled": bool(routing.get("enabled", False)),
+            "pool": models,
+            "explore_rate": float(routing.get("explore_rate", 0.1)),
+            "half_life_hours": float(routing.get("half_life_hours", 24)),
+        }
+
+    def set_routing_enabled(self, enabled):
+        """Включает или выключает автоматический выбор модели."""
+        routing = self.settings.setdefault("routing", {})
+        if routing.get("enabled") != enabled:
+            routing["enabled"] = enabled
+            self.save_settings()
+
+    def set_routing_pool(self, models):
+        """Задает пул моделей для автоматического выбора (пустой - все модели)."""
+        routing = self.settings.setdefault("routing", {})
+        routing["pool"] = [
+            {"provider": m["provider"], "model_name": m["model_name"]} for m in models
+        ]
+        self.save_settings()
+
+    def get_tiering_settings(self):
+        """
+        Возвращает настройки выбора модели по размеру текста.
+
+        Тексты до short_max_tokens переводит short_model, от long_min_tokens -
+        long_model; None, если модель уровня не задана или удалена.
+        """
+        tiering = self.settings.get("tiering", {})
+
+        def resolve(conf):
+            if not conf:
+                return None
+            return self.get_model_info(conf["provider"], conf["model_name"])
+
+        return {
+            "enabled": bool(tiering.get("enabled", False)),
+            "short_max_tokens": int(tiering.get("short_max_tokens", 30)),
+            "short_model": resolve(tiering.get("short_model")),
+            "long_min_tokens": int(tiering.get("long_min_tokens", 8000)),
+            "long_model": resolve(tiering.get("long_model")),
+        }
+
+    def set_tiering_settings(
+        self,
+        enabled,
+        short_max_tokens=None,
+        short_model=None,
+        long_min_tokens=None,
+        long_model=None,
+    ):
+        """Задает пороги и модели уровней; модели - словари provider/model_name."""
+        tiering = self.settings.setdefault("tiering", {})
+        tiering["enabled"] = enabled
+        if short_max_tokens is not None:
+            tiering["short_max_tokens"] = short_max_tokens
+        if long_min_tokens is not None:
+            tiering["long_min_tokens"] = long_min_tokens
+        for key, model in (("short_model", short_model), ("long_model", long_model)):
+            if model is not None:
+                tiering[key] = {
+                    "provider": model["provider"],
+                    "model_name": model["model_name"],
+                }
+        self.save_settings()
+
+    def get_rate_limit(self, provider_name):
+        """Возвращает лимиты запросов и токенов в минуту для провайдера (0 - без лимита)."""
+        rate_limit = self.get_provider_settings(provider_name).get("rate_limit", {})
+        return {
+            "requests_per_minute": int(rate_limit.get("requests_per_minute", 0)),
+            "tokens_per_minute": int(rate_limit.get("tokens_per_minute", 0)),
+        }
+
+    def get_chunking_settings(self):
+        """Возвращает настройки разбиения длинных текстов на куски."""
+        chunking = self.settings.get("chunking", {})
+        return {
+            "enabled": chunking.get("enabled", True),
+            "max_chunk_tokens": int(chunking.get("max_chunk_tokens", 1500)),
+            "concurrency": int(chunking.get("concurrency", 4)),
+            "max_concurrency": int(chunking.get("max_concurrency", 16)),
+        }
+
+    def get_batching_settings(self):
+        """Возвращает ограничения пакета коротких строк в одном запросе."""
+        batching = self.settings.get("batching", {})
+        return {
+            "max_batch_tokens": int(batching.get("max_batch_tokens", 2000)),
+            "max_batch_items": int(batching.get("max_batch_items", 50)),
+        }
+
+    def get_fanout_settings(self):
+        """Возвращает настройки перевода сразу на все доступные языки."""
+        fanout = self.settings.get("fanout", {})
+        return {
+            "enabled": bool(fanout.get("enabled", False)),
+            "concurrency": max(1, int(fanout.get("concurrency", 4))),
+        }
+
+    def set_fanout_enabled(self, enabled):
+        """Включает или выключает перевод на все доступные языки."""
+        fanout = self.settings.setdefault("fanout", {})
+        if fanout.get("enabled") != enabled:
+            fanout["enabled"] = enabled
+            self.save_settings()
+
+    def get_pivot_settings(self):
+        """
+        Возвращает язык-посредник и языки, перевод на которые идет через него.
+
+        Редкие языки переводятся сначала на language, затем с него на целевой.
+        По умолчанию посредник не задан и все языки переводятся напрямую.
+        """
+        pivot = self.settings.get("pivot", {})
+        return {
+            "language": pivot.get("language") or None,
+            "targets": list(pivot.get("targets") or []),
+        }
+
+    def set_pivot_settings(self, language, targets):
+        """Задает язык-посредник и языки, перевод на которые идет через него."""
+        self.settings["pivot"] = {"language": language, "targets": list(targets)}
+        self.save_settings()
+
+    def get_catalog_settings(self):
+        """Возвращает настройки дискового каталога моделей провайдеров."""
+        catalog = self.settings.get("catalog", {})
+        return {
+            "ttl_hours": float(catalog.get("ttl_hours", 24)),
+            "timeout": float(catalog.get("timeout", 10)),
+            "path": os.path.join(
+                os.path.dirname(self.settings_file), "model_catalog.json"
+            ),
+        }
+
+    def get_deadlines(self, provider=None, model_name=None):
+        """
+        Возвращает сроки ответа модели (0 - без ограничения) и резервные модели.
+
+        Общие настройки из раздела deadlines дополняются настройками модели.
+        """
+        deadlines = dict(self.settings.get("deadlines", {}))
+        model_conf = next(
+            (
+                m
+                for m in self.settings.get("models", {}).get("available", [])
+                if m["provider"] == provider and m["model_name"] == model_name
+            ),
+            None,
+        )
+        if model_conf:
+            deadlines.update(model_conf.get("deadlines") or {})
+
+        fallback_models = []
+        for conf in deadlines.get("fallback_models", []):
+            if conf["provider"] == provider and conf["model_name"] == model_name:
+                continue
+            model_info = self.get_model_info(conf["provider"], conf["model_name"])
+            if model_info:
+                fallback_models.append(model_info)
+        return {
+            "first_token_seconds": float(deadlines.get("first_token_seconds", 30)),
+            "total_seconds": float(deadlines.get("total_seconds", 300)),
+            "fallback_models": fallback_models,
+        }
+
+    def set_model_deadlines(
+        self,
+        provider,
+        model_name,
+        first_token_seconds=None,
+        total_seconds=None,
+        fallback_models=None,
+    ):
+        """Задает сроки ответа и резервные модели для отдельной модели."""
+        for model in self.settings.get("models", {}).get("available", []):
+            if model["provider"] == provider and model["model_name"] == model_name:
+                deadlines = model.setdefault("deadlines", {})
+                if first_token_seconds is not None:
+                    deadlines["first_token_seconds"] = first_token_seconds
+                if total_seconds is not None:
+                    deadlines["total_seconds"] = total_seconds
+                if fallback_models is not None:
+                    deadlines["fallback_models"] = [
+                        {"provider": m["provider"], "model_name": m["model_name"]}
+                        for m in fallback_models
+                    ]
+                self.save_settings()
+                break
+
+    def get_hedging_settings(self):
+        """
+        Возвращает настройки дублирования запросов (hedging).
+
+        model - конфигурация второй модели или None, если она не выбрана
+        или удалена из списка моделей.
+        """
+        hedging = self.settings.get("hedging", {})
+        conf = hedging.get("model")
+        model_info = None
+        if conf:
+            model_info = self.get_model_info(conf["provider"], conf["model_name"])
+        return {
+            "enabled": bool(hedging.get("enabled", False)),
+            "delay_seconds": float(hedging.get("delay_seconds", 1.0)),
+            "model": model_info,
+        }
+
+    def set_hedging_settings(
+        self, enabled, delay_seconds=None, provider=None, model_name=None
+    ):
+        """Включает дублирование запросов и задает задержку и вторую модель."""
+        hedging = self.settings.setdefault("hedging", {})
+        hedging["enabled"] = enabled
+        if delay_seconds is not None:
+            hedging["delay_seconds"] = delay_seconds
+        if provider and model_name:
+            hedging["model"] = {"provider": provider, "model_name": model_name}
+        self.save_settings()
+
     def get_prompts(self):
         """Возвращает список доступных промптов и текущий промпт."""
         return (
@@ -0,0 +1,45 @@
+import pytest
+from unittest.mock import Mock
+from settings_manager import SettingsManager
+
+
+@pytest.fixture
+def llm_settings():
+    """
+    Заглушка SettingsManager со всеми настройками, которые читает LLMApi.
+
+    Значения совпадают с настройками по умолчанию, кроме выключенных
+    посредника, уровней моделей и сроков ответа; тесты переопределяют
+    нужные return_value.
+    """
+    settings = Mock(spec=SettingsManager)
+    settings.get_prompt_info.return_value = {"name": "p", "text": "prompt"}
+    settings.get_rate_limit.return_value = {
+        "requests_per_minute": 0,
+        "tokens_per_minute": 0
+    }
+    settings.get_chunking_settings.return_value = {
+        "enabled": True,
+        "max_chunk_tokens": 1500,
+        "concurrency": 4,
+        "max_concurrency": 16
+    }
+    settings.get_batching_settings.return_value = {
+        "max_batch_tokens": 2000,
+        "max_batch_items": 50
+    }
+    settings.get_fanout_settings.return_value = {"enabled": False, "concurrency": 4}
+    settings.get_cache_settings.return_value = {"segment_mode": "off"}
+    settings.get_tiering_settings.return_value = {"enabled": False}
+    settings.get_pivot_settings.return_value = {"language": None, "targets": []}
+    settings.get_hedging_settings.return_value = {
+        "enabled": False,
+        "delay_seconds": 1.0,
+        "model": None
+    }
+    settings.get_deadlines.return_value = {
+        "first_token_seconds": 0,
+        "total_seconds": 0,
+        "fallback_models": []
+    }
+    return settings
@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from providers.concurrency_limiter import AdaptiveConcurrencyLimiter, is_overload
+from providers.resilience import ProviderHTTPError
+
+
+class TestAdaptiveConcurrencyLimiter:
+    """тесты для адаптивного лимита параллельных запросов"""
+
+    def test_is_overload_follows_cause(self):
+        """тест распознавания перегрузки через цепочку причин"""
+        try:
+            try:
+                raise ProviderHTTPError("rate", 429)
+            except ProviderHTTPError as e:
+                raise Exception("Ошибка перевода") from e
+        except Exception as wrapped:
+            assert is_overload(wrapped)
+        assert not is_overload(ProviderHTTPError("auth", 401))
+        assert not is_overload(None)
+
+    @pytest.mark.asyncio
+    async def test_additive_increase_when_saturated(self):
+        """тест роста лимита при полной загрузке без ошибок"""
+        limiter = AdaptiveConcurrencyLimiter("test", initial=2, max_limit=8)
+        for _ in range(4):
+            await limiter.acquire()
+            await limiter.acquire()
+            limiter.release(0.1)
+            limiter.release(0.1)
+        assert limiter.limit > 2
+        assert limiter.get_history()[0][1:] == (2, 3, "healthy")
+
+    @pytest.mark.asyncio
+    async def test_no_increase_when_idle(self):
+        """тест что лимит не растет без нагрузки"""
+        limiter = AdaptiveConcurrencyLimiter("test", initial=4)
+        for _ in range(20):
+            await limiter.acquire()
+            limiter.release(0.1)
+        assert int(limiter.limit) == 4
+
+    @pytest.mark.asyncio
+    async def test_multiplicative_decrease_on_overload(self):
+        """тест снижения лимита при 429 с учетом паузы между снижениями"""
+        limiter = AdaptiveConcurrencyLimiter("test", initial=8, cooldown=60)
+        for _ in range(2):
+            await limiter.acquire()
+        limiter.release(0.1, error=ProviderHTTPError("rate", 429))
+        limiter.release(0.1, error=ProviderHTTPError("rate", 429))
+        assert int(limiter.limit) == 4
+
+    @pytest.mark.asyncio
+    async def test_decrease_on_latency_spike(self):
+        """тест снижения лимита при всплеске задержки"""
+        limiter = AdaptiveConcurrencyLimiter("test", initial=8)
+        await limiter.acquire()
+        limiter.release(0.1, cost=10)
+        await limiter.acquire()
+        limiter.release(1.0, cost=10)
+        assert int(limiter.limit) == 4
+        assert limiter.get_history()[-1][3].startswith("latency")
+
+    @pytest.mark.asyncio
+    async def test_waiters_respect_limit(self):
+        """тест что одновременно выполняется не больше limit запросов"""
+        limiter = AdaptiveConcurrencyLimiter("test", initial=2, max_limit=2)
+        running = 0
+        peak = 0
+
+        async def job():
+            nonlocal running, peak
+            async with limiter.slot():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(job() for _ in range(6)))
+        assert peak == 2
+        assert limiter.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_slot_marked_overloaded(self):
+        """тест снижения лимита после успешного повтора 429"""
+        limiter = AdaptiveConcurrencyLimiter("test", initial=4)
+        async with limiter.slot() as slot:
+            slot.mark_overloaded()
+        assert int(limiter.limit) == 2
+        assert limiter.in_flight == 0
@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from providers.connection_pool import ConnectionPool
+
+
+class TestConnectionPool:
+    """тесты для пула HTTP-сессий"""
+
+    @pytest.mark.asyncio
+    async def test_same_host_reuses_session(self):
+        """тест что для одного хоста возвращается одна сессия"""
+        pool = ConnectionPool()
+        first = pool.get_session("https://api.test.com/v1/chat/completions")
+        second = pool.get_session("https://api.test.com/v1/models")
+        assert first is second
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_different_hosts_get_different_sessions(self):
+        """тест что разные хосты получают разные сессии"""
+        pool = ConnectionPool()
+        first = pool.get_session("https://api.one.com/v1")
+        second = pool.get_session("https://api.two.com/v1")
+        assert first is not second
+        assert len(pool.get_stats()["hosts"]) == 2
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_close_recreates_session(self):
+        """тест что после закрытия создается новая сессия"""
+        pool = ConnectionPool()
+        session = pool.get_session("https://api.test.com")
+        await pool.close()
+        assert session.closed
+        assert pool.get_session("https://api.test.com") is not session
+        await pool.close()
+
+    def test_stats_initial(self):
+        """тест начальной статистики пула"""
+        stats = ConnectionPool().get_stats()
+        assert stats["new_connections"] == 0
+        assert stats["reused_connections"] == 0
+        assert stats["avg_handshake_time"] == 0.0
+
+    def test_session_of_other_loop_closed_on_its_loop(self):
+        """тест что сессия другого цикла событий закрывается в нем же"""
+        pool = ConnectionPool()
+
+        async def get_session():
+            return pool.get_session("https://api.test.com")
+
+        first_loop = asyncio.new_event_loop()
+        second_loop = asyncio.new_event_loop()
+        try:
+            first = first_loop.run_until_complete(get_session())
+            second = second_loop.run_until_complete(get_session())
+            assert second is not first
+            assert not first.closed
+
+            first_loop.run_until_complete(asyncio.sleep(0))
+            assert first.closed
+            second_loop.run_until_complete(pool.close())
+        finally:
+            first_loop.close()
+            second_loop.close()
+
+    def test_session_of_closed_loop_closed_on_replace(self):
+        """тест что сессия закрытого цикла событий закрывается при замене"""
+        pool = ConnectionPool()
+
+        async def get_session():
+            return pool.get_session("https://api.test.com")
+
+        first_loop = asyncio.new_event_loop()
+        first = first_loop.run_until_complete(get_session())
+        first_loop.close()
+
+        async def replace():
+            session = await get_session()
+            await pool.close()
+            return session
+
+        second = asyncio.run(replace())
+        assert second is not first
+        assert first.closed
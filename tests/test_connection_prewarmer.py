@@ -0,0 +1,54 @@
+import pytest
+from unittest.mock import Mock, AsyncMock, patch
+from connection_prewarmer import ConnectionPrewarmer
+from settings_manager import SettingsManager
+
+
+class TestConnectionPrewarmer:
+    """тесты для прогрева соединений"""
+
+    def setup_method(self):
+        """настройка мок-объектов"""
+        self.mock_settings = Mock(spec=SettingsManager)
+        self.mock_settings.get_network_settings.return_value = {
+            "prewarm_on_start": True,
+            "prewarm_on_hotkey": True,
+            "prewarm_recent_models": 2,
+            "keepalive_refresh_interval": 60,
+        }
+        self.current = {
+            "provider": "OpenRouter",
+            "api_endpoint": "https://openrouter.ai/api/v1/chat/completions",
+        }
+
+    def test_targets_deduplicated_by_host(self):
+        """тест что эндпоинты одного хоста прогреваются один раз"""
+        self.mock_settings.get_recent_models.return_value = [
+            {"api_endpoint": "https://openrouter.ai/api/v1/chat/completions"},
+            {"api_endpoint": "https://api.cerebras.ai/v1/chat/completions"},
+        ]
+        prewarmer = ConnectionPrewarmer(self.mock_settings)
+        targets = prewarmer.get_targets(self.current)
+        assert targets == [
+            "https://openrouter.ai/api/v1/chat/completions",
+            "https://api.cerebras.ai/v1/chat/completions",
+        ]
+        self.mock_settings.get_recent_models.assert_called_once_with(2)
+
+    def test_targets_skip_empty_endpoint(self):
+        """тест что модели без эндпоинта (Google) пропускаются"""
+        self.mock_settings.get_recent_models.return_value = []
+        prewarmer = ConnectionPrewarmer(self.mock_settings)
+        assert prewarmer.get_targets({"provider": "Google", "api_endpoint": ""}) == []
+
+    @pytest.mark.asyncio
+    async def test_prewarm_counts_warmed_hosts(self):
+        """тест подсчета прогретых хостов"""
+        self.mock_settings.get_recent_models.return_value = []
+        prewarmer = ConnectionPrewarmer(self.mock_settings)
+        with patch(
+            "connection_prewarmer.BaseProvider.connection_pool.prewarm",
+            new=AsyncMock(return_value=True),
+        ) as mock_prewarm:
+            assert await prewarmer.prewarm(self.current) == 1
+            mock_prewarm.assert_awaited_once()
@@ -0,0 +1,100 @@
+import asyncio
+import time
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock
+from providers.google_provider import GoogleProvider
+
+
+def make_chunk(text, finish_reason=None, usage=None):
+    return SimpleNamespace(
+        text=text,
+        usage_metadata=usage,
+        candidates=[SimpleNamespace(finish_reason=finish_reason)],
+    )
+
+
+class TestGoogleProvider:
+    """тесты для провайдера Google AI"""
+
+    def make_provider(self, key="key-1"):
+        return GoogleProvider(
+            {"provider": "Google", "model_name": "gemini-pro", "access_token": key}
+        )
+
+    def test_per_instance_clients(self):
+        """тест отдельных клиентов для моделей с разными ключами"""
+        first = self.make_provider("key-1")
+        second = self.make_provider("key-2")
+        assert first.model._client is not second.model._client
+        assert first._client_options == {"api_key": "key-1"}
+        assert second._client_options == {"api_key": "key-2"}
+
+    @pytest.mark.asyncio
+    async def test_streaming_does_not_block_loop(self):
+        """тест что чтение медленного потока не блокирует цикл событий"""
+
+        def slow_stream(prompt, stream=False):
+            for word in ["Hello ", "world"]:
+                time.sleep(0.05)
+                yield make_chunk(word)
+
+        provider = self.make_provider()
+        provider.model = Mock()
+        provider.model.generate_content.side_effect = slow_stream
+        ticks = 0
+        deltas = []
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        async def callback(delta):
+            deltas.append(delta)
+
+        task = asyncio.create_task(ticker())
+        try:
+            result = await provider.translate(
+                [{"role": "user", "content": "Привет"}], "English", callback
+            )
+        finally:
+            task.cancel()
+
+        assert result == "Hello world"
+        assert deltas == ["Hello ", "world"]
+        # Цикл продолжал работать, пока поток ждал чанки
+        assert ticks >= 5
+
+    @pytest.mark.asyncio
+    async def test_streaming_error_propagates(self):
+        """тест проброса ошибки из рабочего потока"""
+
+        def failing_stream(prompt, stream=False):
+            yield make_chunk("partial")
+            raise RuntimeError("quota")
+
+        provider = self.make_provider()
+        provider.model = Mock()
+        provider.model.generate_content.side_effect = failing_stream
+
+        async def callback(delta):
+            pass
+
+        with pytest.raises(RuntimeError, match="quota"):
+            await provider.translate(
+                [{"role": "user", "content": "Привет"}], "English", callback
+            )
+
+    def test_falls_back_to_configure_without_private_client(self):
+        """тест работы с версией SDK без приватного атрибута клиента"""
+        from unittest.mock import patch
+
+        model = SimpleNamespace()
+        with patch("providers.google_provider.genai") as genai:
+            genai.GenerativeModel.return_value = model
+            provider = self.make_provider("key-3")
+        genai.configure.assert_called_once_with(api_key="key-3")
+        assert provider.model is model
+        assert not hasattr(model, "_client")
@@ -0,0 +1,39 @@
+from providers.json_stream import JSONStreamParser
+
+
+def feed_all(parser, pieces):
+    items = []
+    for piece in pieces:
+        items.extend(parser.feed(piece))
+    return items
+
+
+class TestJSONStreamParser:
+    """тесты для инкрементального разбора JSON"""
+
+    def test_elements_emitted_as_they_close(self):
+        """тест что элемент массива отдается сразу после закрытия"""
+        parser = JSONStreamParser()
+        assert parser.feed('```json\n["При') == []
+        assert parser.feed('вет", "Ми') == [(0, "Привет")]
+        assert parser.feed('р"]\n```') == [(1, "Мир")]
+        assert parser.done
+
+    def test_escapes_and_nesting_split_across_deltas(self):
+        """тест экранирования и вложенных структур на границах дельт"""
+        text = '[ "a, \\"b\\" ]\\\\", {"k": [1, "]"]}, 3 ]'
+        pieces = [text[i : i + 1] for i in range(len(text))]
+        items = feed_all(JSONStreamParser(), pieces)
+        assert items == [(0, 'a, "b" ]\\'), (1, {"k": [1, "]"]}), (2, 3)]
+
+    def test_object_fields(self):
+        """тест отдачи полей объекта верхнего уровня"""
+        items = feed_all(JSONStreamParser(), ['{"1": "one", ', '"2": ["t", "w"]}'])
+        assert items == [("1", "one"), ("2", ["t", "w"])]
+
+    def test_malformed_element_keeps_indexes(self):
+        """тест что битый элемент пропускается без сдвига индексов"""
+        parser = JSONStreamParser()
+        items = feed_all(parser, ['["ok", oops, "next"]'])
+        assert items == [(0, "ok"), (2, "next")]
+        assert parser.errors == 1
@@ -0,0 +1,100 @@
+import pytest
+import csv
+import os
+import shutil
+import tempfile
+from unittest.mock import AsyncMock, patch
+from latency_stats import LatencyStats, error_class, format_summary, percentile
+from llm_api import LLMApi
+from providers.resilience import DeadlineExceededError, ProviderHTTPError
+
+
+class TestLatencyStats:
+    """тесты для статистики задержек моделей"""
+
+    def setup_method(self):
+        """создание временной базы"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "latency.db")
+
+    def teardown_method(self):
+        """очистка временной директории"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_percentile_nearest_rank(self):
+        """тест перцентилей по ближайшему рангу"""
+        values = [float(v) for v in range(1, 101)]
+        assert percentile(values, 0.5) == 50
+        assert percentile(values, 0.95) == 95
+        assert percentile([3.0], 0.95) == 3.0
+        assert percentile([], 0.5) is None
+
+    def test_error_class(self):
+        """тест классификации ошибок"""
+        try:
+            raise Exception("Ошибка перевода") from ProviderHTTPError("rate", 429)
+        except Exception as e:
+            assert error_class(e) == "http_429"
+        assert error_class(DeadlineExceededError("m", "first_token", 5)) == "deadline_first_token"
+        assert error_class(ValueError("x")) == "ValueError"
+        assert error_class(None) is None
+
+    def test_summary_and_window(self):
+        """тест сводки по последним замерам и доли ошибок"""
+        stats = LatencyStats(self.db_path, window=4)
+        stats.record("OpenAI", "gpt-4o", 100.0)  # вытесняется окном
+        for total in (1.0, 2.0, 3.0):
+            stats.record("OpenAI", "gpt-4o", total, ttft=0.5, output_tokens=10)
+        stats.record("OpenAI", "gpt-4o", 5.0, error="http_500")
+
+        summary = stats.get_summary("OpenAI", "gpt-4o")
+        assert summary["count"] == 4
+        assert summary["error_rate"] == 0.25
+        assert summary["total_p50"] == 2.0
+        assert summary["total_p95"] == 3.0
+        assert summary["ttft_p50"] == 0.5
+        assert summary["tokens_per_sec"] == pytest.approx(10 / 1.5)
+        assert format_summary(summary).startswith("2.0 / 3.0 с")
+        assert stats.get_summary("OpenAI", "other")["count"] == 0
+        stats.close()
+
+    def test_export_csv(self):
+        """тест выгрузки замеров в CSV"""
+        stats = LatencyStats(self.db_path)
+        stats.record("Google", "gemini", 1.5, ttft=0.2, input_tokens=40, output_tokens=30)
+        path = os.path.join(self.temp_dir, "stats.csv")
+        assert stats.export_csv(path) == 1
+        stats.close()
+        with open(path, encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert rows[0]["model"] == "gemini"
+        assert rows[0]["input_tokens"] == "40"
+
+    @pytest.mark.asyncio
+    async def test_llm_api_records_requests(self, llm_settings):
+        """тест записи замеров успешных и неудачных переводов"""
+        async def fake_translate(messages, target_lang, callback=None):
+            if messages[-1]["content"] == "сбой":
+                raise ValueError("broken")
+            await callback("Hello")
+            return "Hello"
+
+        mock_provider = AsyncMock()
+        mock_provider.translate.side_effect = fake_translate
+        stats = LatencyStats(self.db_path)
+        model_info = {"name": "m", "provider": "OpenAI", "model_name": "stats-test"}
+
+        async def callback(delta):
+            pass
+
+        with patch("llm_api.LLMProviderFactory.get_provider", return_value=mock_provider):
+            api = LLMApi(model_info, llm_settings, stats=stats)
+            await api.translate("Привет", "English", callback)
+            with pytest.raises(Exception):
+                await api.translate("сбой", "English", callback)
+
+        summary = stats.get_summary("OpenAI", "stats-test")
+        assert summary["count"] == 2
+        assert summary["errors"] == 1
+        assert summary["ttft_p50"] is not None
+        stats.close()
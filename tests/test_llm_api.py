@@ -1,18 +1,17 @@
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
 from llm_api import LLMApi
-from settings_manager import SettingsManager
 
 
 class TestLLMApi:
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def setup(self, llm_settings):
         """настройка для каждого теста"""
-        self.mock_settings = Mock(spec=SettingsManager)
+        self.mock_settings = llm_settings
         self.mock_settings.get_prompt_info.return_value = {
             "name": "Базовый",
             "text": "Переведи текст"
         }
-        
         self.model_info = {
             "name": "test_model",
             "provider": "OpenAI",
@@ -76,4 +75,936 @@ class TestLLMApi:
             api = LLMApi(self.model_info, self.mock_settings)
             
             with pytest.raises(Exception, match="Ошибка перевода"):
-                await api.translate("Привет мир", "English") 
\ No newline at end of file
+                await api.translate("Привет мир", "English")
+
+    @pytest.mark.asyncio
+    async def test_translate_records_usage_and_finish_reason(self):
+        """тест сохранения расхода токенов и причины завершения"""
+        from providers.stream_events import FinishEvent, UsageEvent, report_event
+
+        async def fake_translate(messages, target_lang, callback=None):
+            await callback("Hello ")
+            await callback("world")
+            await report_event(UsageEvent(12, 3))
+            await report_event(FinishEvent("stop"))
+            return "Hello world"
+
+        mock_provider = AsyncMock()
+        mock_provider.translate.side_effect = fake_translate
+        deltas = []
+
+        async def callback(delta):
+            deltas.append(delta)
+
+        with patch('llm_api.LLMProviderFactory.get_provider', return_value=mock_provider):
+            api = LLMApi(self.model_info, self.mock_settings)
+            result = await api.translate("Привет мир", "English", callback)
+
+        assert result == "Hello world"
+        assert deltas == ["Hello ", "world"]
+        assert api.last_dispatch["usage"] == {"input_tokens": 12, "output_tokens": 3}
+        assert api.last_dispatch["finish_reason"] == "stop" 
+
+    @pytest.mark.asyncio
+    async def test_retry_after_429_goes_through_rate_limiter(self):
+        """тест что повтор после 429 снова получает токен у ограничителя частоты"""
+        from providers.resilience import ProviderHTTPError
+
+        attempts = []
+
+        async def fake_translate(messages, target_lang, callback=None):
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ProviderHTTPError("rate", 429, retry_after=0)
+            return "Hello"
+
+        mock_provider = AsyncMock()
+        mock_provider.translate.side_effect = fake_translate
+        limiter = Mock()
+        limiter.acquire = AsyncMock(return_value=0.0)
+
+        with patch('llm_api.LLMProviderFactory.get_provider', return_value=mock_provider), \
+                patch('llm_api.get_rate_limiter', return_value=limiter):
+            api = LLMApi(self.model_info, self.mock_settings)
+            assert await api.translate("Привет мир", "English") == "Hello"
+
+        assert len(attempts) == 2
+        assert limiter.acquire.await_count == 2
+    @pytest.mark.asyncio
+    async def test_concurrent_translations_keep_own_dispatch(self):
+        """тест что параллельные переводы не перезаписывают сведения друг друга"""
+        import asyncio
+
+        release = asyncio.Event()
+
+        async def fake_translate(messages, target_lang, callback=None):
+            await release.wait()
+            return "Hello"
+
+        mock_provider = AsyncMock()
+        mock_provider.translate.side_effect = fake_translate
+        cache = DictCache()
+
+        with patch('llm_api.LLMProviderFactory.get_provider', return_value=mock_provider):
+            api = LLMApi(self.model_info, self.mock_settings, cache)
+        cache.put("Пока", "English", api._system_prompt, api.model_key, "Bye")
+
+        async def run(text):
+            result = await api.translate(text, "English")
+            return result, api.last_dispatch
+
+        slow = asyncio.create_task(run("Привет мир"))
+        await asyncio.sleep(0)
+        fast = await run("Пока")
+        release.set()
+
+        assert fast == ("Bye", {"model": "test_model", "cached": True})
+        result, dispatch = await slow
+        assert result == "Hello"
+        assert dispatch["cached"] is False
+        assert dispatch["served_by"] == "test_model"
+
+
+class TestChunkedTranslation:
+    """тесты для параллельного перевода длинных текстов"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, llm_settings):
+        """настройка для каждого теста"""
+        self.mock_settings = llm_settings
+        self.mock_settings.get_chunking_settings.return_value["max_chunk_tokens"] = 5
+        self.model_info = {"name": "m", "provider": "OpenAI", "model_name": "gpt-4o"}
+
+    @pytest.mark.asyncio
+    async def test_chunks_streamed_in_source_order(self):
+        """тест что куски выводятся по порядку, даже если второй готов раньше"""
+        import asyncio
+
+        async def fake_translate(messages, target_lang, callback=None):
+            text = messages[-1]["content"]
+            # первый кусок отвечает медленнее второго
+            await asyncio.sleep(0.05 if text.startswith("First") else 0)
+            for word in text.upper().split(" "):
+                await callback(word + " ")
+            return text.upper()
+
+        mock_provider = AsyncMock()
+        mock_provider.translate.side_effect = fake_translate
+        deltas = []
+
+        async def callback(delta):
+            deltas.append(delta)
+
+        with patch('llm_api.LLMProviderFactory.get_provider', return_value=mock_provider):
+            api = LLMApi(self.model_info, self.mock_settings)
+            result = await api.translate(
+                "First paragraph.\n\nSecond paragraph.", "English", callback
+            )
+
+        assert result == "FIRST PARAGRAPH.\n\nSECOND PARAGRAPH."
+        assert "".join(deltas) == "FIRST PARAGRAPH. \n\nSECOND PARAGRAPH. "
+        assert mock_provider.translate.call_count == 2
+        assert api.last_dispatch["chunks"] == 2
+
+    @pytest.mark.asyncio
+    async def test_chunk_failure_raises(self):
+        """тест что ошибка одного куска прерывает перевод"""
+        mock_provider = AsyncMock()
+        mock_provider.translate.side_effect = Exception("API Error")
+
+        with patch('llm_api.LLMProviderFactory.get_provider', return_value=mock_provider):
+            api = LLMApi(self.model_info, self.mock_settings)
+            with pytest.raises(Exception, match="Ошибка перевода"):
+                await api.translate("First paragraph.\n\nSecond paragraph.", "English")
+
+
+class TestRequestCoalescing:
+    """тесты для объединения одинаковых одновременных запросов"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, llm_settings):
+        """настройка для каждого теста"""
+        self.mock_settings = llm_settings
+        self.model_info = {"name": "m", "provider": "OpenAI", "model_name": "gpt-4o"}
+        self.started = None
+        self.cancelled = False
+
+    def make_provider(self):
+        import asyncio
+
+        self.started = asyncio.Event()
+
+        async def fake_translate(messages, target_lang, callback=None):
+            try:
+                for word in ["Hello ", "big ", "world"]:
+                    await callback(word)
+                    self.started.set()
+                    await asyncio.sleep(0.02)
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+            return "Hello big world"
+
+        mock_provider = AsyncMock()
+        mock_provider.translate.side_effect = fake_translate
+        return mock_provider
+
+    @pytest.mark.asyncio
+    async def test_identical_requests_share_one_stream(self):
+        """тест что второй запрос получает повтор дельт и живой хвост"""
+        import asyncio
+
+        mock_provider = self.make_provider()
+        first, second = [], []
+
+        async def collect_first(delta):
+            first.append(delta)
+
+        async def collect_second(delta):
+            second.append(delta)
+
+        with patch('llm_api.LLMProviderFactory.get_provider', return_value=mock_provider):
+            api = LLMApi(self.model_info, self.mock_settings)
+            task = asyncio.create_task(api.translate("Привет", "English", collect_first))
+            await self.started.wait()
+            result = await api.translate("Привет", "English", collect_second)
+            assert await task == result == "Hello big world"
+
+        assert mock_provider.translate.call_count == 1
+        assert "".join(first) == "".join(second) == "Hello big world"
+        assert api.last_dispatch["coalesced"] is True
+
+    @pytest.mark.asyncio
+    async def test_different_languages_not_coalesced(self):
+        """тест что запросы с разными языками выполняются отдельно"""
+        import asyncio
+
+        mock_provider = self.make_provider()
+
+        async def callback(delta):
+            pass
+
+        with patch('llm_api.LLMProviderFactory.get_provider', return_value=mock_provider):
+            api = LLMApi(self.model_info, self.mock_settings)
+            await asyncio.gather(
+                api.translate("Привет", "English", callback),
+                api.translate("Привет", "Deutsch", callback),
+            )
+
+        assert mock_provider.translate.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_stream_survives_first_subscriber_cancel(self):
+        """тест что отмена первого подписчика не обрывает общий поток"""
+        import asyncio
+
+        mock_provider = self.make_provider()
+        deltas = []
+
+        async def callback(delta):
+            deltas.append(delta)
+
+        with patch('llm_api.LLMProviderFactory.get_provider', return_value=mock_provider):
+            api = LLMApi(self.model_info, self.mock_settings)
+            task = asyncio.create_task(api.translate("Текст", "English", callback))
+            await self.started.wait()
+            task.cancel()
+            result = await api.translate("Текст", "English", callback)
+
+        assert result == "Hello big world"
+        assert mock_provider.translate.call_count == 1
+        assert not self.cancelled
+
+    @pytest.mark.asyncio
+    async def test_abandoned_stream_cancelled(self):
+        """тест отмены запроса, у которого не осталось подписчиков"""
+        import asyncio
+
+        mock_provider = self.make_provider()
+
+        async def callback(delta):
+            pass
+
+        with patch('llm_api.LLMProviderFactory.get_provider', return_value=mock_provider), \
+                patch.object(LLMApi, "FLIGHT_LINGER", 0):
+            api = LLMApi(self.model_info, self.mock_settings)
+            task = asyncio.create_task(api.translate("Отмена", "English", callback))
+            await self.started.wait()
+            task.cancel()
+            await asyncio.sleep(0.05)
+
+        assert self.cancelled
+        assert not LLMApi._flights
+
+
+class TestDeadlinesAndFallback:
+    """тесты для сроков ответа и перехода на резервные модели"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, llm_settings):
+        """настройка для каждого теста"""
+        self.mock_settings = llm_settings
+        self.model_info = {"name": "primary", "provider": "OpenAI", "model_name": "gpt-4o"}
+        self.fallback_info = {"name": "backup", "provider": "Cerebras", "model_name": "llama"}
+        self.mock_settings.get_deadlines.return_value = {
+            "first_token_seconds": 0.05,
+            "total_seconds": 5,
+            "fallback_models": [self.fallback_info]
+        }
+        self.cancelled = False
+
+    def make_providers(self, primary_translate):
+        async def backup_translate(messages, target_lang, callback=None):
+            await callback("Backup")
+            return "Backup"
+
+        primary = AsyncMock()
+        primary.translate.side_effect = primary_translate
+        backup = AsyncMock()
+        backup.translate.side_effect = backup_translate
+        return lambda info: backup if info["model_name"] == "llama" else primary
+
+    @pytest.mark.asyncio
+    async def test_first_token_deadline_falls_back(self):
+        """тест перехода на резервную модель, если первый токен не пришел в срок"""
+        import asyncio
+
+        async def hung(messages, target_lang, callback=None):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+
+        deltas = []
+
+        async def callback(delta):
+            deltas.append(delta)
+
+        with patch('llm_api.LLMProviderFactory.get_provider', side_effect=self.make_providers(hung)):
+            api = LLMApi(self.model_info, self.mock_settings)
+            result = await api.translate("Привет", "English", callback)
+
+        assert result == "Backup"
+        assert deltas == ["Backup"]
+        assert self.cancelled
+        assert api.last_dispatch["served_by"] == "backup"
+        assert api.last_dispatch["fallbacks"][0]["model"] == "primary"
+
+    @pytest.mark.asyncio
+    async def test_fallback_result_cached_under_served_model(self):
+        """тест что перевод резервной модели не кешируется под основную"""
+        async def failing(messages, target_lang, callback=None):
+            raise ValueError("primary down")
+
+        async def callback(delta):
+            pass
+
+        cache = DictCache()
+        with patch('llm_api.LLMProviderFactory.get_provider', side_effect=self.make_providers(failing)):
+            api = LLMApi(self.model_info, self.mock_settings, cache)
+            assert await api.translate("Привет", "English", callback) == "Backup"
+
+        assert [key[3] for key in cache.data] == ["Cerebras/llama"]
+        assert api._lookup_cache("Привет", "English") is None
+
+    @pytest.mark.asyncio
+    async def test_caller_cancel_not_reported_as_deadline(self):
+        """тест что отмена перевода вызывающим кодом не превращается в ошибку срока"""
+        import asyncio
+
+        async def hung(messages, target_lang, callback=None):
+            await asyncio.sleep(10)
+
+        self.mock_settings.get_deadlines.return_value = {
+            "first_token_seconds": 5,
+            "total_seconds": 5,
+            "fallback_models": []
+        }
+        with patch('llm_api.LLMProviderFactory.get_provider', side_effect=self.make_providers(hung)):
+            api = LLMApi(self.model_info, self.mock_settings)
+            task = asyncio.create_task(api.translate("Привет", "English"))
+            await asyncio.sleep(0.02)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    @pytest.mark.asyncio
+    async def test_no_fallback_after_first_token(self):
+        """тест что после первого токена ошибка не переводит запрос на другую модель"""
+        async def broken(messages, target_lang, callback=None):
+            await callback("Hel")
+            raise ValueError("connection reset")
+
+        async def callback(delta):
+            pass
+
+        with patch('llm_api.LLMProviderFactory.get_provider', side_effect=self.make_providers(broken)):
+            api = LLMApi(self.model_info, self.mock_settings)
+            with pytest.raises(Exception, match="connection reset"):
+                await api.translate("Привет", "English", callback)
+        assert "fallbacks" not in api.last_dispatch
+
+    @pytest.mark.asyncio
+    async def test_total_deadline_without_fallback(self):
+        """тест ошибки по общему сроку ответа, если резервных моделей нет"""
+        import asyncio
+        from providers.resilience import DeadlineExceededError
+
+        async def slow(messages, target_lang, callback=None):
+            await asyncio.sleep(10)
+
+        self.mock_settings.get_deadlines.return_value = {
+            "first_token_seconds": 0,
+            "total_seconds": 0.05,
+            "fallback_models": []
+        }
+        with patch('llm_api.LLMProviderFactory.get_provider', side_effect=self.make_providers(slow)):
+            api = LLMApi(self.model_info, self.mock_settings)
+            with pytest.raises(DeadlineExceededError, match="ответа от primary"):
+                await api.translate("Привет", "English")
+
+
+    @pytest.mark.asyncio
+    async def test_deadline_lowers_concurrency_limit(self):
+        """тест что истекший срок снижает адаптивный лимит параллельных запросов"""
+        import asyncio
+        from providers.concurrency_limiter import AdaptiveConcurrencyLimiter
+        from providers.resilience import DeadlineExceededError
+
+        async def slow(messages, target_lang, callback=None):
+            await asyncio.sleep(10)
+
+        self.mock_settings.get_deadlines.return_value = {
+            "first_token_seconds": 0,
+            "total_seconds": 0.05,
+            "fallback_models": []
+        }
+        limiter = AdaptiveConcurrencyLimiter("OpenAI", initial=4, cooldown=0)
+        with patch('llm_api.LLMProviderFactory.get_provider', side_effect=self.make_providers(slow)), \
+                patch('llm_api.get_concurrency_limiter', return_value=limiter):
+            api = LLMApi(self.model_info, self.mock_settings)
+            with pytest.raises(DeadlineExceededError):
+                await api.translate("Привет", "English")
+
+        assert limiter.in_flight == 0
+        assert limiter.limit == 2
+
+class TestTruncatedResponses:
+    """тесты ответов, обрезанных лимитом токенов"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, llm_settings):
+        """настройка для каждого теста"""
+        self.mock_settings = llm_settings
+        self.model_info = {"name": "m", "provider": "Anthropic", "model_name": "claude"}
+        self.budgets = []
+
+    def make_provider(self, ceiling_truncates=False):
+        from providers.stream_events import FinishEvent, report_event
+        from token_estimator import DEFAULT_MAX_OUTPUT, output_budget
+
+        async def fake_translate(messages, target_lang, callback=None):
+            budget = output_budget(messages[-1]["content"], target_lang, "anthropic")
+            self.budgets.append(budget)
+            full = budget == DEFAULT_MAX_OUTPUT
+            text = "Hello wor" if not full or ceiling_truncates else "Hello world"
+            if callback:
+                await callback(text[:6])
+                await callback(text[6:])
+            await report_event(FinishEvent("stop" if full and not ceiling_truncates else "max_tokens"))
+            return text
+
+        provider = AsyncMock()
+        provider.translate.side_effect = fake_translate
+        return provider
+
+    @pytest.mark.asyncio
+    async def test_truncated_response_retried_with_full_budget(self):
+        """тест повтора обрезанного ответа с полным лимитом без повтора вывода"""
+        from token_estimator import DEFAULT_MAX_OUTPUT
+
+        cache = DictCache()
+        deltas = []
+
+        async def callback(delta):
+            deltas.append(delta)
+
+        with patch('llm_api.LLMProviderFactory.get_provider', return_value=self.make_provider()):
+            api = LLMApi(self.model_info, self.mock_settings, cache)
+            result = await api.translate("Привет мир", "English", callback)
+
+        assert result == "Hello world"
+        assert "".join(deltas) == "Hello world"
+        assert self.budgets[0] < DEFAULT_MAX_OUTPUT
+        assert self.budgets[1] == DEFAULT_MAX_OUTPUT
+        assert list(cache.data.values()) == ["Hello world"]
+
+    @pytest.mark.asyncio
+    async def test_truncated_response_not_cached(self):
+        """тест что ответ, обрезанный и с полным лимитом, не кешируется"""
+        cache = DictCache()
+        provider = self.make_provider(ceiling_truncates=True)
+        with patch('llm_api.LLMProviderFactory.get_provider', return_value=provider):
+            api = LLMApi(self.model_info, self.mock_settings, cache)
+            assert await api.translate("Привет мир", "English") == "Hello wor"
+
+        assert len(self.budgets) == 2
+        assert api.last_dispatch["truncated"] is True
+        assert cache.data == {}
+
+
+class TestHedgedRequests:
+    """тесты для дублирования запроса на вторую модель"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, llm_settings):
+        """настройка для каждого теста"""
+        self.mock_settings = llm_settings
+        self.model_info = {"name": "primary", "provider": "OpenAI", "model_name": "hedge-test"}
+        self.hedge_info = {"name": "fast", "provider": "Cerebras", "model_name": "llama"}
+        self.mock_settings.get_hedging_settings.return_value = {
+            "enabled": True,
+            "delay_seconds": 0.02,
+            "model": self.hedge_info
+        }
+        self.cancelled = []
+
+    def make_provider(self, name, first_delay):
+        import asyncio
+
+        async def fake_translate(messages, target_lang, callback=None):
+            try:
+                await asyncio.sleep(first_delay)
+                await callback(name)
+                return name
+            except asyncio.CancelledError:
+                self.cancelled.append(name)
+                raise
+
+        provider = AsyncMock()
+        provider.translate.side_effect = fake_translate
+        return provider
+
+    async def run(self, primary_delay, hedge_delay):
+        primary = self.make_provider("primary", primary_delay)
+        hedge = self.make_provider("fast", hedge_delay)
+        deltas = []
+
+        async def callback(delta):
+            deltas.append(delta)
+
+        def get_provider(info):
+            return hedge if info["model_name"] == "llama" else primary
+
+        with patch('llm_api.LLMProviderFactory.get_provider', side_effect=get_provider):
+            api = LLMApi(self.model_info, self.mock_settings)
+            result = await api.translate(f"Текст {primary_delay}", "English", callback)
+        return api, result, deltas, hedge
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_not_hedged(self):
+        """тест что быстрая основная модель не дублируется"""
+        LLMApi._hedge_stats.clear()
+        api, result, deltas, hedge = await self.run(0, 0)
+        assert result == "primary"
+        assert hedge.translate.call_count == 0
+        assert "hedged" not in api.last_dispatch
+        assert LLMApi.get_hedge_stats()["OpenAI/hedge-test"]["hedge_rate"] == 0.0
+
+    @pytest.mark.asyncio
+    async def test_hedge_wins_and_primary_cancelled(self):
+        """тест победы второй модели и отмены основной"""
+        LLMApi._hedge_stats.clear()
+        api, result, deltas, hedge = await self.run(1.0, 0)
+        assert result == "fast"
+        assert deltas == ["fast"]
+        assert self.cancelled == ["primary"]
+        assert api.last_dispatch["hedged"] is True
+        assert api.last_dispatch["served_by"] == "fast"
+        stats = LLMApi.get_hedge_stats()["OpenAI/hedge-test"]
+        assert stats["hedge_rate"] == 1.0
+        assert stats["win_rate"] == 1.0
+
+    @pytest.mark.asyncio
+    async def test_primary_wins_after_hedge(self):
+        """тест победы основной модели, ответившей раньше второй"""
+        LLMApi._hedge_stats.clear()
+        api, result, deltas, hedge = await self.run(0.05, 1.0)
+        assert result == "primary"
+        assert deltas == ["primary"]
+        assert self.cancelled == ["fast"]
+        assert LLMApi.get_hedge_stats()["OpenAI/hedge-test"]["win_rate"] == 0.0
+
+
+class TestInputTiering:
+    """тесты для выбора модели по размеру текста"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, llm_settings):
+        """настройка для каждого теста"""
+        self.mock_settings = llm_settings
+        self.mock_settings.get_chunking_settings.return_value["max_chunk_tokens"] = 5
+        self.model_info = {"name": "main", "provider": "OpenAI", "model_name": "main"}
+        self.mock_settings.get_tiering_settings.return_value = {
+            "enabled": True,
+            "short_max_tokens": 3,
+            "short_model": {"name": "small", "provider": "Cerebras", "model_name": "small"},
+            "long_min_tokens": 40,
+            "long_model": {"name": "large", "provider": "Google", "model_name": "large"},
+        }
+        self.calls = []
+
+    def get_provider(self, info):
+        async def fake_translate(messages, target_lang, callback=None):
+            self.calls.append(info["model_name"])
+            return info["model_name"]
+
+        provider = AsyncMock()
+        provider.translate.side_effect = fake_translate
+        return provider
+
+    async def translate(self, text):
+        with patch('llm_api.LLMProviderFactory.get_provider', side_effect=self.get_provider):
+            api = LLMApi(self.model_info, self.mock_settings)
+            result = await api.translate(text, "English")
+        return api, result
+
+    @pytest.mark.asyncio
+    async def test_short_text_uses_small_model(self):
+        """тест перевода короткого текста быстрой моделью"""
+        api, result = await self.translate("Привет")
+        assert result == "small"
+        assert api.last_dispatch["tier"] == "short"
+        assert api.last_dispatch["model"] == "small"
+
+    @pytest.mark.asyncio
+    async def test_middle_text_chunked_by_current_model(self):
+        """тест что текст среднего размера делится на куски текущей моделью"""
+        api, result = await self.translate("First paragraph here.\n\nSecond paragraph here.")
+        assert self.calls == ["main", "main"]
+        assert "tier" not in api.last_dispatch
+        assert api.last_dispatch["chunks"] == 2
+
+    @pytest.mark.asyncio
+    async def test_long_text_sent_whole_to_long_context_model(self):
+        """тест отправки длинного текста целиком модели с большим контекстом"""
+        text = "\n\n".join(["Paragraph number one with several words."] * 20)
+        api, result = await self.translate(text)
+        assert self.calls == ["large"]
+        assert api.last_dispatch["tier"] == "long"
+        assert "chunks" not in api.last_dispatch
+
+
+class TestBatchTranslation:
+    """тесты пакетного перевода коротких строк"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, llm_settings):
+        """настройка для каждого теста"""
+        self.mock_settings = llm_settings
+        self.model_info = {"name": "m", "provider": "OpenAI", "model_name": "batch-model"}
+        self.requests = []
+
+    async def run(self, texts, reply):
+        async def fake_translate(messages, target_lang, callback=None):
+            self.requests.append(messages)
+            return reply(messages[-1]["content"])
+
+        provider = AsyncMock()
+        provider.translate.side_effect = fake_translate
+        results = {}
+        with patch('llm_api.LLMProviderFactory.get_provider', return_value=provider):
+            api = LLMApi(self.model_info, self.mock_settings)
+            translated = await api.translate_batch(
+                texts, "English", lambda i, t: results.__setitem__(i, t)
+            )
+        assert results == dict(enumerate(translated))
+        return api, translated
+
+    @pytest.mark.asyncio
+    async def test_strings_packed_into_one_request(self):
+        """тест что строки уходят одним запросом с одним системным промптом"""
+        import json
+
+        def reply(content):
+            return json.dumps([text.upper() for text in json.loads(content)])
+
+        api, translated = await self.run(["Открыть", "Сохранить", "Открыть", ""], reply)
+
+        assert translated == ["ОТКРЫТЬ", "СОХРАНИТЬ", "ОТКРЫТЬ", ""]
+        assert len(self.requests) == 1
+        assert self.requests[0][0]["content"].count("prompt") == 1
+        assert api.last_dispatch["batches"] == 1
+
+    @pytest.mark.asyncio
+    async def test_misaligned_response_falls_back_to_single(self):
+        """тест перевода по одной строке, если ответ не совпал по длине"""
+
+        def reply(content):
+            return '["only one"]' if content.startswith("[") else f"<{content}>"
+
+        api, translated = await self.run(["Да", "Нет", "Отмена"], reply)
+
+        assert translated == ["<Да>", "<Нет>", "<Отмена>"]
+        assert len(self.requests) == 4
+        assert api.last_dispatch["batch_fallbacks"] == 1
+
+    @pytest.mark.asyncio
+    async def test_batch_item_limit(self):
+        """тест деления строк на пакеты по ограничению числа элементов"""
+        import json
+
+        self.mock_settings.get_batching_settings.return_value = {
+            "max_batch_tokens": 2000,
+            "max_batch_items": 2
+        }
+
+        def reply(content):
+            if content.startswith("["):
+                return "```json\n" + json.dumps(json.loads(content)) + "\n```"
+            return content
+
+        api, translated = await self.run(["a", "b", "c"], reply)
+
+        assert translated == ["a", "b", "c"]
+        assert len(self.requests) == 2
+        assert api.last_dispatch["batches"] == 2
+
+    @pytest.mark.asyncio
+    async def test_items_delivered_while_streaming(self):
+        """тест выдачи перевода первой строки до конца ответа"""
+        import asyncio
+        from providers.stream_events import report_structured
+
+        seen_before_end = []
+        results = {}
+
+        async def fake_translate(messages, target_lang, callback=None):
+            for delta in ['["ONE",', ' "TWO"', "]"]:
+                await callback(delta)
+                await report_structured(delta)
+                # Пауза сети между дельтами
+                await asyncio.sleep(0.01)
+                seen_before_end.append(dict(results))
+            return '["ONE", "TWO"]'
+
+        provider = AsyncMock()
+        provider.translate.side_effect = fake_translate
+        with patch('llm_api.LLMProviderFactory.get_provider', return_value=provider):
+            api = LLMApi(self.model_info, self.mock_settings)
+            translated = await api.translate_batch(
+                ["one", "two"], "English", lambda i, t: results.__setitem__(i, t)
+            )
+
+        assert translated == ["ONE", "TWO"]
+        assert seen_before_end[0] == {0: "ONE"}
+        assert results == {0: "ONE", 1: "TWO"}
+
+
+class TestFanOut:
+    """тесты перевода одного текста сразу на несколько языков"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, llm_settings):
+        """настройка для каждого теста"""
+        self.mock_settings = llm_settings
+        self.mock_settings.get_chunking_settings.return_value["enabled"] = False
+        self.mock_settings.get_fanout_settings.return_value = {
+            "enabled": True,
+            "concurrency": 2
+        }
+        self.model_info = {"name": "m", "provider": "OpenAI", "model_name": "fanout"}
+
+    @pytest.mark.asyncio
+    async def test_concurrency_cap_and_cached_languages(self):
+        """тест общего предела параллельности и мгновенной выдачи из кеша"""
+        import asyncio
+
+        running = 0
+        peak = 0
+        finished = []
+
+        async def fake_translate(messages, target_lang, callback=None):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            if target_lang == "Español":
+                raise RuntimeError("boom")
+            await callback(target_lang.upper())
+            return target_lang.upper()
+
+        cache = Mock()
+        cache.get.side_effect = (
+            lambda text, lang, *args: "Привет" if lang == "Русский" else None
+        )
+        provider = AsyncMock()
+        provider.translate.side_effect = fake_translate
+        deltas = {}
+
+        async def on_delta(lang, delta):
+            deltas.setdefault(lang, []).append(delta)
+
+        languages = ["English", "Deutsch", "Français", "Español", "Русский"]
+        with patch('llm_api.LLMProviderFactory.get_provider', return_value=provider):
+            api = LLMApi(self.model_info, self.mock_settings, cache)
+            results = await api.translate_many(
+                "Привет", languages, on_delta, lambda lang, _: finished.append(lang)
+            )
+
+        assert list(results) == languages
+        assert results["English"] == "ENGLISH"
+        assert isinstance(results["Español"], Exception)
+        assert deltas["Русский"] == ["Привет"]
+        # Кешированный язык не ждет своей очереди
+        assert finished[0] == "Русский"
+        assert peak == 2
+        assert api.last_dispatch["fanout"] == {"languages": 5, "cached": 1, "failed": 1}
+
+
+class DictCache:
+    """кеш переводов в памяти с интерфейсом TranslationCache"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, text, target_lang, prompt, model_key):
+        return self.data.get((text, target_lang, prompt, model_key))
+
+    def put(self, text, target_lang, prompt, model_key, translation):
+        self.data[(text, target_lang, prompt, model_key)] = translation
+
+
+class TestPivotPipeline:
+    """тесты перевода на редкие языки через язык-посредник"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, llm_settings):
+        """настройка для каждого теста"""
+        self.mock_settings = llm_settings
+        self.mock_settings.get_chunking_settings.return_value["enabled"] = False
+        self.mock_settings.get_fanout_settings.return_value = {
+            "enabled": True,
+            "concurrency": 4
+        }
+        self.mock_settings.get_pivot_settings.return_value = {
+            "language": "Английский",
+            "targets": ["Эсперанто", "Синдарин", "Кхуздул"]
+        }
+        self.model_info = {"name": "m", "provider": "OpenAI", "model_name": "pivot"}
+        self.calls = []
+
+    async def fake_translate(self, messages, target_lang, callback=None):
+        import asyncio
+
+        source = messages[-1]["content"]
+        # Язык запроса передается в системном сообщении
+        lang = messages[0]["content"].split(".")[0].split(": ")[1]
+        self.calls.append((source, lang))
+        await asyncio.sleep(0.01)
+        return f"{lang}({source})"
+
+    def make_api(self, cache=None):
+        provider = AsyncMock()
+        provider.translate.side_effect = self.fake_translate
+        patcher = patch('llm_api.LLMProviderFactory.get_provider', return_value=provider)
+        patcher.start()
+        try:
+            return LLMApi(self.model_info, self.mock_settings, cache)
+        finally:
+            patcher.stop()
+
+    @pytest.mark.asyncio
+    async def test_rare_target_goes_through_pivot(self):
+        """тест перевода на редкий язык через английский"""
+        api = self.make_api()
+        result = await api.translate("Привет", "Эсперанто")
+
+        assert result == "Эсперанто(Английский(Привет))"
+        assert self.calls == [
+            ("Привет", "Английский"),
+            ("Английский(Привет)", "Эсперанто"),
+        ]
+        assert api.last_dispatch["pivot"] == {"language": "Английский", "cached": False}
+
+        # Обычные языки переводятся напрямую
+        self.calls.clear()
+        assert await api.translate("Привет", "Немецкий") == "Немецкий(Привет)"
+        assert self.calls == [("Привет", "Немецкий")]
+
+    @pytest.mark.asyncio
+    async def test_pivot_dispatch_describes_target_leg(self):
+        """тест что сведения о переводе не смешивают посредника и целевой язык"""
+        cache = DictCache()
+        api = self.make_api(cache)
+        cache.put(
+            "Привет", "Английский", api._system_prompt, api.model_key, "Hello"
+        )
+
+        assert await api.translate("Привет", "Эсперанто") == "Эсперанто(Hello)"
+        assert self.calls == [("Hello", "Эсперанто")]
+        assert api.last_dispatch["cached"] is False
+        assert api.last_dispatch["served_by"] == "m"
+        assert api.last_dispatch["pivot"] == {"language": "Английский", "cached": True}
+
+    @pytest.mark.asyncio
+    async def test_fanout_reuses_pivot(self):
+        """тест что посредник переводится один раз и берется из кеша повторно"""
+        api = self.make_api(DictCache())
+        results = await api.translate_many(
+            "Привет", ["Эсперанто", "Синдарин", "Английский"]
+        )
+
+        assert results["Синдарин"] == "Синдарин(Английский(Привет))"
+        assert sorted(self.calls) == sorted([
+            ("Привет", "Английский"),
+            ("Английский(Привет)", "Эсперанто"),
+            ("Английский(Привет)", "Синдарин"),
+        ])
+
+        self.calls.clear()
+        results = await api.translate_many("Привет", ["Эсперанто", "Кхуздул"])
+        assert results["Кхуздул"] == "Кхуздул(Английский(Привет))"
+        assert self.calls == [("Английский(Привет)", "Кхуздул")]
+        assert api.last_dispatch["fanout"]["cached"] == 1
+
+    @pytest.mark.asyncio
+    async def test_streaming_fanout_shares_pivot_request(self):
+        """тест что вкладка посредника и перевод через него делят один запрос"""
+        deltas = {}
+
+        async def on_delta(lang, delta):
+            deltas.setdefault(lang, []).append(delta)
+
+        api = self.make_api()
+        results = await api.translate_many(
+            "Привет", ["Эсперанто", "Английский", "Синдарин"], on_delta
+        )
+
+        assert self.calls.count(("Привет", "Английский")) == 1
+        assert len(self.calls) == 3
+        assert results["Английский"] == "Английский(Привет)"
+        assert "".join(deltas["Английский"]) == "Английский(Привет)"
+        assert "".join(deltas["Эсперанто"]) == "Эсперанто(Английский(Привет))"
+
+    @pytest.mark.asyncio
+    async def test_streaming_request_joins_plain_flight(self):
+        """тест что потоковый запрос подписывается на такой же запрос без потока"""
+        import asyncio
+
+        deltas = []
+
+        async def callback(delta):
+            deltas.append(delta)
+
+        api = self.make_api()
+        plain, streamed = await asyncio.gather(
+            api.translate("Привет", "Немецкий"),
+            api.translate("Привет", "Немецкий", callback),
+        )
+
+        assert self.calls == [("Привет", "Немецкий")]
+        assert plain == streamed == "Немецкий(Привет)"
+        assert deltas == ["Немецкий(Привет)"]
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from model_catalog import ModelCatalog, provider_configs
+from settings_manager import SettingsManager
+
+CONFIG = {"provider": "OpenAI", "api_endpoint": "", "access_token": "key"}
+MODELS = [{"name": "OpenAI - gpt-4o", "model_name": "gpt-4o"}]
+
+
+class TestModelCatalog:
+    """тесты для дискового каталога моделей"""
+
+    def setup_method(self):
+        """создание временного каталога"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "model_catalog.json")
+
+    def teardown_method(self):
+        """очистка временной директории"""
+        shutil.rmtree(self.temp_dir)
+
+    def make_provider(self, models):
+        provider = AsyncMock()
+        provider.get_available_models.return_value = models
+        return provider
+
+    @pytest.mark.asyncio
+    async def test_fetch_and_persist(self):
+        """тест первого запроса и чтения каталога с диска"""
+        provider = self.make_provider(list(MODELS))
+        with patch("model_catalog.LLMProviderFactory.get_provider", return_value=provider):
+            catalog = ModelCatalog(self.path)
+            models = await catalog.get_models(CONFIG)
+            assert models[0]["model_name"] == "gpt-4o"
+            # Второй запрос берется из кеша
+            await catalog.get_models(CONFIG)
+        assert provider.get_available_models.call_count == 1
+
+        reloaded = ModelCatalog(self.path)
+        cached, fresh = reloaded.get_cached(CONFIG)
+        assert fresh
+        assert cached[0]["provider"] == "openai"
+
+    @pytest.mark.asyncio
+    async def test_stale_served_and_revalidated(self):
+        """тест выдачи устаревшего списка и обновления в фоне"""
+        with open(self.path, "w", encoding="utf-8") as f:
+            entry = {"fetched": time.time() - 7200, "models": MODELS}
+            json.dump({ModelCatalog.catalog_key(CONFIG): entry}, f)
+        fresh_models = MODELS + [{"name": "OpenAI - o3", "model_name": "o3"}]
+        provider = self.make_provider(fresh_models)
+        updates = []
+
+        with patch("model_catalog.LLMProviderFactory.get_provider", return_value=provider):
+            catalog = ModelCatalog(self.path, ttl_hours=1)
+            models = await catalog.get_models(CONFIG, on_update=updates.append)
+            assert models == MODELS
+            await asyncio.sleep(0.01)
+
+        assert updates == [fresh_models]
+        assert catalog.get_cached(CONFIG) == (fresh_models, True)
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_cache(self):
+        """тест что ошибка провайдера не стирает сохраненный список"""
+        provider = self.make_provider(list(MODELS))
+        with patch("model_catalog.LLMProviderFactory.get_provider", return_value=provider):
+            catalog = ModelCatalog(self.path)
+            await catalog.refresh(CONFIG)
+            provider.get_available_models.side_effect = Exception("timeout")
+            models = await catalog.get_models(CONFIG, force=True)
+        assert models == MODELS
+
+    @pytest.mark.asyncio
+    async def test_concurrent_refresh_deduplicated(self):
+        """тест объединения одновременных обновлений одного провайдера"""
+
+        async def slow_models():
+            await asyncio.sleep(0.02)
+            return list(MODELS)
+
+        provider = AsyncMock()
+        provider.get_available_models.side_effect = slow_models
+        with patch("model_catalog.LLMProviderFactory.get_provider", return_value=provider):
+            catalog = ModelCatalog(self.path)
+            results = await asyncio.gather(
+                catalog.refresh(CONFIG), catalog.refresh(CONFIG)
+            )
+        assert results[0] == results[1] == MODELS
+        assert provider.get_available_models.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_refresh_all_updates_every_config(self):
+        """тест параллельного обновления всех переданных провайдеров"""
+        cerebras = {
+            "provider": "cerebras",
+            "api_endpoint": "https://api.cerebras.ai/v1",
+            "access_token": "key",
+        }
+        providers = {
+            "openai": self.make_provider(list(MODELS)),
+            "cerebras": self.make_provider([{"id": "llama3.1-8b"}]),
+        }
+        from providers.llm_provider_factory import LLMProviderFactory
+
+        list_models = AsyncMock(wraps=LLMProviderFactory.get_models_by_config)
+        with patch(
+            "model_catalog.LLMProviderFactory.get_provider",
+            side_effect=lambda info: providers[info["provider"]],
+        ), patch(
+            "model_catalog.LLMProviderFactory.get_models_by_config", list_models
+        ):
+            catalog = ModelCatalog(self.path, timeout=3)
+            assert await catalog.refresh_all([CONFIG, cerebras]) == 2
+        # Все провайдеры опрашиваются одним вызовом фабрики
+        list_models.assert_awaited_once_with([CONFIG, cerebras], 3)
+        models, fresh = catalog.get_cached(cerebras)
+        assert fresh
+        assert models[0]["model_name"] == "llama3.1-8b"
+        assert models[0]["provider"] == "cerebras"
+
+    @pytest.mark.asyncio
+    async def test_entries_separated_by_endpoint_and_key(self):
+        """тест что свой сервер и другой ключ того же провайдера кешируются отдельно"""
+        local = {**CONFIG, "api_endpoint": "http://localhost:8000/v1"}
+        other_key = {**CONFIG, "access_token": "other"}
+        provider = self.make_provider(list(MODELS))
+        with patch("model_catalog.LLMProviderFactory.get_provider", return_value=provider):
+            catalog = ModelCatalog(self.path)
+            await catalog.get_models(CONFIG)
+        assert catalog.get_cached(local) == (None, False)
+        assert catalog.get_cached(other_key) == (None, False)
+        with open(self.path, encoding="utf-8") as f:
+            assert "key" not in "".join(json.load(f))
+
+    def test_provider_configs_from_settings(self, monkeypatch):
+        """тест конфигураций всех провайдеров из настроек, у которых есть ключ"""
+        settings = Mock(spec=SettingsManager)
+        settings.get_providers.return_value = {
+            "OpenAI": {"access_token_env": "TEST_OPENAI_KEY", "api_endpoint": ""},
+            "Nebius": {
+                "access_token_env": "TEST_NEBIUS_KEY",
+                "api_endpoint": "https://api.studio.nebius.ai/v1/",
+            },
+            "Custom": {
+                "access_token_env": "TEST_CUSTOM_KEY",
+                "api_endpoint": "http://localhost:8000/v1",
+            },
+        }
+        monkeypatch.delenv("TEST_OPENAI_KEY", raising=False)
+        monkeypatch.setenv("TEST_NEBIUS_KEY", "nebius-key")
+        monkeypatch.setenv("TEST_CUSTOM_KEY", "custom-key")
+
+        configs = provider_configs(settings)
+        assert [config["provider"] for config in configs] == ["nebius", "custom"]
+        assert configs[1]["api_endpoint"] == "http://localhost:8000/v1"
+        assert configs[1]["access_token"] == "custom-key"
@@ -0,0 +1,89 @@
+import random
+import time
+from unittest.mock import Mock
+from latency_stats import LatencyStats
+from model_router import ModelRouter
+
+FAST_START = {"provider": "Cerebras", "model_name": "fast-start", "name": "fast-start"}
+HIGH_SPEED = {"provider": "OpenAI", "model_name": "high-speed", "name": "high-speed"}
+
+
+def summary(ttft, speed, count=20, error_rate=0.0, age=0.0):
+    return {
+        "count": count,
+        "errors": int(count * error_rate),
+        "error_rate": error_rate,
+        "ttft_p50": ttft,
+        "ttft_p95": ttft,
+        "total_p50": ttft + 1,
+        "total_p95": ttft + 2,
+        "tokens_per_sec": speed,
+        "last_sample": time.time() - age,
+    }
+
+
+class TestModelRouter:
+    """тесты для автоматического выбора модели"""
+
+    def make_router(self, summaries, **kwargs):
+        stats = Mock(spec=LatencyStats)
+        stats.get_summary.side_effect = lambda provider, model: summaries[model]
+        kwargs.setdefault("explore_rate", 0)
+        return ModelRouter(stats, rng=random.Random(1), **kwargs)
+
+    def test_input_length_changes_choice(self):
+        """тест что короткий текст идет к быстрому старту, длинный - к быстрому выводу"""
+        router = self.make_router({
+            "fast-start": summary(0.2, 20),
+            "high-speed": summary(1.0, 200),
+        })
+        pool = [FAST_START, HIGH_SPEED]
+        assert router.choose(pool, 5)[0] is FAST_START
+        assert router.choose(pool, 2000)[0] is HIGH_SPEED
+
+    def test_errors_and_unavailable_models_avoided(self):
+        """тест обхода модели с ошибками и модели с разомкнутым выключателем"""
+        summaries = {
+            "fast-start": summary(0.2, 20, error_rate=0.5),
+            "high-speed": summary(0.4, 20),
+        }
+        router = self.make_router(summaries)
+        assert router.choose([FAST_START, HIGH_SPEED], 5)[0] is HIGH_SPEED
+
+        router = self.make_router(
+            summaries, is_available=lambda model: model is not HIGH_SPEED
+        )
+        model, reason = router.choose([FAST_START, HIGH_SPEED], 5)
+        assert model is FAST_START
+        assert reason == "единственная доступная"
+
+    def test_stale_stats_decay_toward_pool_average(self):
+        """тест что устаревшая плохая статистика перестает отталкивать модель"""
+        third = {"provider": "Google", "model_name": "mid", "name": "mid"}
+        summaries = {
+            "fast-start": summary(5.0, 20, age=30 * 24 * 3600),
+            "high-speed": summary(1.0, 20),
+            "mid": summary(0.5, 20),
+        }
+        router = self.make_router(summaries, half_life_hours=24)
+        # Месячная оценка почти полностью заменена медианой пула
+        value, confidence = router.estimate(FAST_START, 5)
+        assert confidence < 0.01
+        assert router.choose([FAST_START, HIGH_SPEED, third], 5)[0] is third
+
+    def test_exploration_prefers_unmeasured(self):
+        """тест разведки моделей без замеров"""
+        unknown = {"provider": "Nebius", "model_name": "new", "name": "new"}
+        router = self.make_router(
+            {
+                "fast-start": summary(0.2, 20),
+                "high-speed": summary(1.0, 20),
+                "new": {**summary(0, 0, count=0), "last_sample": None},
+            },
+            explore_rate=1.0,
+        )
+        model, reason = router.choose([FAST_START, HIGH_SPEED, unknown], 5)
+        assert model is unknown
+        assert reason == "разведка"
+        # Без разведки выбирается лучшая модель
+        assert router.choose([FAST_START, HIGH_SPEED, unknown], 5, explore=False)[0] is FAST_START
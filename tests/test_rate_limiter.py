@@ -0,0 +1,54 @@
+import pytest
+from providers.rate_limiter import RateLimiter, get_rate_limiter
+
+
+class TestRateLimiter:
+    """тесты для ограничителя частоты запросов"""
+
+    @pytest.mark.asyncio
+    async def test_unlimited_does_not_wait(self):
+        """тест что лимит 0 не ограничивает запросы"""
+        limiter = RateLimiter(0, 0)
+        for _ in range(100):
+            assert await limiter.acquire(10_000) < 0.05
+        assert limiter.get_stats()["requests"] == 100
+        assert limiter.get_stats()["waited"] == 0
+
+    @pytest.mark.asyncio
+    async def test_requests_per_minute_queue(self):
+        """тест ожидания бюджета запросов"""
+        limiter = RateLimiter(requests_per_minute=600)
+        limiter._requests.level = 0
+        waited = await limiter.acquire()
+        # 600 в минуту - один запрос за 0.1 с
+        assert 0.05 < waited < 0.5
+        stats = limiter.get_stats()
+        assert stats["waited"] == 1
+        assert stats["wait_max"] == pytest.approx(waited)
+
+    @pytest.mark.asyncio
+    async def test_tokens_per_minute_queue(self):
+        """тест ожидания бюджета токенов"""
+        limiter = RateLimiter(tokens_per_minute=6000)
+        assert await limiter.acquire(5990) < 0.05
+        # Осталось 10 токенов, нужно 20 - ждем пополнения 10 токенов (0.1 с)
+        waited = await limiter.acquire(20)
+        assert 0.05 < waited < 0.5
+
+    @pytest.mark.asyncio
+    async def test_adjust_tokens_returns_budget(self):
+        """тест возврата переоцененного бюджета токенов"""
+        limiter = RateLimiter(tokens_per_minute=6000)
+        await limiter.acquire(6000)
+        limiter.adjust_tokens(-6000)
+        assert await limiter.acquire(3000) < 0.05
+
+    def test_registry_keyed_by_provider_and_key(self):
+        """тест общего ограничителя для провайдера и ключа"""
+        first = get_rate_limiter("TestProvider", "KEY_A", 10, 100)
+        assert get_rate_limiter("TestProvider", "KEY_A", 10, 100) is first
+        assert get_rate_limiter("TestProvider", "KEY_B", 10, 100) is not first
+
+        again = get_rate_limiter("TestProvider", "KEY_A", 20, 100)
+        assert again is first
+        assert first.requests_per_minute == 20
@@ -0,0 +1,201 @@
+import pytest
+from providers.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ProviderHTTPError,
+    RetryPolicy,
+    call_with_retry,
+    is_transient,
+    parse_retry_after,
+)
+from providers.stream_events import (
+    DeltaEvent,
+    ErrorEvent,
+    FinishEvent,
+    provider_events,
+)
+
+FAST = RetryPolicy(max_attempts=3, base_delay=0, max_delay=0)
+
+
+class TestRetry:
+    """тесты для повторов запросов"""
+
+    def test_parse_retry_after(self):
+        """тест разбора заголовка Retry-After"""
+        assert parse_retry_after("2") == 2.0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+        assert parse_retry_after("soon") is None
+
+    def test_is_transient(self):
+        """тест классификации ошибок"""
+        assert is_transient(ProviderHTTPError("rate", 429))
+        assert is_transient(ProviderHTTPError("down", 503))
+        assert not is_transient(ProviderHTTPError("auth", 401))
+        assert not is_transient(ValueError("bad"))
+
+    @pytest.mark.asyncio
+    async def test_retries_transient_error(self):
+        """тест повтора после 429"""
+        calls = []
+
+        async def call():
+            calls.append(1)
+            if len(calls) < 3:
+                raise ProviderHTTPError("rate", 429, retry_after=0)
+            return "ok"
+
+        assert await call_with_retry(call, policy=FAST) == "ok"
+        assert len(calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_does_not_retry_permanent_error(self):
+        """тест что ошибка авторизации не повторяется"""
+        calls = []
+
+        async def call():
+            calls.append(1)
+            raise ProviderHTTPError("auth", 401)
+
+        with pytest.raises(ProviderHTTPError):
+            await call_with_retry(call, policy=FAST)
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_long_retry_after_is_not_awaited(self):
+        """тест что слишком длинный Retry-After не ждем"""
+        calls = []
+
+        async def call():
+            calls.append(1)
+            raise ProviderHTTPError("rate", 429, retry_after=600)
+
+        with pytest.raises(ProviderHTTPError):
+            await call_with_retry(call, policy=FAST)
+        assert len(calls) == 1
+
+
+class TestCircuitBreaker:
+    """тесты для автоматического выключателя"""
+
+    @pytest.mark.asyncio
+    async def test_opens_and_fails_fast(self):
+        """тест размыкания после серии ошибок"""
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+        calls = []
+
+        async def call():
+            calls.append(1)
+            raise ProviderHTTPError("down", 503, retry_after=0)
+
+        with pytest.raises(ProviderHTTPError):
+            await call_with_retry(call, breaker=breaker, policy=FAST)
+        assert breaker.state == CircuitBreaker.OPEN
+        assert len(calls) == 2
+
+        with pytest.raises(CircuitOpenError):
+            await call_with_retry(call, breaker=breaker, policy=FAST)
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_half_open_recovers(self):
+        """тест восстановления после пробного запроса"""
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+        async def call():
+            return "ok"
+
+        assert await call_with_retry(call, breaker=breaker) == "ok"
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_half_open_allows_single_probe(self):
+        """тест что после паузы пропускается только один пробный запрос"""
+        import asyncio
+
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        release = asyncio.Event()
+        calls = []
+
+        async def call():
+            calls.append(1)
+            await release.wait()
+            return "ok"
+
+        probe = asyncio.create_task(call_with_retry(call, breaker=breaker))
+        await asyncio.sleep(0)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            await call_with_retry(call, breaker=breaker)
+        assert len(calls) == 1
+
+        release.set()
+        assert await probe == "ok"
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert await call_with_retry(call, breaker=breaker) == "ok"
+
+    @pytest.mark.asyncio
+    async def test_cancelled_probe_frees_slot(self):
+        """тест что отмененный пробный запрос не блокирует следующий"""
+        import asyncio
+
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        async def hang():
+            await asyncio.sleep(10)
+
+        probe = asyncio.create_task(call_with_retry(hang, breaker=breaker))
+        await asyncio.sleep(0)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        assert not breaker.probing
+
+        async def call():
+            return "ok"
+
+        assert await call_with_retry(call, breaker=breaker) == "ok"
+
+
+class FlakyProvider:
+    """Провайдер, падающий с 503 заданное число раз"""
+
+    def __init__(self, failures, fail_after_delta=False):
+        self.failures = failures
+        self.fail_after_delta = fail_after_delta
+        self.calls = 0
+
+    async def translate(self, messages, target_lang, streaming_callback=None):
+        self.calls += 1
+        if self.fail_after_delta:
+            await streaming_callback("partial")
+        if self.calls <= self.failures:
+            raise ProviderHTTPError("down", 503, retry_after=0)
+        await streaming_callback("done")
+        return "done"
+
+
+class TestStreamRestart:
+    """тесты для перезапуска потока до первой дельты"""
+
+    @pytest.mark.asyncio
+    async def test_restart_before_first_delta(self):
+        """тест перезапуска потока, упавшего до первой дельты"""
+        provider = FlakyProvider(failures=1)
+        events = [e async for e in provider_events(provider, [], "en")]
+        assert provider.calls == 2
+        assert [e.text for e in events if isinstance(e, DeltaEvent)] == ["done"]
+        assert isinstance(events[-1], FinishEvent)
+
+    @pytest.mark.asyncio
+    async def test_no_restart_after_delta(self):
+        """тест что поток с переданными дельтами не перезапускается"""
+        provider = FlakyProvider(failures=1, fail_after_delta=True)
+        events = [e async for e in provider_events(provider, [], "en")]
+        assert provider.calls == 1
+        assert isinstance(events[-1], ErrorEvent)
@@ -0,0 +1,92 @@
+import pytest
+from unittest.mock import Mock
+from providers.sse_parser import SSEDecoder, iter_sse_events
+
+
+class TestSSEDecoder:
+    """тесты для инкрементального декодера SSE"""
+
+    def test_single_event(self):
+        """тест разбора одного события"""
+        events = SSEDecoder().feed(b'data: {"a": 1}\n\n')
+        assert len(events) == 1
+        assert events[0].event == "message"
+        assert events[0].data == '{"a": 1}'
+
+    def test_split_frames(self):
+        """тест события, разорванного между кусками"""
+        decoder = SSEDecoder()
+        assert decoder.feed(b"da") == []
+        assert decoder.feed(b"ta: hel") == []
+        events = decoder.feed(b"lo\r\n\r\n")
+        assert [e.data for e in events] == ["hello"]
+
+    def test_split_utf8_character(self):
+        """тест разрыва посреди многобайтного символа"""
+        payload = "data: привет\n\n".encode("utf-8")
+        decoder = SSEDecoder()
+        events = []
+        for i in range(len(payload)):
+            events += decoder.feed(payload[i : i + 1])
+        assert [e.data for e in events] == ["привет"]
+
+    def test_multiline_data_and_event_type(self):
+        """тест многострочного data и поля event"""
+        events = SSEDecoder().feed(
+            b"event: content_block_delta\ndata: line1\ndata: line2\n\n"
+        )
+        assert events[0].event == "content_block_delta"
+        assert events[0].data == "line1\nline2"
+
+    def test_comments_ignored(self):
+        """тест что комментарии keep-alive пропускаются"""
+        events = SSEDecoder().feed(b": OPENROUTER PROCESSING\n\ndata: x\n\n")
+        assert [e.data for e in events] == ["x"]
+
+    def test_flush_without_trailing_newline(self):
+        """тест завершения потока без пустой строки"""
+        decoder = SSEDecoder()
+        assert decoder.feed(b"data: [DONE]") == []
+        assert [e.data for e in decoder.flush()] == ["[DONE]"]
+
+    def test_long_line(self):
+        """тест строки длиннее буфера построчного чтения aiohttp"""
+        long_value = "x" * 200_000
+        events = SSEDecoder().feed(f"data: {long_value}\n\n".encode())
+        assert events[0].data == long_value
+
+    def test_bare_cr_line_endings(self):
+        """тест одиночного \\r как конца строки"""
+        events = SSEDecoder().feed(b"event: ping\rdata: a\rdata: b\r\rdata: c\r\r")
+        assert [(e.event, e.data) for e in events] == [
+            ("ping", "a\nb"),
+            ("message", "c"),
+        ]
+
+    def test_crlf_split_between_chunks(self):
+        """тест пары \\r\\n, разорванной между кусками"""
+        decoder = SSEDecoder()
+        assert decoder.feed(b"data: x\r") == []
+        assert decoder.feed(b"\n") == []
+        assert [e.data for e in decoder.feed(b"\r\n")] == ["x"]
+
+    def test_many_small_chunks(self):
+        """тест что длинная строка мелкими кусками собирается целиком"""
+        decoder = SSEDecoder()
+        payload = b"data: " + b"y" * 50_000 + b"\n\n"
+        events = []
+        for i in range(0, len(payload), 7):
+            events += decoder.feed(payload[i : i + 7])
+        assert [len(e.data) for e in events] == [50_000]
+
+    @pytest.mark.asyncio
+    async def test_iter_sse_events(self):
+        """тест итерации событий из ответа"""
+
+        async def iter_any():
+            yield b"data: one\n\nda"
+            yield b"ta: two\n\n"
+
+        response = Mock()
+        response.content.iter_any = iter_any
+        assert [e.data async for e in iter_sse_events(response)] == ["one", "two"]
@@ -0,0 +1,147 @@
+import asyncio
+import pytest
+from providers.stream_events import (
+    DeltaEvent,
+    ErrorEvent,
+    FinishEvent,
+    ItemEvent,
+    UsageEvent,
+    provider_events,
+    report_event,
+    report_structured,
+)
+
+
+class FakeProvider:
+    """Провайдер, отдающий заданные дельты и сообщающий расход токенов"""
+
+    def __init__(self, deltas, error=None):
+        self.deltas = deltas
+        self.error = error
+        self.sent = 0
+
+    async def translate(self, messages, target_lang, streaming_callback=None):
+        for delta in self.deltas:
+            if streaming_callback:
+                await streaming_callback(delta)
+            self.sent += 1
+        if self.error:
+            raise self.error
+        await report_event(UsageEvent(10, len(self.deltas)))
+        await report_event(FinishEvent("length"))
+        return "".join(self.deltas)
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+class TestProviderEvents:
+    """тесты для потока типизированных событий провайдера"""
+
+    @pytest.mark.asyncio
+    async def test_stream_events_order(self):
+        """тест порядка событий: дельты, расход, завершение"""
+        events = await collect(provider_events(FakeProvider(["a", "b"]), [], "en"))
+        assert [type(e) for e in events] == [
+            DeltaEvent,
+            DeltaEvent,
+            UsageEvent,
+            FinishEvent,
+        ]
+        assert events[2].input_tokens == 10
+        assert events[3].reason == "length"
+        assert events[3].text == "ab"
+
+    @pytest.mark.asyncio
+    async def test_non_streaming_result_becomes_delta(self):
+        """тест ответа без потоковой отдачи"""
+        events = await collect(
+            provider_events(FakeProvider(["ab"]), [], "en", stream=False)
+        )
+        deltas = [e.text for e in events if isinstance(e, DeltaEvent)]
+        assert deltas == ["ab"]
+        assert events[-1].text == "ab"
+
+    @pytest.mark.asyncio
+    async def test_error_event(self):
+        """тест ошибки провайдера после части дельт"""
+        provider = FakeProvider(["a"], error=RuntimeError("boom"))
+        events = await collect(provider_events(provider, [], "en"))
+        assert isinstance(events[0], DeltaEvent)
+        assert isinstance(events[-1], ErrorEvent)
+        assert str(events[-1].error) == "boom"
+
+    @pytest.mark.asyncio
+    async def test_backpressure(self):
+        """тест ограниченного буфера: производитель ждет медленного потребителя"""
+        provider = FakeProvider([str(i) for i in range(10)])
+        events = provider_events(provider, [], "en", max_buffer=2)
+        first = await events.__anext__()
+        await asyncio.sleep(0.01)
+        assert first.text == "0"
+        # Одна дельта отдана, две в очереди, еще одна ждет места
+        assert provider.sent <= 4
+        rest = await collect(events)
+        assert provider.sent == 10
+        assert isinstance(rest[-1], FinishEvent)
+
+    @pytest.mark.asyncio
+    async def test_close_cancels_producer(self):
+        """тест остановки чтения при досрочном закрытии итератора"""
+        started = asyncio.Event()
+
+        class HangingProvider:
+            cancelled = False
+
+            async def translate(self, messages, target_lang, streaming_callback=None):
+                await streaming_callback("x")
+                started.set()
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    HangingProvider.cancelled = True
+                    raise
+
+        events = provider_events(HangingProvider(), [], "en")
+        await events.__anext__()
+        await started.wait()
+        await events.aclose()
+        assert HangingProvider.cancelled
+
+    @pytest.mark.asyncio
+    async def test_structured_items_streamed(self):
+        """тест элементов JSON-ответа до завершения потока"""
+
+        class JSONProvider:
+            async def translate(self, messages, target_lang, streaming_callback=None):
+                for delta in ['["a",', ' "b"', "]"]:
+                    await streaming_callback(delta)
+                    await report_structured(delta)
+                return '["a", "b"]'
+
+        events = await collect(
+            provider_events(JSONProvider(), [], "en", structured=True)
+        )
+        kinds = [type(e).__name__ for e in events]
+        assert kinds == [
+            "DeltaEvent",
+            "ItemEvent",
+            "DeltaEvent",
+            "DeltaEvent",
+            "ItemEvent",
+            "FinishEvent",
+        ]
+        assert [(e.key, e.value) for e in events if isinstance(e, ItemEvent)] == [
+            (0, "a"),
+            (1, "b"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_structured_items_from_whole_response(self):
+        """тест элементов от провайдера без разбора потока"""
+        events = await collect(
+            provider_events(FakeProvider(['["x"', ', "y"]']), [], "en", structured=True)
+        )
+        items = [(e.key, e.value) for e in events if isinstance(e, ItemEvent)]
+        assert items == [(0, "x"), (1, "y")]
@@ -0,0 +1,65 @@
+import logging
+import os
+
+# тесты виджетов должны работать и без дисплея
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QTextEdit
+from ui.stream_sink import StreamingTextSink
+
+
+class TestStreamingTextSink:
+    """тесты для буферизованного потокового вывода"""
+
+    def test_deltas_merged_into_one_flush(self, qtbot):
+        """тест что дельты одного кадра отрисовываются за один раз"""
+        text_edit = QTextEdit()
+        qtbot.addWidget(text_edit)
+        sink = StreamingTextSink(text_edit)
+
+        for delta in ["При", "вет", ", ", "мир"]:
+            sink.append(delta)
+        assert text_edit.toPlainText() == ""
+
+        qtbot.waitUntil(lambda: text_edit.toPlainText() == "Привет, мир")
+        stats = sink.get_stats()
+        assert stats["deltas"] == 4
+        assert stats["flushes"] == 1
+        assert stats["merged_deltas"] == 3
+
+    def test_flush_writes_immediately(self, qtbot):
+        """тест немедленной отрисовки буфера"""
+        text_edit = QTextEdit()
+        qtbot.addWidget(text_edit)
+        sink = StreamingTextSink(text_edit)
+        sink.append("текст")
+        sink.flush()
+        assert text_edit.toPlainText() == "текст"
+
+    def test_reset_drops_buffer(self, qtbot):
+        """тест сброса буфера"""
+        text_edit = QTextEdit()
+        qtbot.addWidget(text_edit)
+        sink = StreamingTextSink(text_edit)
+        sink.append("текст")
+        sink.reset()
+        sink.flush()
+        assert text_edit.toPlainText() == ""
+        assert sink.get_stats()["deltas"] == 0
+
+    def test_finish_logs_stats_once(self, qtbot, caplog):
+        """тест что статистика потока пишется в лог один раз"""
+        text_edit = QTextEdit()
+        qtbot.addWidget(text_edit)
+        sink = StreamingTextSink(text_edit)
+        sink.append("При")
+        sink.append("вет")
+
+        with caplog.at_level(logging.DEBUG, logger="ui.stream_sink"):
+            sink.finish()
+            sink.finish()
+
+        assert text_edit.toPlainText() == "Привет"
+        records = [r for r in caplog.records if r.name == "ui.stream_sink"]
+        assert len(records) == 1
+        assert "2 дельт за 1 отрисовок, слито 1" in records[0].getMessage()
@@ -0,0 +1,29 @@
+from text_segmenter import split_segments, join_segments
+
+
+class TestTextSegmenter:
+    """тесты для разбиения текста на сегменты"""
+
+    def test_split_sentences(self):
+        """тест разбиения на предложения"""
+        segments = split_segments("Привет. Как дела? Хорошо!")
+        assert [body for body, _ in segments] == ["Привет.", "Как дела?", "Хорошо!"]
+
+    def test_split_paragraphs(self):
+        """тест разбиения на абзацы"""
+        text = "Первый абзац. Второе предложение.\n\nВторой абзац."
+        segments = split_segments(text, "paragraph")
+        assert [body for body, _ in segments] == [
+            "Первый абзац. Второе предложение.",
+            "Второй абзац.",
+        ]
+
+    def test_join_restores_text(self):
+        """тест что склейка сегментов восстанавливает текст"""
+        text = "Первое.  Второе!\n\nТретье?\nЧетвертое.\n"
+        segments = split_segments(text)
+        assert join_segments([body for body, _ in segments], segments) == text
+
+    def test_single_segment(self):
+        """тест текста без разделителей"""
+        assert split_segments("Без точки") == [("Без точки", "")]
@@ -0,0 +1,88 @@
+from token_estimator import (
+    DEFAULT_MAX_OUTPUT,
+    enter_budget_scope,
+    estimate_tokens,
+    exit_budget_scope,
+    is_truncated,
+    model_family,
+    output_budget,
+    predict_output_tokens,
+    script_counts,
+)
+
+
+class TestTokenEstimator:
+    """тесты для офлайн-оценки токенов"""
+
+    def test_script_counts(self):
+        """тест подсчета символов по письменностям без цикла по символам"""
+        assert script_counts("Hello") == (5, 0, 0, 0)
+        assert script_counts("Привет, мир") == (2, 9, 0, 0)
+        assert script_counts("OK 你好") == (3, 0, 2, 0)
+        # Деванагари и тайская письменность - не иероглифы
+        assert script_counts("नमस्ते दुनिया") == (1, 0, 0, 12)
+        assert script_counts("สวัสดี") == (0, 0, 0, 6)
+
+    def test_family_calibration(self):
+        """тест что кириллица у Anthropic дороже, чем у OpenAI"""
+        text = "Съешь же ещё этих мягких французских булок" * 10
+        assert estimate_tokens(text, "anthropic") > estimate_tokens(text, "openai")
+        assert estimate_tokens("", "openai") == 1
+        # Неизвестное семейство оценивается как default
+        assert estimate_tokens(text, "unknown") == estimate_tokens(text)
+
+    def test_model_family(self):
+        """тест определения семейства по провайдеру и префиксу OpenRouter"""
+        assert model_family("Anthropic", "claude-3-5-haiku") == "anthropic"
+        assert model_family("openrouter", "google/gemini-2.0-flash") == "google"
+        assert model_family("openrouter", "mistralai/mistral-7b") == "default"
+        assert model_family("Custom") == "default"
+
+    def test_output_prediction_by_target_script(self):
+        """тест что прогноз перевода зависит от письменности целевого языка"""
+        text = "The quick brown fox jumps over the lazy dog. " * 20
+        english = predict_output_tokens(text, "Английский", "anthropic")
+        russian = predict_output_tokens(text, "Русский", "anthropic")
+        chinese = predict_output_tokens(text, "Китайский", "anthropic")
+        assert english < russian
+        assert chinese < russian
+
+    def test_output_budget_has_margin_and_ceiling(self):
+        """тест что лимит ответа больше прогноза и не выше потолка"""
+        text = "Short phrase."
+        assert output_budget(text, "Русский") > predict_output_tokens(text, "Русский")
+        assert output_budget(text * 5000, "Русский") == DEFAULT_MAX_OUTPUT
+        assert output_budget(text * 5000, "Русский", ceiling=8000) == 8000
+
+    def test_non_latin_targets_get_conservative_budget(self):
+        """тест что языки с другими письменностями не получают тариф латиницы"""
+        text = "The quick brown fox jumps over the lazy dog. " * 40
+        russian = output_budget(text, "Русский", "anthropic")
+        assert output_budget(text, "English", "anthropic") < russian
+        for language in ["Греческий", "Арабский", "Хинди", "Иврит", "Тайский", "Армянский"]:
+            assert output_budget(text, language, "anthropic") > russian
+        # Неизвестный язык оценивается так же осторожно
+        assert output_budget(text, "Клингонский", "anthropic") > russian
+
+    def test_budget_scope(self):
+        """тест что область лимита отмечает суженный лимит и отдает потолок"""
+        scope, token = enter_budget_scope()
+        try:
+            assert output_budget("Short phrase.", "Русский") < DEFAULT_MAX_OUTPUT
+        finally:
+            exit_budget_scope(token)
+        assert scope.limited
+
+        scope, token = enter_budget_scope(full=True)
+        try:
+            assert output_budget("Short phrase.", "Русский") == DEFAULT_MAX_OUTPUT
+        finally:
+            exit_budget_scope(token)
+
+    def test_is_truncated(self):
+        """тест распознавания остановки по лимиту токенов у разных провайдеров"""
+        assert is_truncated("max_tokens")
+        assert is_truncated("length")
+        assert is_truncated("MAX_TOKENS")
+        assert not is_truncated("stop")
+        assert not is_truncated(None)
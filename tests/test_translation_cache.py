@@ -0,0 +1,176 @@
+import pytest
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import AsyncMock, patch
+from llm_api import LLMApi
+from translation_cache import TranslationCache
+
+
+class TestTranslationCache:
+    """тесты для памяти переводов"""
+
+    def setup_method(self):
+        """создание временной базы"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "cache.db")
+
+    def teardown_method(self):
+        """очистка временной директории"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_put_and_get(self):
+        """тест сохранения и получения перевода"""
+        cache = TranslationCache(self.db_path)
+        cache.put("Привет", "English", "prompt", "OpenAI/gpt-4o", "Hello")
+        assert cache.get("Привет", "English", "prompt", "OpenAI/gpt-4o") == "Hello"
+        assert cache.get("Привет", "Deutsch", "prompt", "OpenAI/gpt-4o") is None
+        assert cache.get_stats()["hits"] == 1
+        assert cache.get_stats()["misses"] == 1
+        cache.close()
+
+    def test_normalized_text_hits(self):
+        """тест что отличия в пробелах по краям не мешают попаданию"""
+        cache = TranslationCache(self.db_path)
+        cache.put("Привет\r\nмир  ", "English", "p", "m", "Hello world")
+        assert cache.get("  Привет\nмир", "English", "p", "m") == "Hello world"
+        cache.close()
+
+    def test_lru_eviction(self):
+        """тест вытеснения давно использованных записей"""
+        cache = TranslationCache(self.db_path, max_entries=2)
+        cache.put("a", "en", "p", "m", "A")
+        cache.put("b", "en", "p", "m", "B")
+        cache.get("a", "en", "p", "m")
+        cache.put("c", "en", "p", "m", "C")
+        assert cache.get("b", "en", "p", "m") is None
+        assert cache.get("a", "en", "p", "m") == "A"
+        assert cache.get_stats()["entries"] == 2
+        cache.close()
+
+    def test_age_eviction(self):
+        """тест что устаревшие записи не возвращаются"""
+        cache = TranslationCache(self.db_path, max_age_days=1)
+        with patch("translation_cache.time.time", return_value=time.time() - 2 * 86400):
+            cache.put("a", "en", "p", "m", "A")
+        assert cache.get("a", "en", "p", "m") is None
+        cache.close()
+
+    def test_persists_between_instances(self):
+        """тест что кеш сохраняется на диске"""
+        cache = TranslationCache(self.db_path)
+        cache.put("a", "en", "p", "m", "A")
+        cache.close()
+        cache = TranslationCache(self.db_path)
+        assert cache.get("a", "en", "p", "m") == "A"
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_llm_api_uses_cache(self, llm_settings):
+        """тест что повторный перевод берется из кеша с повтором через callback"""
+        mock_provider = AsyncMock()
+        mock_provider.translate.return_value = "Hello"
+        model_info = {"name": "m", "provider": "OpenAI", "model_name": "gpt-4o"}
+        cache = TranslationCache(self.db_path)
+
+        with patch(
+            "llm_api.LLMProviderFactory.get_provider", return_value=mock_provider
+        ):
+            api = LLMApi(model_info, llm_settings, cache)
+            assert await api.translate("Привет", "English") == "Hello"
+            callback = AsyncMock()
+            assert await api.translate("Привет", "English", callback) == "Hello"
+
+        mock_provider.translate.assert_called_once()
+        callback.assert_awaited_once_with("Hello")
+        assert api.last_dispatch["cached"] is True
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_segment_cache_translates_only_misses(self, llm_settings):
+        """тест что провайдеру отправляются только новые предложения"""
+        llm_settings.get_cache_settings.return_value = {"segment_mode": "sentence"}
+        mock_provider = AsyncMock()
+        mock_provider.translate.return_value = "Two."
+        model_info = {"name": "m", "provider": "OpenAI", "model_name": "gpt-4o"}
+        cache = TranslationCache(self.db_path)
+        cache.put("Один.", "English", "prompt", "OpenAI/gpt-4o", "One.")
+
+        with patch(
+            "llm_api.LLMProviderFactory.get_provider", return_value=mock_provider
+        ):
+            api = LLMApi(model_info, llm_settings, cache)
+            deltas = []
+
+            async def callback(delta):
+                deltas.append(delta)
+
+            result = await api.translate("Один. Два.", "English", callback)
+
+        assert result == "One. Two."
+        mock_provider.translate.assert_called_once()
+        messages = mock_provider.translate.call_args[0][0]
+        assert messages[-1]["content"] == "Два."
+        # кешированный сегмент выводится до запроса к провайдеру
+        assert deltas[0] == "One."
+        assert api.last_dispatch["segments"] == {"total": 2, "missed": 1}
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_segment_cache_without_hits_sends_whole_text(self, llm_settings):
+        """тест что текст без сегментов в кеше уходит провайдеру одним запросом"""
+        llm_settings.get_cache_settings.return_value = {"segment_mode": "sentence"}
+        mock_provider = AsyncMock()
+        mock_provider.translate.return_value = "One. Two."
+        model_info = {"name": "m", "provider": "OpenAI", "model_name": "gpt-4o"}
+        cache = TranslationCache(self.db_path)
+
+        with patch(
+            "llm_api.LLMProviderFactory.get_provider", return_value=mock_provider
+        ):
+            api = LLMApi(model_info, llm_settings, cache)
+            result = await api.translate("Один. Два.", "English")
+
+        assert result == "One. Two."
+        mock_provider.translate.assert_called_once()
+        messages = mock_provider.translate.call_args[0][0]
+        assert messages[-1]["content"] == "Один. Два."
+        assert "segments" not in api.last_dispatch
+        assert (
+            cache.get("Один. Два.", "English", "prompt", "OpenAI/gpt-4o") == "One. Two."
+        )
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_segment_cache_misses_sent_in_one_batch(self, llm_settings):
+        """тест что отсутствующие в кеше предложения уходят одним пакетом"""
+        import json
+
+        llm_settings.get_cache_settings.return_value = {"segment_mode": "sentence"}
+        mock_provider = AsyncMock()
+        mock_provider.translate.return_value = '["Two.", "Three."]'
+        model_info = {"name": "m", "provider": "OpenAI", "model_name": "gpt-4o"}
+        cache = TranslationCache(self.db_path)
+        cache.put("Один.", "English", "prompt", "OpenAI/gpt-4o", "One.")
+
+        with patch(
+            "llm_api.LLMProviderFactory.get_provider", return_value=mock_provider
+        ):
+            api = LLMApi(model_info, llm_settings, cache)
+            deltas = []
+
+            async def callback(delta):
+                deltas.append(delta)
+
+            result = await api.translate("Один. Два. Три.", "English", callback)
+
+        assert result == "One. Two. Three."
+        assert "".join(deltas) == "One. Two. Three."
+        mock_provider.translate.assert_called_once()
+        messages = mock_provider.translate.call_args[0][0]
+        assert json.loads(messages[-1]["content"]) == ["Два.", "Три."]
+        assert api.last_dispatch["segments"] == {"total": 3, "missed": 2}
+        assert api.last_dispatch["batches"] == 1
+        assert cache.get("Три.", "English", "prompt", "OpenAI/gpt-4o") == "Three."
+        cache.close()
@@ -0,0 +1,88 @@
+import pytest
+from unittest.mock import Mock, AsyncMock, patch
+from settings_manager import SettingsManager
+from translation_session import TranslationSession
+
+
+class TestTranslationSession:
+    """тесты для кеша API-клиентов"""
+
+    def setup_method(self):
+        """настройка для каждого теста"""
+        self.mock_settings = Mock(spec=SettingsManager)
+        self.mock_settings.get_prompt_info.return_value = {
+            "name": "Базовый",
+            "text": "Переведи текст",
+        }
+        self.mock_settings.get_cache_settings.return_value = {"enabled": False}
+        self.mock_settings.get_stats_settings.return_value = {"enabled": False}
+        self.model_info = {
+            "name": "gpt-4o - OpenAI",
+            "provider": "OpenAI",
+            "api_endpoint": "https://api.openai.com/v1",
+            "model_name": "gpt-4o",
+            "access_token": "test_token",
+            "streaming": True,
+        }
+
+    def test_invalid_settings(self):
+        """тест инициализации с неверным settings_manager"""
+        with pytest.raises(TypeError):
+            TranslationSession("invalid")
+
+    def test_get_api_is_cached(self):
+        """тест что провайдер создается один раз для одной модели"""
+        with patch("llm_api.LLMProviderFactory.get_provider") as mock_factory:
+            session = TranslationSession(self.mock_settings)
+            first = session.get_api(self.model_info)
+            second = session.get_api(dict(self.model_info))
+            assert first is second
+            mock_factory.assert_called_once()
+
+    def test_changed_key_evicts_old_client(self):
+        """тест что смена ключа доступа пересоздает клиент"""
+        with patch("llm_api.LLMProviderFactory.get_provider") as mock_factory:
+            session = TranslationSession(self.mock_settings)
+            first = session.get_api(self.model_info)
+            second = session.get_api({**self.model_info, "access_token": "new"})
+            assert first is not second
+            assert mock_factory.call_count == 2
+            assert len(session._apis) == 1
+
+    def test_sync_with_settings_drops_removed_models(self):
+        """тест сброса клиентов удаленных моделей"""
+        with patch("llm_api.LLMProviderFactory.get_provider"):
+            session = TranslationSession(self.mock_settings)
+            session.get_api(self.model_info)
+            self.mock_settings.get_models.return_value = ([], None)
+            session.sync_with_settings()
+            assert session._apis == {}
+
+    @pytest.mark.asyncio
+    async def test_close_closes_providers(self):
+        """тест закрытия провайдеров при закрытии сессии"""
+        mock_provider = AsyncMock()
+        with patch(
+            "llm_api.LLMProviderFactory.get_provider", return_value=mock_provider
+        ):
+            session = TranslationSession(self.mock_settings)
+            session.get_api(self.model_info)
+            await session.close()
+            mock_provider.close.assert_awaited_once()
+
+    def test_is_available_checks_breaker_without_clients(self):
+        """тест проверки доступности модели без создания клиентов"""
+        from providers.llm_provider_factory import LLMProviderFactory
+        from providers.resilience import get_breaker
+
+        model_info = dict(self.model_info, api_endpoint="https://probe.example/v1")
+        breaker = get_breaker(LLMProviderFactory.get_breaker_name(model_info))
+        with patch("llm_api.LLMProviderFactory.get_provider") as mock_factory:
+            session = TranslationSession(self.mock_settings)
+            assert session.is_available(model_info)
+            breaker.failures = breaker.failure_threshold - 1
+            breaker.record_failure()
+            assert not session.is_available(model_info)
+            assert not session.is_available({"provider": "unknown"})
+            mock_factory.assert_not_called()
+        breaker.record_success()
@@ -0,0 +1,87 @@
+"""Разбиение текста на предложения и абзацы для посегментного перевода."""
+
+from typing import Callable, List, Tuple
+import re
+from token_estimator import estimate_tokens
+
+# Разделитель абзацев: пустая строка (возможно с пробелами)
+_PARAGRAPH_RE = re.compile(r"(\n[ \t]*\n\s*)")
+# Разделитель предложений: пробелы после знака конца предложения или абзац
+_SENTENCE_RE = re.compile(r"(\n[ \t]*\n\s*|(?<=[.!?…])[ \t]+|(?<=[.!?…])\n\s*)")
+
+SEGMENT_MODES = ("off", "sentence", "paragraph")
+
+
+def split_segments(text: str, mode: str = "sentence") -> List[Tuple[str, str]]:
+    """
+    Разбивает текст на сегменты с сохранением разделителей.
+
+    Args:
+        text: Исходный текст
+        mode: "sentence" - по предложениям, "paragraph" - по абзацам
+
+    Returns:
+        List[Tuple[str, str]]: Пары (сегмент, следующий за ним разделитель).
+        Склейка сегментов с разделителями дает исходный текст без ведущих пробелов.
+    """
+    pattern = _PARAGRAPH_RE if mode == "paragraph" else _SENTENCE_RE
+    pieces = pattern.split(text.lstrip())
+
+    segments: List[Tuple[str, str]] = []
+    for i in range(0, len(pieces), 2):
+        body = pieces[i]
+        separator = pieces[i + 1] if i + 1 < len(pieces) else ""
+        if not body.strip():
+            # Пустой фрагмент приклеиваем к разделителю предыдущего сегмента
+            if segments:
+                last_body, last_separator = segments[-1]
+                segments[-1] = (last_body, last_separator + body + separator)
+            continue
+        segments.append((body, separator))
+    return segments
+
+
+def join_segments(bodies: List[str], segments: List[Tuple[str, str]]) -> str:
+    """Собирает переведенные сегменты с исходными разделителями."""
+    return "".join(body + separator for body, (_, separator) in zip(bodies, segments))
+
+
+def chunk_text(
+    text: str,
+    max_tokens: int,
+    estimate: Callable[[str], int] = estimate_tokens,
+) -> List[Tuple[str, str]]:
+    """
+    Разбивает длинный текст на куски не больше max_tokens токенов.
+
+    Границы кусков проходят по абзацам, а слишком длинные абзацы
+    дополнительно режутся по предложениям.
+
+    Returns:
+        List[Tuple[str, str]]: Пары (кусок, следующий за ним разделитель)
+    """
+    units: List[Tuple[str, str]] = []
+    for paragraph, separator in split_segments(text, "paragraph"):
+        if estimate(paragraph) <= max_tokens:
+            units.append((paragraph, separator))
+            continue
+        sentences = split_segments(paragraph, "sentence")
+        last_body, last_separator = sentences[-1]
+        sentences[-1] = (last_body, last_separator + separator)
+        units.extend(sentences)
+
+    chunks: List[Tuple[str, str]] = []
+    current, current_separator, current_tokens = "", "", 0
+    for body, separator in units:
+        tokens = estimate(body)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append((current, current_separator))
+            current, current_tokens = "", 0
+        if current:
+            current += current_separator
+        current += body
+        current_separator = separator
+        current_tokens += tokens
+    if current:
+        chunks.append((current, current_separator))
+    return chunks
@@ -0,0 +1,265 @@
+"""Быстрая офлайн-оценка числа токенов и бюджета ответа модели."""
+
+from contextvars import ContextVar
+from typing import Dict, NamedTuple, Optional, Tuple
+import math
+import re
+
+
+class Calibration(NamedTuple):
+    """Токенов на символ для разных письменностей у семейства токенизаторов."""
+
+    ascii: float
+    cyrillic: float
+    cjk: float
+
+
+# Калибровка по замерам токенизаторов на переводах: латиница и код ~4 символа
+# на токен, кириллица у старых словарей дробится почти посимвольно
+CALIBRATIONS: Dict[str, Calibration] = {
+    "openai": Calibration(ascii=0.25, cyrillic=0.30, cjk=0.90),
+    "anthropic": Calibration(ascii=0.28, cyrillic=0.45, cjk=1.20),
+    "google": Calibration(ascii=0.25, cyrillic=0.28, cjk=0.80),
+    # Неизвестный токенизатор оцениваем с запасом
+    "default": Calibration(ascii=0.28, cyrillic=0.45, cjk=1.20),
+}
+
+# Языки по письменности: названия по-русски, по-английски, самоназвания и коды
+_LATIN_LANGUAGES = {
+    "английский",
+    "немецкий",
+    "французский",
+    "испанский",
+    "итальянский",
+    "португальский",
+    "нидерландский",
+    "польский",
+    "чешский",
+    "словацкий",
+    "шведский",
+    "норвежский",
+    "датский",
+    "финский",
+    "румынский",
+    "венгерский",
+    "турецкий",
+    "индонезийский",
+    "english",
+    "german",
+    "french",
+    "spanish",
+    "italian",
+    "portuguese",
+    "dutch",
+    "polish",
+    "deutsch",
+    "français",
+    "español",
+    "italiano",
+    "português",
+    "en",
+    "de",
+    "fr",
+    "es",
+    "it",
+    "pt",
+    "nl",
+    "pl",
+}
+_CYRILLIC_LANGUAGES = {
+    "русский",
+    "украинский",
+    "белорусский",
+    "болгарский",
+    "сербский",
+    "македонский",
+    "казахский",
+    "киргизский",
+    "монгольский",
+    "таджикский",
+    "russian",
+    "ukrainian",
+    "kazakh",
+    "українська",
+    "қазақ",
+    "ru",
+    "uk",
+    "kk",
+}
+_CJK_LANGUAGES = {
+    "китайский",
+    "японский",
+    "корейский",
+    "chinese",
+    "japanese",
+    "korean",
+    "中文",
+    "日本語",
+    "한국어",
+    "zh",
+    "ja",
+    "ko",
+}
+
+# Иероглифы, кана и хангыль; прочие трехбайтные письменности (деванагари,
+# тайская и т.п.) к ним не относятся
+_CJK_RE = re.compile(
+    r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]"
+)
+
+# Символ иероглифической письменности передает примерно столько же смысла,
+# сколько три символа латиницы или кириллицы
+_CJK_DENSITY = 3.0
+
+# Ответ длиннее прогноза на этот множитель плюс постоянный запас
+OUTPUT_MARGIN = 1.5
+OUTPUT_RESERVE = 256
+# Потолок max_tokens по умолчанию: предел вывода самых старых моделей
+DEFAULT_MAX_OUTPUT = 4096
+
+
+def model_family(provider: Optional[str], model_name: Optional[str] = None) -> str:
+    """
+    Определяет семейство токенизатора модели.
+
+    Для OpenRouter семейство берется из префикса имени модели
+    (anthropic/claude-3.5-sonnet), для своих серверов - "default".
+    """
+    provider = (provider or "").lower()
+    if provider == "openrouter" and model_name and "/" in model_name:
+        provider = model_name.split("/", 1)[0].lower()
+    return provider if provider in CALIBRATIONS else "default"
+
+
+def script_counts(text: str) -> Tuple[int, int, int, int]:
+    """
+    Считает символы по письменностям: (ASCII, двухбайтные, CJK, прочие).
+
+    Вместо цикла по символам используются только операции, выполняемые в C:
+    длина ASCII-части и длина UTF-8. Кириллица, греческий, арабский и прочие
+    алфавиты занимают в UTF-8 два байта. Трехбайтные символы делятся
+    регулярным выражением на иероглифы (с каной и хангылем) и прочие
+    письменности вроде деванагари и тайской.
+    """
+    length = len(text)
+    if text.isascii():
+        return length, 0, 0, 0
+    ascii_count = len(text.encode("ascii", "ignore"))
+    extra_bytes = len(text.encode("utf-8", "ignore")) - length
+    wide = length - ascii_count
+    # extra_bytes = двухбайтные + 2 * трехбайтные (+3 на редкие четырехбайтные)
+    three_byte = min(wide, max(0, extra_bytes - wide))
+    cjk = min(three_byte, len(_CJK_RE.findall(text))) if three_byte else 0
+    return ascii_count, wide - three_byte, cjk, three_byte - cjk
+
+
+def estimate_tokens(text: str, family: str = "default") -> int:
+    """Оценивает число токенов текста для семейства токенизатора."""
+    if not text:
+        return 1
+    rates = CALIBRATIONS.get(family, CALIBRATIONS["default"])
+    ascii_count, cyrillic, cjk, other = script_counts(text)
+    # Индийские и тайская письменности дробятся не мельче иероглифов
+    tokens = (
+        ascii_count * rates.ascii
+        + cyrillic * rates.cyrillic
+        + (cjk + other) * rates.cjk
+    )
+    return max(1, math.ceil(tokens))
+
+
+def _target_rate(target_lang: Optional[str], rates: Calibration) -> float:
+    """
+    Токенов на символ латиницы исходного смысла для целевого языка.
+
+    Неизвестный язык и языки с другими письменностями (греческий, арабский,
+    хинди, тайский и т.п.) оцениваются по самому дорогому тарифу, чтобы
+    перевод не обрезался лимитом ответа.
+    """
+    language = (target_lang or "").strip().lower()
+    if language in _LATIN_LANGUAGES:
+        return rates.ascii
+    if language in _CYRILLIC_LANGUAGES:
+        return rates.cyrillic
+    if language in _CJK_LANGUAGES:
+        return rates.cjk / _CJK_DENSITY
+    return max(rates)
+
+
+def predict_output_tokens(
+    text: str, target_lang: Optional[str], family: str = "default"
+) -> int:
+    """
+    Прогнозирует число токенов перевода текста на целевой язык.
+
+    Перевод сохраняет объем смысла, поэтому исходный текст пересчитывается
+    в символы латиницы, а затем в токены письменности целевого языка.
+    """
+    rates = CALIBRATIONS.get(family, CALIBRATIONS["default"])
+    ascii_count, cyrillic, cjk, other = script_counts(text)
+    units = ascii_count + cyrillic + other + cjk * _CJK_DENSITY
+    return max(1, math.ceil(units * _target_rate(target_lang, rates)))
+
+
+class BudgetScope:
+    """
+    Лимит ответа текущего запроса.
+
+    full - отдать модели весь потолок (повтор обрезанного ответа);
+    limited выставляется, если прогноз сузил лимит ниже потолка.
+    """
+
+    def __init__(self, full: bool = False):
+        self.full = full
+        self.limited = False
+
+
+# Область лимита запроса; задача провайдера наследует ее из контекста
+_budget_scope: ContextVar[Optional[BudgetScope]] = ContextVar(
+    "output_budget_scope", default=None
+)
+
+
+def enter_budget_scope(full: bool = False):
+    """
+    Открывает область лимита для запросов, запущенных в текущем контексте.
+
+    Returns:
+        Tuple: (область, токен для exit_budget_scope)
+    """
+    scope = BudgetScope(full)
+    return scope, _budget_scope.set(scope)
+
+
+def exit_budget_scope(token) -> None:
+    """Закрывает область лимита, открытую enter_budget_scope."""
+    _budget_scope.reset(token)
+
+
+def is_truncated(finish_reason: Optional[str]) -> bool:
+    """Проверяет, что генерация остановлена лимитом токенов ответа."""
+    reason = str(finish_reason or "").lower()
+    return reason == "length" or reason.endswith("max_tokens")
+
+
+def output_budget(
+    text: str,
+    target_lang: Optional[str],
+    family: str = "default",
+    ceiling: int = DEFAULT_MAX_OUTPUT,
+) -> int:
+    """
+    Возвращает max_tokens для перевода: прогноз с запасом, не выше ceiling.
+
+    Узкий лимит не дает модели уйти в бесконечную генерацию и уменьшает
+    резерв, который провайдеры списывают с лимита токенов в минуту.
+    В области с full=True возвращается ceiling.
+    """
+    scope = _budget_scope.get()
+    if scope is not None and scope.full:
+        return ceiling
+    predicted = predict_output_tokens(text, target_lang, family)
+    budget = min(ceiling, math.ceil(predicted * OUTPUT_MARGIN) + OUTPUT_RESERVE)
+    if scope is not None and budget < ceiling:
+        scope.limited = True
+    return budget
@@ -0,0 +1,127 @@
+"""Персистентная память переводов на SQLite."""
+
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationCache:
+    """
+    Дисковый кеш переводов с вытеснением по размеру (LRU) и возрасту.
+
+    Ключ записи - нормализованный исходный текст, целевой язык, текст
+    промпта и модель. База работает в режиме WAL, поэтому чтение не
+    блокируется записью.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 5000, max_age_days: int = 30):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 24 * 3600
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_translations_last_used "
+            "ON translations (last_used)"
+        )
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Нормализует текст: NFC, переводы строк и пробелы по краям строк."""
+        text = unicodedata.normalize("NFC", text).replace("\r\n", "\n")
+        return "\n".join(line.rstrip() for line in text.strip().split("\n"))
+
+    @classmethod
+    def make_key(cls, text: str, target_lang: str, prompt: str, model: str) -> str:
+        """Формирует ключ записи кеша."""
+        payload = json.dumps(
+            [cls.normalize(text), target_lang, prompt, model], ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(
+        self, text: str, target_lang: str, prompt: str, model: str
+    ) -> Optional[str]:
+        """Возвращает сохраненный перевод или None."""
+        key = self.make_key(text, target_lang, prompt, model)
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT result FROM translations WHERE key = ? AND created >= ?",
+            (key, now - self.max_age),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._conn.execute(
+            "UPDATE translations SET last_used = ? WHERE key = ?", (now, key)
+        )
+        self._conn.commit()
+        return row[0]
+
+    def put(
+        self, text: str, target_lang: str, prompt: str, model: str, result: str
+    ) -> None:
+        """Сохраняет перевод и при необходимости вытесняет старые записи."""
+        if not result:
+            return
+        key = self.make_key(text, target_lang, prompt, model)
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO translations (key, result, created, last_used) "
+            "VALUES (?, ?, ?, ?)",
+            (key, result, now, now),
+        )
+        self._conn.commit()
+        self.evict()
+
+    def evict(self) -> None:
+        """Удаляет устаревшие записи и самые давно использованные сверх лимита."""
+        self._conn.execute(
+            "DELETE FROM translations WHERE created < ?", (time.time() - self.max_age,)
+        )
+        count = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM translations WHERE key IN ("
+                "SELECT key FROM translations ORDER BY last_used ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+        self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Возвращает счетчики попаданий и промахов."""
+        entries = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+        }
+
+    def close(self) -> None:
+        """Закрывает соединение с базой."""
+        self._conn.close()
@@ -0,0 +1,144 @@
+"""Долгоживущая сессия перевода с кешем API-клиентов."""
+
+from typing import Any, Dict, Optional, Tuple
+import logging
+from settings_manager import SettingsManager
+from llm_api import LLMApi
+from translation_cache import TranslationCache
+from latency_stats import LatencyStats
+from providers import concurrency_limiter, rate_limiter
+from providers.llm_provider_factory import LLMProviderFactory
+from providers.resilience import CircuitBreaker, get_breaker
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationSession:
+    """
+    Кеширует экземпляры LLMApi (и вместе с ними провайдеров и SDK-клиентов)
+    по ключу (провайдер, модель, эндпоинт, ключ доступа), чтобы убрать
+    построение клиентов с пути от хоткея до первого токена.
+    """
+
+    def __init__(self, settings_manager: SettingsManager):
+        if not isinstance(settings_manager, SettingsManager):
+            raise TypeError("settings_manager должен быть экземпляром SettingsManager")
+
+        self.settings_manager = settings_manager
+        self._apis: Dict[Tuple, LLMApi] = {}
+        self.cache = self._open_cache()
+        self.stats = self._open_stats()
+
+    def _open_cache(self) -> Optional[TranslationCache]:
+        """Открывает память переводов, если она включена в настройках."""
+        settings = self.settings_manager.get_cache_settings()
+        if not settings["enabled"]:
+            return None
+        try:
+            return TranslationCache(
+                settings["path"], settings["max_entries"], settings["max_age_days"]
+            )
+        except Exception as e:
+            logger.error("Не удалось открыть память переводов: %s", e)
+            return None
+
+    def _open_stats(self) -> Optional[LatencyStats]:
+        """Открывает статистику задержек моделей, если она включена в настройках."""
+        settings = self.settings_manager.get_stats_settings()
+        if not settings["enabled"]:
+            return None
+        try:
+            return LatencyStats(
+                settings["path"], settings["window"], settings["max_age_days"]
+            )
+        except Exception as e:
+            logger.error("Не удалось открыть статистику задержек: %s", e)
+            return None
+
+    @staticmethod
+    def _cache_key(model_info: Dict[str, Any]) -> Tuple:
+        """Формирует ключ кеша из параметров, влияющих на клиент провайдера."""
+        return (
+            (model_info.get("provider") or "").lower(),
+            model_info.get("model_name"),
+            model_info.get("api_endpoint"),
+            model_info.get("access_token"),
+            bool(model_info.get("streaming", False)),
+        )
+
+    def get_api(self, model_info: Dict[str, Any]) -> LLMApi:
+        """
+        Возвращает готовый к работе LLMApi для модели.
+
+        Если для той же модели закеширован клиент с другими настройками
+        (эндпоинт, ключ, режим streaming), он вытесняется.
+        """
+        if not isinstance(model_info, dict):
+            raise TypeError("model_info должен быть словарем")
+
+        key = self._cache_key(model_info)
+        api = self._apis.get(key)
+        if api is None:
+            self._evict(key[0], key[1])
+            # Копия: провайдеры могут менять model_info (например, CustomProvider)
+            api = LLMApi(
+                dict(model_info), self.settings_manager, self.cache, self.stats
+            )
+            self._apis[key] = api
+            logger.debug("Создан клиент перевода для %s/%s", key[0], key[1])
+        else:
+            api.update_system_prompt()
+        return api
+
+    def is_available(self, model_info: Dict[str, Any]) -> bool:
+        """
+        Проверяет, что провайдер модели сейчас принимает запросы.
+
+        Смотрит только на выключатель провайдера, клиенты не создаются.
+        """
+        try:
+            breaker = get_breaker(LLMProviderFactory.get_breaker_name(model_info))
+        except ValueError:
+            return False
+        if breaker.state == CircuitBreaker.OPEN:
+            # После reset_timeout разомкнутый выключатель пропустит пробный запрос
+            return breaker.retry_in() <= 0
+        if breaker.state == CircuitBreaker.HALF_OPEN:
+            return not breaker.probing
+        return True
+
+    def _evict(self, provider: str, model_name: str) -> None:
+        """Удаляет из кеша устаревшие клиенты указанной модели."""
+        for key in [k for k in self._apis if k[0] == provider and k[1] == model_name]:
+            self._discard(key)
+
+    def _discard(self, key: Tuple) -> None:
+        """Удаляет клиент из кеша и планирует закрытие его ресурсов."""
+        api = self._apis.pop(key, None)
+        if api is not None:
+            api.schedule_close()
+
+    def sync_with_settings(self) -> None:
+        """Сбрасывает клиенты удаленных моделей и моделей с измененными параметрами."""
+        models, _ = self.settings_manager.get_models()
+        actual = {self._cache_key(m) for m in models}
+        for key in [k for k in self._apis if k not in actual]:
+            self._discard(key)
+
+    async def close(self) -> None:
+        """Закрывает все закешированные клиенты."""
+        apis = list(self._apis.values())
+        self._apis.clear()
+        for api in apis:
+            await api.close()
+        for name, stats in concurrency_limiter.get_all_stats().items():
+            logger.info("Лимит параллельных запросов %s: %s", name, stats)
+        for name, stats in rate_limiter.get_all_stats().items():
+            logger.info("Ожидание лимита частоты %s: %s", name, stats)
+        for name, stats in LLMApi.get_hedge_stats().items():
+            logger.info("Дублирование запросов %s: %s", name, stats)
+        if self.cache is not None:
+            logger.info("Память переводов: %s", self.cache.get_stats())
+            self.cache.close()
+        if self.stats is not None:
+            self.stats.close()
@@ -20,6 +20,7 @@ from settings_manager import SettingsManager
 from .styles import get_style
 from typing import Dict, Optional
 from providers.llm_provider_factory import LLMProviderFactory
+from model_catalog import get_model_catalog
 import asyncio
 import os
 
@@ -83,7 +84,9 @@ class AddModelDialog(QDialog):
         self.refresh_models_button.setFixedSize(24, 24)
         self.refresh_models_button.setIconSize(QSize(16, 16))
         self.refresh_models_button.setToolTip("Получить список моделей")
-        self.refresh_models_button.clicked.connect(self.fetch_available_models)
+        self.refresh_models_button.clicked.connect(
+            lambda: self.fetch_available_models(force=True)
+        )
         model_layout.addWidget(self.refresh_models_button)
 
         self.stream_checkbox = QCheckBox("Использовать потоковый режим")
@@ -219,8 +222,13 @@ class AddModelDialog(QDialog):
         # Обновляем список доступных моделей для нового провайдера
         self.fetch_available_models()
 
-    async def _fetch_models(self):
-        """Асинхронно получает список моделей от выбранного провайдера."""
+    async def _fetch_models(self, force: bool = False):
+        """
+        Асинхронно получает список моделей выбранного провайдера.
+
+        Список берется из каталога моделей сразу; устаревший каталог
+        обновляется в фоне, и новый список подставляется в поле модели.
+        """
         provider = self.provider_combo.currentText()
         api_key_env = self.api_key_edit.text().strip()
         api_key = os.getenv(api_key_env, "")
@@ -245,67 +253,29 @@ class AddModelDialog(QDialog):
             "access_token": api_key,
         }
 
+        def on_update(models):
+            # Провайдер могли сменить, пока шло фоновое обновление
+            if self.provider_combo.currentText() == provider:
+                self._show_models(models)
+
         try:
-            # Создаем провайдер через фабрику
-            provider_instance = LLMProviderFactory.get_provider(config)
-            models = await provider_instance.get_available_models()
-            return models
+            catalog = get_model_catalog(self.settings_manager)
+            return await catalog.get_models(config, on_update, force)
         except Exception as e:
             QMessageBox.warning(
                 self, "Ошибка", f"Не удалось получить список моделей: {str(e)}"
             )
             return []
 
-    def fetch_available_models(self):
+    def fetch_available_models(self, force: bool = False):
         """Получает список доступных моделей от провайдера."""
         self.refresh_models_button.setEnabled(False)
         self.progress_bar.show()
 
         async def fetch():
             try:
-                models = await self._fetch_models()
-                provider = self.provider_combo.currentText()
-
-                # Сохраняем текущий выбор
-                current_text = self.model_name_edit.currentText()
-
-                # Очищаем список и сохраняем все модели
-                self.model_name_edit.clear()
-                self.all_models = models
-
-                # Добавляем существующие модели
-                existing_provider_models = [
-                    model
-                    for model in self.existing_models.values()
-                    if model["provider"] == provider
-                ]
-                for model in existing_provider_models:
-                    self.model_name_edit.addItem(
-                        self.style().standardIcon(self.style().SP_DialogApplyButton),
-                        model["model_name"],
-                        model,
-                    )
-
-                # Добавляем новые модели
-                for model in models:
-                    # Проверяем, не существует ли уже такая модель
-                    if not self.is_model_exists(model["model_name"], provider):
-                        display_name = model["model_name"]
-                        self.model_name_edit.addItem(
-                            self.style().standardIcon(self.style().SP_FileIcon),
-                            display_name,
-                            model,
-                        )
-
-                # Восстанавливаем выбор, если возможно
-                if current_text:
-                    index = self.model_name_edit.findText(current_text)
-                    if index >= 0:
-                        self.model_name_edit.setCurrentIndex(index)
-
-                # Применяем текущий фильтр поиска
-                self.filter_models(self.search_edit.text())
-
+                models = await self._fetch_models(force)
+                self._show_models(models)
             except Exception as e:
                 QMessageBox.warning(
                     self, "Ошибка", f"Не удалось получить список моделей: {str(e)}"
@@ -317,6 +287,50 @@ class AddModelDialog(QDialog):
         # Запускаем асинхронную операцию
         asyncio.create_task(fetch())
 
+    def _show_models(self, models):
+        """Заполняет поле модели списком моделей текущего провайдера."""
+        provider = self.provider_combo.currentText()
+
+        # Сохраняем текущий выбор
+        current_text = self.model_name_edit.currentText()
+
+        # Очищаем список и сохраняем все модели
+        self.model_name_edit.clear()
+        self.all_models = models
+
+        # Добавляем существующие модели
+        existing_provider_models = [
+            model
+            for model in self.existing_models.values()
+            if model["provider"] == provider
+        ]
+        for model in existing_provider_models:
+            self.model_name_edit.addItem(
+                self.style().standardIcon(self.style().SP_DialogApplyButton),
+                model["model_name"],
+                model,
+            )
+
+        # Добавляем новые модели
+        for model in models:
+            # Проверяем, не существует ли уже такая модель
+            if not self.is_model_exists(model["model_name"], provider):
+                display_name = model["model_name"]
+                self.model_name_edit.addItem(
+                    self.style().standardIcon(self.style().SP_FileIcon),
+                    display_name,
+                    model,
+                )
+
+        # Восстанавливаем выбор, если возможно
+        if current_text:
+            index = self.model_name_edit.findText(current_text)
+            if index >= 0:
+                self.model_name_edit.setCurrentIndex(index)
+
+        # Применяем текущий фильтр поиска
+        self.filter_models(self.search_edit.text())
+
     def get_model_info(self) -> Optional[Dict[str, str]]:
         """Собирает информацию о модели из диалогового окна."""
         provider = self.provider_combo.currentText()
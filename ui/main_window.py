@@ -14,23 +14,34 @@ from PyQt5.QtWidgets import (
     QMessageBox,
     QProgressBar,
     QDialog,
+    QTabWidget,
 )
 from PyQt5.QtCore import (
     pyqtSignal,
     Qt,
     QSize,
+    QTimer,
 )
 from settings_manager import SettingsManager
+from connection_prewarmer import ConnectionPrewarmer
+from providers.resilience import CircuitBreaker, add_state_listener, get_breakers
 from .styles import get_style
 from .settings_window import SettingsWindow
-from llm_api import LLMApi
+from .model_stats_delegate import STATS_ROLE, ModelStatsDelegate
+from .stream_sink import StreamingTextSink
+from translation_session import TranslationSession
+from latency_stats import format_summary, format_summary_tooltip
+from model_catalog import refresh_stale
+from model_router import AUTO_MODEL, ModelRouter
+from token_estimator import estimate_tokens
 import os
 from qasync import asyncSlot
-from PyQt5.QtGui import QFont, QTextCursor, QIcon
+from PyQt5.QtGui import QFont, QIcon
 from ui.events import UpdateTranslationEvent
 from PyQt5.QtWidgets import QShortcut
 from PyQt5.QtGui import QKeySequence
 import asyncio
+import time
 from . import resources_rc  # noqa: F401
 
 
@@ -66,6 +77,7 @@ class MainWindow(QMainWindow):
     # Сигналы
     clipboard_updated = pyqtSignal(str)
     show_window_requested = pyqtSignal()
+    prewarm_requested = pyqtSignal()
 
     def __init__(self):
         super().__init__()
@@ -81,6 +93,13 @@ class MainWindow(QMainWindow):
         # Подключение сигналов к слотам
         self.clipboard_updated.connect(self.update_clipboard)
         self.show_window_requested.connect(self.show_window)
+        self.prewarm_requested.connect(self.prewarm_connections)
+
+        # Долгоживущая сессия с кешем провайдеров и SDK-клиентов
+        self.translation_session = TranslationSession(self.settings_manager)
+        self.router = self._create_router()
+        # Причина последнего автоматического выбора модели
+        self.last_route_reason = None
 
         self.current_translation_task = None  # Текущая задача перевода
         self._translation_tasks = set()
@@ -100,6 +119,97 @@ class MainWindow(QMainWindow):
         self.apply_theme()
 
         self.setup_shortcuts()
+        self._setup_prewarm()
+        self._setup_breaker_status()
+        # Списки моделей для диалога добавления модели обновляются заранее
+        QTimer.singleShot(0, self.refresh_model_catalog)
+
+    def _create_router(self):
+        """Создает автоматический выбор модели, если ведется статистика задержек."""
+        stats = self.translation_session.stats
+        if stats is None:
+            return None
+        routing = self.settings_manager.get_routing_settings()
+        return ModelRouter(
+            stats,
+            routing["explore_rate"],
+            routing["half_life_hours"],
+            is_available=self.translation_session.is_available,
+        )
+
+    def _add_auto_model_item(self, selected):
+        """Добавляет в список моделей пункт автоматического выбора."""
+        if self.router is None:
+            return
+        self.model_combo.addItem(
+            self.style().standardIcon(self.style().SP_BrowserReload), AUTO_MODEL
+        )
+        if selected:
+            self.model_combo.setCurrentText(AUTO_MODEL)
+
+    def _setup_prewarm(self):
+        """Настраивает прогрев соединений при старте и пока окно открыто."""
+        self.prewarmer = ConnectionPrewarmer(self.settings_manager)
+        network = self.settings_manager.get_network_settings()
+
+        # Периодически обновляем простаивающие соединения, пока окно видно
+        self.keepalive_timer = QTimer(self)
+        self.keepalive_timer.setInterval(
+            max(1, network["keepalive_refresh_interval"]) * 1000
+        )
+        self.keepalive_timer.timeout.connect(self.prewarm_connections)
+        if self.isVisible():
+            self.keepalive_timer.start()
+
+        if network["prewarm_on_start"]:
+            QTimer.singleShot(0, self.prewarm_connections)
+
+    def _setup_breaker_status(self):
+        """Добавляет в строку состояния индикатор недоступных провайдеров."""
+        self.breaker_label = QLabel(self)
+        self.breaker_label.hide()
+        self.statusBar().addPermanentWidget(self.breaker_label)
+        add_state_listener(self.on_breaker_state_changed)
+
+    def on_breaker_state_changed(self, breaker):
+        """Обновляет индикатор при размыкании или восстановлении провайдера."""
+        parts = []
+        for item in get_breakers():
+            if item.state == CircuitBreaker.OPEN:
+                until = time.strftime(
+                    "%H:%M:%S", time.localtime(time.time() + item.retry_in())
+                )
+                parts.append(f"{item.name}: недоступен до {until}")
+            elif item.state == CircuitBreaker.HALF_OPEN:
+                parts.append(f"{item.name}: проверка доступности")
+        self.breaker_label.setText("; ".join(parts))
+        self.breaker_label.setVisible(bool(parts))
+
+    @asyncSlot()
+    async def prewarm_connections(self):
+        """Прогревает соединения к эндпоинту текущей и недавних моделей."""
+        try:
+            await self.prewarmer.prewarm(self.get_selected_model_config())
+        except Exception as e:
+            print(f"Prewarm error: {e}")
+
+    @asyncSlot()
+    async def refresh_model_catalog(self):
+        """Обновляет в фоне устаревшие списки моделей настроенных провайдеров."""
+        try:
+            await refresh_stale(self.settings_manager)
+        except Exception as e:
+            print(f"Model catalog refresh error: {e}")
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if hasattr(self, "keepalive_timer"):
+            self.keepalive_timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        if hasattr(self, "keepalive_timer"):
+            self.keepalive_timer.stop()
 
     def _setup_ui(self):
         """Настройка пользовательского интерфейса."""
@@ -131,10 +241,22 @@ class MainWindow(QMainWindow):
         self.language_combo.setCurrentText(current_language)
         self.language_combo.currentTextChanged.connect(self.on_language_changed)
 
+        # Переключатель перевода сразу на все языки из настроек
+        self.fanout_button = QToolButton(self)
+        self.fanout_button.setText("Все")
+        self.fanout_button.setCheckable(True)
+        self.fanout_button.setFixedHeight(32)
+        self.fanout_button.setToolTip("Переводить сразу на все языки списка")
+        self.fanout_button.setChecked(
+            self.settings_manager.get_fanout_settings()["enabled"]
+        )
+        self.fanout_button.toggled.connect(self.on_fanout_toggled)
+
         # Дропбокс выбора модели
         model_label = QLabel("Модель:", self)
         self.model_combo = QComboBox(self)
         self.model_combo.setMinimumWidth(150)
+        self.model_combo.setItemDelegate(ModelStatsDelegate(self.model_combo))
         models, current_model = self.settings_manager.get_models()
         for model in models:
             self.model_combo.addItem(
@@ -142,6 +264,10 @@ class MainWindow(QMainWindow):
             )
         if current_model:
             self.model_combo.setCurrentText(current_model["name"])
+        self._add_auto_model_item(
+            self.settings_manager.get_routing_settings()["enabled"]
+        )
+        self.refresh_model_stats()
         self.model_combo.currentTextChanged.connect(self.on_model_changed)
 
         # Дропбокс выбора системного промпта
@@ -172,6 +298,7 @@ class MainWindow(QMainWindow):
         top_layout.addWidget(translate_button)
         top_layout.addWidget(language_label)
         top_layout.addWidget(self.language_combo)
+        top_layout.addWidget(self.fanout_button)
         top_layout.addWidget(model_label)
         top_layout.addWidget(self.model_combo)
         top_layout.addWidget(prompt_label)
@@ -212,7 +339,16 @@ class MainWindow(QMainWindow):
         self.translated_text.copy_button.setToolTip("Копировать перевод")
         self.translated_text.copy_button.clicked.connect(self.copy_translation)
 
+        # Потоковый вывод дописывается в поле не чаще одного раза за кадр
+        self.stream_sink = StreamingTextSink(self.translated_text, parent=self)
+
         translated_layout.addWidget(self.translated_text)
+
+        # Вкладки с переводами на все языки; у каждой свой потоковый вывод
+        self.fanout_tabs = QTabWidget(self)
+        self.fanout_tabs.hide()
+        self._fanout_views = {}
+        translated_layout.addWidget(self.fanout_tabs)
         texts_layout.addWidget(translated_group)
 
         central_layout.addLayout(texts_layout)
@@ -245,6 +381,8 @@ class MainWindow(QMainWindow):
 
     def update_model_combo(self):
         """Обновляет список моделей в выпадающем списке."""
+        # Заполнение списка вызывает on_model_changed, запоминаем режим заранее
+        auto = self.model_combo.currentText() == AUTO_MODEL
         self.model_combo.clear()
         models, current_model = self.settings_manager.get_models()
 
@@ -259,6 +397,25 @@ class MainWindow(QMainWindow):
             index = self.model_combo.findText(current_model["name"])
             if index >= 0:
                 self.model_combo.setCurrentIndex(index)
+        self._add_auto_model_item(auto)
+        self.refresh_model_stats()
+
+    def refresh_model_stats(self):
+        """Показывает медиану и p95 времени ответа рядом с каждой моделью."""
+        stats = self.translation_session.stats
+        if stats is None:
+            return
+        models, _ = self.settings_manager.get_models()
+        by_name = {model["name"]: model for model in models}
+        for index in range(self.model_combo.count()):
+            model = by_name.get(self.model_combo.itemText(index))
+            if not model:
+                continue
+            summary = stats.get_summary(model["provider"], model["model_name"])
+            self.model_combo.setItemData(index, format_summary(summary), STATS_ROLE)
+            self.model_combo.setItemData(
+                index, format_summary_tooltip(summary), Qt.ToolTipRole
+            )
 
     def update_prompt_combo(self):
         """Обновляет список системных промптов в выпадающем меню."""
@@ -294,8 +451,8 @@ class MainWindow(QMainWindow):
             return
 
         try:
-            # Создаем экземпляр API клиента
-            api = LLMApi(model_info, self.settings_manager)
+            # Берем закешированный API клиент
+            api = self.translation_session.get_api(model_info)
 
             # Получаем целевой язык
             target_lang = self.language_combo.currentText()
@@ -313,6 +470,9 @@ class MainWindow(QMainWindow):
     async def start_translation(self):
         """Запускает процесс перевода с учетом режима streaming."""
         try:
+            # Повторный запуск заменяет текущий перевод: одинаковый запрос
+            # подхватит уже идущий поток в LLMApi, а не начнет новый
+            self.cancel_translation()
             self.cancel_button.show()  # Показываем кнопку отмены
             task = asyncio.create_task(self._start_translation_async())
             self.current_translation_task = task
@@ -321,45 +481,51 @@ class MainWindow(QMainWindow):
         except Exception as e:
             self.show_error_message(str(e))
 
-    async def handle_streaming_translation(self):
+    async def handle_streaming_translation(self, model_config=None):
         """Обрабатывает потоковый перевод."""
         self.progress_bar.show()
+        self.stream_sink.reset()
         self.translated_text.clear()
 
         text = self.text_edit.toPlainText()
         target_lang = self.language_combo.currentText()
-        model_config = self.get_selected_model_config()
+        model_config = model_config or self.get_selected_model_config(text)
 
         try:
-            llm_api = LLMApi(model_config, self.settings_manager)
+            llm_api = self.translation_session.get_api(model_config)
             print(f"🔥 DEBUG STREAMING: model_config = {model_config}")
             # Создаем асинхронную лямбда-функцию для callback
             translated = await llm_api.translate(
                 text, target_lang, streaming_callback=lambda t: self.update_result(t)
             )
+            self.stream_sink.flush()
             print(
                 f"🔥 DEBUG STREAMING: translated = '{translated}' (type: {type(translated)}, len: {len(translated) if translated else 'None'})"
             )
 
-            # Если streaming не сработал, устанавливаем результат напрямую
-            if translated and not self.translated_text.toPlainText():
+            # Если streaming не сработал или итоговый перевод отличается от
+            # выведенного (например, повтор обрезанного ответа), ставим его
+            if translated and self.translated_text.toPlainText() != translated:
                 self.translated_text.setText(translated)
                 print(
                     f"🔥 DEBUG STREAMING: Set text directly, UI field = '{self.translated_text.toPlainText()}'"
                 )
+            self.show_dispatch_status(llm_api)
         finally:
+            self.stream_sink.finish()
             self.progress_bar.hide()
 
-    async def handle_regular_translation(self):
+    async def handle_regular_translation(self, model_config=None):
         """Обрабатывает обычный перевод."""
         self.progress_bar.show()
+        self.stream_sink.reset()
 
         text = self.text_edit.toPlainText()
         target_lang = self.language_combo.currentText()
-        model_config = self.get_selected_model_config()
+        model_config = model_config or self.get_selected_model_config(text)
 
         try:
-            llm_api = LLMApi(model_config, self.settings_manager)
+            llm_api = self.translation_session.get_api(model_config)
             translated = await llm_api.translate(text, target_lang)
             print(
                 f"🔥 DEBUG: translated = '{translated}' (type: {type(translated)}, len: {len(translated) if translated else 'None'})"
@@ -368,9 +534,91 @@ class MainWindow(QMainWindow):
             print(
                 f"🔥 DEBUG: UI field after setText = '{self.translated_text.toPlainText()}'"
             )
+            self.show_dispatch_status(llm_api)
         finally:
             self.progress_bar.hide()
 
+    def _show_fanout_tabs(self, languages):
+        """Создает по вкладке с полем перевода на каждый язык."""
+        for edit, sink in self._fanout_views.values():
+            sink.reset()
+            edit.deleteLater()
+        self.fanout_tabs.clear()
+        self._fanout_views = {}
+        for lang in languages:
+            edit = TextEditWithCopyButton(self)
+            edit.setReadOnly(True)
+            edit.setFont(self.translated_text.font())
+            edit.copy_button.setToolTip("Копировать перевод")
+            edit.copy_button.clicked.connect(self.copy_translation)
+            sink = StreamingTextSink(edit, parent=edit)
+            self._fanout_views[lang] = (edit, sink)
+            self.fanout_tabs.addTab(edit, f"{lang} …")
+        current = self.language_combo.currentText()
+        if current in self._fanout_views:
+            self.fanout_tabs.setCurrentIndex(languages.index(current))
+        self.translated_text.hide()
+        self.fanout_tabs.show()
+
+    async def handle_fanout_translation(self, model_config=None):
+        """Переводит текст сразу на все языки из настроек, каждый во вкладке."""
+        self.progress_bar.show()
+        text = self.text_edit.toPlainText()
+        languages, _ = self.settings_manager.get_languages()
+        model_config = model_config or self.get_selected_model_config(text)
+        self._show_fanout_tabs(languages)
+
+        async def on_delta(lang, delta):
+            view = self._fanout_views.get(lang)
+            if view and delta:
+                view[1].append(delta)
+
+        def on_done(lang, result):
+            view = self._fanout_views.get(lang)
+            if not view:
+                return
+            edit, sink = view
+            sink.finish()
+            index = self.fanout_tabs.indexOf(edit)
+            if isinstance(result, Exception):
+                self.fanout_tabs.setTabText(index, f"{lang} ⚠")
+                self.fanout_tabs.setTabToolTip(index, str(result))
+                edit.setPlainText(f"Ошибка: {result}")
+                return
+            self.fanout_tabs.setTabText(index, lang)
+            if result and edit.document().isEmpty():
+                edit.setPlainText(result)
+
+        try:
+            llm_api = self.translation_session.get_api(model_config)
+            await llm_api.translate_many(
+                text,
+                languages,
+                on_delta if model_config.get("streaming", False) else None,
+                on_done,
+            )
+            self.show_dispatch_status(llm_api)
+        finally:
+            for _, sink in self._fanout_views.values():
+                sink.finish()
+            self.progress_bar.hide()
+
+    def on_fanout_toggled(self, checked):
+        """Переключает вывод между одним полем и вкладками языков."""
+        self.settings_manager.set_fanout_enabled(checked)
+        if not checked:
+            self.fanout_tabs.hide()
+            self.translated_text.show()
+        elif self._fanout_views:
+            self.translated_text.hide()
+            self.fanout_tabs.show()
+
+    def _current_output(self):
+        """Возвращает поле перевода, которое сейчас видит пользователь."""
+        if self.fanout_tabs.isVisible() and self.fanout_tabs.currentWidget():
+            return self.fanout_tabs.currentWidget()
+        return self.translated_text
+
     @asyncSlot()
     async def on_clipboard_updated(self, text):
         """Обработчик обновления буфера обмена с хоткея."""
@@ -420,6 +668,8 @@ class MainWindow(QMainWindow):
 
         if self.settings_window.exec_() == QDialog.Accepted:
             self.apply_font_settings()
+            # Сбрасываем клиенты моделей, чьи настройки изменились
+            self.translation_session.sync_with_settings()
 
             # Получаем выбранную в настройках модель
             selected_item = self.settings_window.models_list.currentItem()
@@ -445,6 +695,9 @@ class MainWindow(QMainWindow):
         if not model_name_display:
             return
 
+        # Автоматический выбор запоминается отдельно от текущей модели
+        self.settings_manager.set_routing_enabled(model_name_display == AUTO_MODEL)
+
         parts = model_name_display.split(" - ")
         if len(parts) < 2:
             return
@@ -492,7 +745,7 @@ class MainWindow(QMainWindow):
             "access_token": os.getenv("OPENAI_API_KEY"),
         }
 
-        llm = LLMApi(model_info, self.settings_manager)
+        llm = self.translation_session.get_api(model_info)
         return await llm.translate(text, target_lang)
 
     def apply_font_settings(self):
@@ -505,6 +758,8 @@ class MainWindow(QMainWindow):
         # Применяем шрифт напрямую к существующим виджетам
         self.text_edit.setFont(font)
         self.translated_text.setFont(font)
+        for edit, _ in self._fanout_views.values():
+            edit.setFont(font)
 
     def show_settings(self):
         settings_dialog = SettingsWindow(self)
@@ -518,30 +773,77 @@ class MainWindow(QMainWindow):
 
         self.text_edit.setFont(font)
         self.translated_text.setFont(font)
+        for edit, _ in self._fanout_views.values():
+            edit.setFont(font)
 
     async def update_result(self, text):
         """Асинхронное обновление текста перевода с обработкой специальных маркеров"""
-        print(f"🔥 DEBUG update_result called with: '{text}' (type: {type(text)})")
         if not text or text.startswith("[DONE]"):
-            print("🔥 DEBUG update_result: returning early (empty or DONE)")
             return
         if text.startswith("[META]"):
             self.statusBar().showMessage(text[6:], 5000)
-            print("🔥 DEBUG update_result: META message set")
             return
 
-        # Добавляем текст и автоматически прокручиваем
-        self.translated_text.moveCursor(QTextCursor.End)
-        self.translated_text.insertPlainText(text)
-        self.translated_text.ensureCursorVisible()
-        QApplication.processEvents()
-        print(
-            f"🔥 DEBUG update_result: text added, UI field = '{self.translated_text.toPlainText()}')"
-        )
+        # Дельта попадет в поле при ближайшей отрисовке кадра
+        self.stream_sink.append(text)
 
-    def get_selected_model_config(self):
-        """Возвращает конфигурацию выбранной модели."""
+    def show_dispatch_status(self, llm_api):
+        """Показывает в строке состояния, как был выполнен последний перевод."""
+        dispatch = llm_api.last_dispatch
+        if not dispatch:
+            return
+        message = f"Модель: {dispatch.get('model')}"
+        if self.model_combo.currentText() == AUTO_MODEL and self.last_route_reason:
+            message += f" [авто: {self.last_route_reason}]"
+        segments = dispatch.get("segments")
+        fanout = dispatch.get("fanout")
+        if fanout:
+            message += f", языков: {fanout['languages']}"
+            if fanout["cached"]:
+                message += f", из памяти: {fanout['cached']}"
+            if fanout["failed"]:
+                message += f", с ошибкой: {fanout['failed']}"
+        if dispatch.get("cached"):
+            message += " (из памяти переводов)"
+        elif segments:
+            cached = segments["total"] - segments["missed"]
+            message += f" (из памяти: {cached} из {segments['total']} сегментов)"
+        pivot = dispatch.get("pivot")
+        if pivot:
+            message += f", через {pivot['language']}"
+            if pivot["cached"]:
+                message += " (из памяти)"
+        tier = dispatch.get("tier")
+        if tier:
+            message += ", короткий текст" if tier == "short" else ", длинный текст"
+        if dispatch.get("chunks"):
+            message += f", частей: {dispatch['chunks']}"
+        if dispatch.get("hedged"):
+            message += f", запрос продублирован, ответила: {dispatch.get('served_by')}"
+        elif dispatch.get("fallbacks"):
+            message += f", ответила резервная модель: {dispatch.get('served_by')}"
+        if dispatch.get("rate_limit_wait", 0) >= 0.05:
+            message += f", ожидание лимита: {dispatch['rate_limit_wait']:.1f} с"
+        self.statusBar().showMessage(message, 5000)
+
+    def get_selected_model_config(self, text=None):
+        """
+        Возвращает конфигурацию выбранной модели.
+
+        В режиме «Авто» модель выбирается по статистике задержек с учетом
+        длины текста; без текста (например, для прогрева) - без разведки.
+        """
         display_name = self.model_combo.currentText()
+        if display_name == AUTO_MODEL and self.router is not None:
+            pool = self.settings_manager.get_routing_settings()["pool"]
+            model, reason = self.router.choose(
+                pool, estimate_tokens(text or ""), explore=text is not None
+            )
+            if model is not None:
+                self.last_route_reason = reason
+                return self.settings_manager.get_model_info(
+                    model["provider"], model["model_name"]
+                )
         parts = display_name.split(" - ")
         if len(parts) >= 2:
             provider = parts[-1]
@@ -552,9 +854,7 @@ class MainWindow(QMainWindow):
 
     def event(self, event):
         if isinstance(event, UpdateTranslationEvent):
-            self.translated_text.moveCursor(QTextCursor.End)
-            self.translated_text.insertPlainText(event.text)
-            self.translated_text.repaint()  # Принудительная перерисовка
+            self.stream_sink.append(event.text)
             return True
         return super().event(event)
 
@@ -591,17 +891,23 @@ class MainWindow(QMainWindow):
     async def _start_translation_async(self):
         """Асинхронная часть начала перевода."""
         try:
-            model_config = self.get_selected_model_config()
-            if model_config.get("streaming", False):
-                await self.handle_streaming_translation()
+            model_config = self.get_selected_model_config(self.text_edit.toPlainText())
+            if self.fanout_button.isChecked():
+                await self.handle_fanout_translation(model_config)
+            elif model_config.get("streaming", False):
+                await self.handle_streaming_translation(model_config)
             else:
-                await self.handle_regular_translation()
+                await self.handle_regular_translation(model_config)
         except asyncio.CancelledError:
-            self.translated_text.append("\nПеревод отменен.")
+            # Перевод, замененный новым запуском, не трогает интерфейс
+            if asyncio.current_task() is self.current_translation_task:
+                self._current_output().append("\nПеревод отменен.")
         except Exception as e:
             self.show_error_message(str(e))
         finally:
-            self.cancel_button.hide()  # Скрываем кнопку отмены после завершения
+            if asyncio.current_task() is self.current_translation_task:
+                self.cancel_button.hide()  # Скрываем кнопку отмены после завершения
+                self.refresh_model_stats()
 
     def cancel_translation(self):
         """Отменяет текущий процесс перевода."""
@@ -611,7 +917,7 @@ class MainWindow(QMainWindow):
 
     def copy_translation(self):
         """Копирует переведенный текст в буфер обмена."""
-        text = self.translated_text.toPlainText()
+        text = self._current_output().toPlainText()
         if text:
             clipboard = QApplication.clipboard()
             clipboard.setText(text)
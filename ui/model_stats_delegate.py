@@ -0,0 +1,40 @@
+"""Отрисовка статистики задержек рядом с названием модели в списках."""
+
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt5.QtCore import Qt, QSize
+
+# Роль данных элемента со строкой статистики модели
+STATS_ROLE = Qt.UserRole + 1
+
+
+class ModelStatsDelegate(QStyledItemDelegate):
+    """
+    Рисует строку статистики серым справа от названия модели.
+
+    Текст элемента остается прежним, поэтому поиск модели по тексту
+    (findText, currentText) продолжает работать.
+    """
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        stats = index.data(STATS_ROLE)
+        if not stats:
+            return
+        painter.save()
+        color = option.palette.color(
+            option.palette.HighlightedText
+            if option.state & QStyle.State_Selected
+            else option.palette.PlaceholderText
+        )
+        painter.setPen(color)
+        rect = option.rect.adjusted(0, 0, -6, 0)
+        painter.drawText(rect, Qt.AlignRight | Qt.AlignVCenter, stats)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        size = super().sizeHint(option, index)
+        stats = index.data(STATS_ROLE)
+        if stats:
+            extra = option.fontMetrics.horizontalAdvance(stats) + 18
+            return QSize(size.width() + extra, size.height())
+        return size
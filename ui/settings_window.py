@@ -17,6 +17,7 @@ from PyQt5.QtWidgets import (
     QTabWidget,
     QFontComboBox,
     QFormLayout,
+    QFileDialog,
 )
 from PyQt5.QtGui import QFont, QKeyEvent
 from PyQt5.QtCore import Qt
@@ -24,6 +25,8 @@ from settings_manager import SettingsManager
 from .styles import get_style
 from .add_model_dialog import AddModelDialog
 from .add_prompt_dialog import AddPromptDialog
+from .model_stats_delegate import STATS_ROLE, ModelStatsDelegate
+from latency_stats import format_summary, format_summary_tooltip
 
 
 class SettingsWindow(QDialog):
@@ -308,6 +311,7 @@ class SettingsWindow(QDialog):
         self.models_list = QListWidget()
         self.models_list.setMaximumHeight(150)
         self.models_list.itemDoubleClicked.connect(self.edit_model)
+        self.models_list.setItemDelegate(ModelStatsDelegate(self.models_list))
         models_layout.addWidget(self.models_list)
 
         # Создаем горизонтальный layout для кнопок управления моделями
@@ -342,7 +346,17 @@ class SettingsWindow(QDialog):
         self.delete_model_btn.setFixedHeight(button_height)
         self.delete_model_btn.clicked.connect(self.remove_model)
 
+        # Кнопка выгрузки статистики задержек
+        self.export_stats_btn = QToolButton()
+        self.export_stats_btn.setIcon(
+            self.style().standardIcon(self.style().SP_DialogSaveButton)
+        )
+        self.export_stats_btn.setToolTip("Выгрузить статистику задержек в CSV")
+        self.export_stats_btn.setFixedHeight(button_height)
+        self.export_stats_btn.clicked.connect(self.export_model_stats)
+
         # Добавляем кнопки в горизонтальный layout
+        models_input_layout.addWidget(self.export_stats_btn)
         models_input_layout.addStretch()
         models_input_layout.addWidget(self.add_model_btn)
         models_input_layout.addWidget(self.edit_model_btn)
@@ -537,9 +551,15 @@ class SettingsWindow(QDialog):
         available_models, _ = self.settings_manager.get_models()
         self.models_list.clear()
 
-        # Добавляем модели в список
+        # Добавляем модели в список вместе со статистикой задержек
+        stats = self._get_model_stats()
         for model in available_models:
             self.models_list.addItem(model["name"])
+            if stats is not None:
+                summary = stats.get_summary(model["provider"], model["model_name"])
+                item = self.models_list.item(self.models_list.count() - 1)
+                item.setData(STATS_ROLE, format_summary(summary))
+                item.setToolTip(format_summary_tooltip(summary))
 
         # Получаем текущую модель из главного окна
         if self.parent():
@@ -844,6 +864,31 @@ class SettingsWindow(QDialog):
             # Перемещаем окно
             self.move(x, y)
 
+    def _get_model_stats(self):
+        """Возвращает статистику задержек из сессии перевода главного окна."""
+        session = getattr(self.parent(), "translation_session", None)
+        return session.stats if session is not None else None
+
+    def export_model_stats(self):
+        """Выгружает замеры задержек моделей в CSV-файл."""
+        stats = self._get_model_stats()
+        if stats is None:
+            QMessageBox.information(
+                self, "Статистика", "Статистика задержек отключена в настройках."
+            )
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Выгрузить статистику", "latency_stats.csv", "CSV (*.csv)"
+        )
+        if not path:
+            return
+        try:
+            count = stats.export_csv(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось сохранить файл: {e}")
+            return
+        QMessageBox.information(self, "Статистика", f"Выгружено замеров: {count}")
+
     def update_models_list(self):
         """Обновляет список моделей в интерфейсе."""
         self.load_settings()  # Перезагружаем все настройки
@@ -0,0 +1,81 @@
+"""Буферизованный вывод потокового перевода в текстовое поле."""
+
+import logging
+from typing import Dict, List
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtGui import QTextCursor
+from PyQt5.QtWidgets import QTextEdit
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingTextSink(QObject):
+    """
+    Накапливает дельты потокового ответа и дописывает их в QTextEdit
+    не чаще одного раза за кадр.
+    """
+
+    def __init__(self, text_edit: QTextEdit, interval_ms: int = 16, parent=None):
+        super().__init__(parent)
+        self.text_edit = text_edit
+        self._buffer: List[str] = []
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.flush)
+        self._stats = {"deltas": 0, "flushes": 0, "merged_deltas": 0}
+        self._reported = False
+
+    def append(self, text: str) -> None:
+        """Добавляет дельту в буфер и планирует отрисовку на следующий кадр."""
+        if not text:
+            return
+        self._buffer.append(text)
+        self._stats["deltas"] += 1
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self) -> None:
+        """Немедленно дописывает накопленные дельты в текстовое поле."""
+        self._timer.stop()
+        if not self._buffer:
+            return
+        chunk = "".join(self._buffer)
+        self._stats["flushes"] += 1
+        self._stats["merged_deltas"] += len(self._buffer) - 1
+        self._buffer.clear()
+
+        # Прокручиваем вниз, только если пользователь уже был внизу
+        scrollbar = self.text_edit.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+
+        cursor = QTextCursor(self.text_edit.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(chunk)
+
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def reset(self) -> None:
+        """Отбрасывает буфер и обнуляет статистику перед новым переводом."""
+        self._timer.stop()
+        self._buffer.clear()
+        self._stats = {"deltas": 0, "flushes": 0, "merged_deltas": 0}
+        self._reported = False
+
+    def finish(self) -> None:
+        """Дописывает остаток буфера и один раз за поток пишет статистику в лог."""
+        self.flush()
+        if self._reported or not self._stats["deltas"]:
+            return
+        self._reported = True
+        logger.debug(
+            "Поток выведен: %d дельт за %d отрисовок, слито %d",
+            self._stats["deltas"],
+            self._stats["flushes"],
+            self._stats["merged_deltas"],
+        )
+
+    def get_stats(self) -> Dict[str, int]:
+        """Возвращает число дельт, отрисовок и слитых в одну отрисовку дельт."""
+        return dict(self._stats)